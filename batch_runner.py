@@ -0,0 +1,300 @@
+"""Batch runner for queues of CFO team requests.
+
+Reads a job file, runs the jobs on independent CFO teams concurrently, retries
+transient model/tool failures with exponential backoff, and checkpoints every
+finished job so a restarted batch skips work that already succeeded.
+
+Job files are JSONL (one {"id": ..., "prompt": ...} object per line) or a JSON
+list of such objects; "id" is optional and defaults to a hash of the prompt.
+
+Usage:
+    python batch_runner.py jobs.jsonl --concurrency 3
+    python batch_runner.py jobs.jsonl --checkpoint overnight.checkpoint.jsonl --max-attempts 5 --json
+"""
+import argparse
+import hashlib
+import json
+import queue
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Error text that marks a failure as worth retrying: throttling, timeouts and provider-side outages
+TRANSIENT_PATTERNS = re.compile(
+    r"throttl|too many requests|rate.?limit|\b429\b|\b50[0234]\b|service ?unavailable|internal ?server|"
+    r"model ?timeout|timed? ?out|temporar|connection (?:reset|aborted|refused|error)|read timeout|"
+    r"ModelNotReady|ServiceQuotaExceeded",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Job:
+    id: str
+    prompt: str
+
+
+@dataclass
+class JobResult:
+    id: str
+    status: str  # "ok" or "failed"
+    attempts: int
+    latency_s: float
+    content: Optional[str] = None
+    error: Optional[str] = None
+    finished_at: float = field(default_factory=time.time)
+
+
+def load_jobs(path: Path) -> List[Job]:
+    """
+    Read jobs from a JSONL file or a JSON list.
+
+    Args:
+        path: Job file
+
+    Returns:
+        Jobs in file order; duplicate ids raise ValueError
+    """
+    text = Path(path).read_text()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        records = json.loads(stripped)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    jobs, seen = [], set()
+    for record in records:
+        if isinstance(record, str):
+            record = {"prompt": record}
+        prompt = record["prompt"]
+        job_id = str(record.get("id") or hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12])
+        if job_id in seen:
+            raise ValueError(f"Duplicate job id '{job_id}' in {path}")
+        seen.add(job_id)
+        jobs.append(Job(id=job_id, prompt=prompt))
+    return jobs
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished jobs.
+
+    Only successful jobs count as done, so failed jobs are attempted again when
+    the batch is restarted. Lines are flushed as each job finishes, so a crash
+    loses at most the jobs that were still running.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def completed(self) -> Set[str]:
+        done: Set[str] = set()
+        if not self.path.exists():
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # partially written last line
+                if record.get("status") == "ok":
+                    done.add(record["id"])
+        return done
+
+    def record(self, result: JobResult) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(asdict(result)) + "\n")
+
+
+def is_transient(error: Any) -> bool:
+    """True for throttling, timeouts and provider-side errors that a retry may fix."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code in (429, 500, 502, 503, 504):
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        code = response.get("Error", {}).get("Code", "")
+        if TRANSIENT_PATTERNS.search(code):
+            return True
+    return bool(TRANSIENT_PATTERNS.search(f"{type(error).__name__}: {error}"))
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter, so throttled workers do not retry in lockstep."""
+    return random.uniform(0, min(max_delay, base_delay * (2**attempt)))
+
+
+@dataclass
+class BatchReport:
+    results: List[JobResult]
+    skipped: int
+    seconds: float
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(r.latency_s for r in self.results if r.status == "ok")
+        succeeded = sum(r.status == "ok" for r in self.results)
+        return {
+            "jobs_run": len(self.results),
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "skipped": self.skipped,
+            "retries": sum(r.attempts - 1 for r in self.results),
+            "seconds": self.seconds,
+            "jobs_per_min": succeeded / self.seconds * 60 if self.seconds else 0.0,
+            "latency_p50_s": statistics.median(latencies) if latencies else None,
+            "latency_p95_s": latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else None,
+            "latency_max_s": latencies[-1] if latencies else None,
+        }
+
+
+def run_batch(
+    jobs: List[Job],
+    team_factory: Callable[[], Any],
+    concurrency: int = 3,
+    checkpoint: Optional[Checkpoint] = None,
+    max_attempts: int = 4,
+    base_delay: float = 2.0,
+    max_delay: float = 60.0,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+) -> BatchReport:
+    """
+    Run jobs concurrently on a pool of independent teams.
+
+    Each worker slot owns one team from `team_factory`, so no agent ever
+    handles two runs at once. agno returns model failures as a run with
+    status "error" rather than raising, so both raised exceptions and error
+    runs are checked with is_transient; transient failures are retried up to
+    `max_attempts` with jittered exponential backoff, anything else fails the
+    job immediately. Jobs already marked done in `checkpoint` are skipped.
+
+    Args:
+        jobs: Jobs to run
+        team_factory: Builds a team (e.g. main.build_independent_team)
+        concurrency: Number of jobs running at the same time
+        checkpoint: Where finished jobs are recorded
+        max_attempts: Attempts per job, including the first
+        base_delay: First backoff delay in seconds
+        max_delay: Longest backoff delay in seconds
+        on_result: Called with each JobResult as it finishes
+
+    Returns:
+        BatchReport with every result, the number skipped and the wall time
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    from agno.run.base import RunStatus
+
+    done = checkpoint.completed() if checkpoint else set()
+    pending = [job for job in jobs if job.id not in done]
+    started = time.perf_counter()
+    if not pending:
+        return BatchReport(results=[], skipped=len(jobs), seconds=0.0)
+
+    teams: "queue.Queue[Any]" = queue.Queue()
+    for _ in range(min(concurrency, len(pending))):
+        teams.put(team_factory())
+
+    def _run(job: Job) -> JobResult:
+        team = teams.get()
+        job_started = time.perf_counter()
+        error: Any = None
+        try:
+            for attempt in range(max_attempts):
+                try:
+                    # A fresh session per attempt keeps a failed attempt out of the retry's history
+                    response = team.run(job.prompt, session_id=f"batch-{job.id}-{attempt}")
+                    if getattr(response, "status", None) != RunStatus.error:
+                        return JobResult(
+                            id=job.id,
+                            status="ok",
+                            attempts=attempt + 1,
+                            latency_s=time.perf_counter() - job_started,
+                            content=str(response.content),
+                        )
+                    error = str(response.content)
+                except Exception as e:
+                    error = e
+                if attempt + 1 == max_attempts or not is_transient(error):
+                    break
+                delay = backoff_delay(attempt, base_delay, max_delay)
+                print(f"🔁 {job.id}: attempt {attempt + 1} failed ({str(error)[:120]}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            return JobResult(
+                id=job.id,
+                status="failed",
+                attempts=attempt + 1,
+                latency_s=time.perf_counter() - job_started,
+                error=f"{type(error).__name__}: {error}" if isinstance(error, Exception) else error,
+            )
+        finally:
+            teams.put(team)
+
+    def _finish(job: Job) -> JobResult:
+        result = _run(job)
+        if checkpoint:
+            checkpoint.record(result)
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_finish, pending))
+    return BatchReport(results=results, skipped=len(jobs) - len(pending), seconds=time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", type=Path, help="JSONL or JSON job file")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--checkpoint", type=Path, help="Default: <jobs>.checkpoint.jsonl")
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--base-delay", type=float, default=2.0)
+    parser.add_argument("--max-delay", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    import main as app
+
+    jobs = load_jobs(args.jobs)
+    checkpoint = Checkpoint(args.checkpoint or args.jobs.with_suffix(".checkpoint.jsonl"))
+    print(f"📋 {len(jobs)} jobs, concurrency {args.concurrency}, checkpoint {checkpoint.path}")
+
+    def report(result: JobResult) -> None:
+        icon = "✅" if result.status == "ok" else "❌"
+        print(f"{icon} {result.id}: {result.status} in {result.latency_s:.1f}s ({result.attempts} attempt(s))")
+
+    batch = run_batch(
+        jobs,
+        app.build_independent_team,
+        concurrency=args.concurrency,
+        checkpoint=checkpoint,
+        max_attempts=args.max_attempts,
+        base_delay=args.base_delay,
+        max_delay=args.max_delay,
+        on_result=report,
+    )
+    summary = batch.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(
+            f"🏁 {summary['succeeded']} ok, {summary['failed']} failed, {summary['skipped']} skipped "
+            f"(already done), {summary['retries']} retries in {summary['seconds']:.1f}s "
+            f"({summary['jobs_per_min']:.2f} jobs/min)"
+        )
+        if summary["latency_p50_s"] is not None:
+            print(f"⏱️ Latency p50 {summary['latency_p50_s']:.1f}s, p95 {summary['latency_p95_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
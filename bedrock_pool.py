@@ -0,0 +1,394 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional
+
+from agno.models.aws import AwsBedrock
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, ReadTimeoutError
+
+# Bedrock error codes that mean "slow down / try again", not "this request is wrong"
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+RETRYABLE_CODES = THROTTLE_CODES | {
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "InternalServerException",
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    `acquire` blocks until enough tokens are available; `charge` takes tokens
+    without waiting and may leave the bucket in debt, which later callers wait
+    out (used to reconcile estimated and actual token usage).
+
+    Args:
+        rate_per_minute: Refill rate; 0 or None disables the bucket
+        capacity: Burst size (default: one minute of tokens)
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: Optional[float],
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_per_minute = rate_per_minute or 0.0
+        self.capacity = capacity or self.rate_per_minute
+        self.clock = clock
+        self.scale = 1.0  # lowered by adaptive backoff after throttling
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._condition = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_minute > 0
+
+    def _refill(self) -> None:
+        now = self.clock()
+        rate = self.rate_per_minute * self.scale / 60.0
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` tokens, waiting as needed; returns seconds waited."""
+        if not self.enabled:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        with self._condition:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / (self.rate_per_minute * self.scale / 60.0)
+                self._condition.wait(delay)
+                waited += delay
+
+    def charge(self, amount: float) -> None:
+        if not self.enabled or not amount:
+            return
+        with self._condition:
+            self._refill()
+            self._tokens -= amount
+            self._condition.notify_all()
+
+
+@dataclass
+class ModelLimiter:
+    """Per-model request and token buckets plus the shared adaptive backoff state."""
+
+    requests: TokenBucket
+    tokens: TokenBucket
+    min_scale: float = 0.25
+    backoff_level: int = 0
+    resume_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def throttled(self, base_delay: float, max_delay: float) -> float:
+        """Record a throttle: every caller of this model pauses and the buckets slow down (multiplicative decrease)."""
+        with self.lock:
+            self.backoff_level += 1
+            delay = min(max_delay, base_delay * (2 ** (self.backoff_level - 1))) * random.uniform(0.5, 1.0)
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+            for bucket in (self.requests, self.tokens):
+                bucket.scale = max(self.min_scale, bucket.scale * 0.5)
+            return delay
+
+    def succeeded(self) -> None:
+        """Recover gradually after throttling (additive increase)."""
+        with self.lock:
+            self.backoff_level = max(0, self.backoff_level - 1)
+            for bucket in (self.requests, self.tokens):
+                bucket.scale = min(1.0, bucket.scale + 0.05)
+
+    def pause(self) -> float:
+        """Wait out a backoff another caller started; returns seconds waited."""
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+
+@dataclass
+class ModelMetrics:
+    requests: int = 0
+    errors: int = 0
+    throttles: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    limiter_wait_s: float = 0.0
+    backoff_wait_s: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **amounts: float) -> None:
+        with self.lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttles": self.throttles,
+            "retries": self.retries,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "limiter_wait_s": round(self.limiter_wait_s, 3),
+            "backoff_wait_s": round(self.backoff_wait_s, 3),
+            "latency_p50_s": statistics.median(latencies) if latencies else None,
+            "latency_p95_s": latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else None,
+        }
+
+
+def _estimate_tokens(kwargs: Dict[str, Any], output_estimate: int) -> int:
+    """Rough token estimate for a Converse request (about four characters per token) plus expected output."""
+    chars = 0
+    for block in kwargs.get("system") or []:
+        chars += len(str(block.get("text", "")))
+    for message in kwargs.get("messages") or []:
+        for block in message.get("content") or []:
+            chars += len(str(block.get("text", ""))) if "text" in block else len(str(block))
+    max_tokens = (kwargs.get("inferenceConfig") or {}).get("maxTokens")
+    return chars // 4 + min(output_estimate, max_tokens or output_estimate)
+
+
+class ThrottledBedrockClient:
+    """
+    bedrock-runtime client proxy that rate-limits and retries Converse calls.
+
+    converse and converse_stream wait for the model's request and token buckets,
+    honour any backoff another thread started for the same model, and retry
+    throttling/availability errors with jittered exponential backoff shared by
+    every caller. Other client methods pass straight through.
+    """
+
+    def __init__(self, client: Any, manager: "BedrockClientManager"):
+        self._client = client
+        self._manager = manager
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        return self._manager.call(self._client.converse, kwargs, stream=False)
+
+    def converse_stream(self, **kwargs) -> Dict[str, Any]:
+        return self._manager.call(self._client.converse_stream, kwargs, stream=True)
+
+
+async def _iterate_in_thread(events: Iterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Read a blocking event stream from a worker thread, one event at a time."""
+    iterator = iter(events)
+    done = object()
+    while True:
+        event = await asyncio.to_thread(next, iterator, done)
+        if event is done:
+            return
+        yield event
+
+
+class AsyncThrottledBedrockClient:
+    """
+    Async counterpart of ThrottledBedrockClient for AwsBedrock.ainvoke and ainvoke_stream.
+
+    AwsBedrock opens its own aioboto3 client per async call, which would skip the
+    pool, the rate limits and the shared backoff. This client runs the pooled sync
+    client in worker threads instead, so limiter waits and backoff sleeps never
+    block the event loop. It is its own async context manager, matching
+    `async with model.get_async_client() as client`.
+    """
+
+    def __init__(self, client: ThrottledBedrockClient):
+        self._client = client
+
+    async def __aenter__(self) -> "AsyncThrottledBedrockClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def converse(self, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._client.converse, **kwargs)
+
+    async def converse_stream(self, **kwargs) -> Dict[str, Any]:
+        response = await asyncio.to_thread(self._client.converse_stream, **kwargs)
+        return {**response, "stream": _iterate_in_thread(response["stream"])}
+
+    async def count_tokens(self, **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._client.count_tokens, **kwargs)
+
+
+@dataclass
+class PooledAwsBedrock(AwsBedrock):
+    """AwsBedrock whose async calls also go through the pooled client it was given as `client`."""
+
+    def get_async_client(self):
+        if isinstance(self.client, ThrottledBedrockClient):
+            return AsyncThrottledBedrockClient(self.client)
+        return super().get_async_client()
+
+
+class BedrockClientManager:
+    """
+    One pooled bedrock-runtime client shared by every agent, with per-model rate limits.
+
+    The botocore client gets a connection pool sized for the expected
+    concurrency and botocore's own retries are turned off, so all retrying goes
+    through one coordinated backoff per model id: after a ThrottlingException
+    every thread calling that model pauses, and that model's buckets slow down
+    until calls succeed again. Async model calls share the same client through
+    PooledAwsBedrock. Point `endpoint_url` at a local stub (see
+    benchmarks/bedrock_stub.py) to exercise it without AWS.
+
+    Args:
+        session: boto3 Session used to create the client
+        max_pool_connections: HTTP connections kept open to Bedrock
+        requests_per_minute: Requests/min per model id (0 = unlimited)
+        tokens_per_minute: Input + output tokens/min per model id (0 = unlimited)
+        max_attempts: Attempts per call, including the first
+        base_delay: First backoff delay in seconds
+        max_delay: Longest backoff delay in seconds
+        output_estimate: Output tokens reserved per request before the real usage is known
+        endpoint_url: Override the Bedrock endpoint (local stub or VPC endpoint)
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for a response
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        max_pool_connections: int = 50,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_attempts: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        output_estimate: int = 1024,
+        endpoint_url: Optional[str] = None,
+        connect_timeout: float = 10,
+        read_timeout: float = 300,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.output_estimate = output_estimate
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._metrics: Dict[str, ModelMetrics] = {}
+        self._lock = threading.Lock()
+        raw_client = session.client(
+            "bedrock-runtime",
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                retries={"total_max_attempts": 1, "mode": "standard"},
+            ),
+        )
+        self.client = ThrottledBedrockClient(raw_client, self)
+
+    def limiter(self, model_id: str) -> ModelLimiter:
+        with self._lock:
+            if model_id not in self._limiters:
+                self._limiters[model_id] = ModelLimiter(
+                    requests=TokenBucket(self.requests_per_minute), tokens=TokenBucket(self.tokens_per_minute)
+                )
+                self._metrics[model_id] = ModelMetrics()
+            return self._limiters[model_id]
+
+    def call(self, operation: Callable[..., Dict[str, Any]], kwargs: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        model_id = kwargs.get("modelId", "")
+        limiter = self.limiter(model_id)
+        metrics = self._metrics[model_id]
+        estimate = _estimate_tokens(kwargs, self.output_estimate)
+
+        for attempt in range(self.max_attempts):
+            backoff_wait = limiter.pause()
+            limiter_wait = limiter.requests.acquire(1) + limiter.tokens.acquire(estimate)
+            metrics.add(backoff_wait_s=backoff_wait, limiter_wait_s=limiter_wait, requests=1)
+            started = time.perf_counter()
+            try:
+                response = operation(**kwargs)
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code", "")
+                if code in THROTTLE_CODES:
+                    # Back off every caller of this model even when this one gives up
+                    metrics.add(throttles=1)
+                    limiter.throttled(self.base_delay, self.max_delay)
+                if code not in RETRYABLE_CODES or attempt + 1 == self.max_attempts:
+                    metrics.add(errors=1)
+                    raise
+                metrics.add(retries=1)
+                if code not in THROTTLE_CODES:
+                    time.sleep(min(self.max_delay, self.base_delay * (2**attempt)) * random.uniform(0.5, 1.0))
+                continue
+            except (BotocoreConnectionError, ReadTimeoutError):
+                if attempt + 1 == self.max_attempts:
+                    metrics.add(errors=1)
+                    raise
+                metrics.add(retries=1)
+                time.sleep(min(self.max_delay, self.base_delay * (2**attempt)) * random.uniform(0.5, 1.0))
+                continue
+
+            limiter.succeeded()
+            if stream:
+                response["stream"] = self._metered_stream(response["stream"], limiter, metrics, estimate, started)
+            else:
+                metrics.latencies.append(time.perf_counter() - started)
+                self._reconcile(response.get("usage") or {}, limiter, metrics, estimate)
+            return response
+        raise RuntimeError("unreachable")
+
+    def _reconcile(self, usage: Dict[str, Any], limiter: ModelLimiter, metrics: ModelMetrics, estimate: int) -> None:
+        """Replace the token estimate with the usage Bedrock reported."""
+        input_tokens, output_tokens = usage.get("inputTokens", 0), usage.get("outputTokens", 0)
+        metrics.add(input_tokens=input_tokens, output_tokens=output_tokens)
+        if input_tokens or output_tokens:
+            limiter.tokens.charge(input_tokens + output_tokens - estimate)
+
+    def _metered_stream(
+        self, events: Iterator[Dict[str, Any]], limiter: ModelLimiter, metrics: ModelMetrics, estimate: int, started: float
+    ) -> Iterator[Dict[str, Any]]:
+        for event in events:
+            if "metadata" in event:
+                self._reconcile(event["metadata"].get("usage") or {}, limiter, metrics, estimate)
+            yield event
+        metrics.latencies.append(time.perf_counter() - started)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model counters, waits, token usage and latency percentiles, plus the current backoff state."""
+        with self._lock:
+            return {
+                model_id: {
+                    **self._metrics[model_id].snapshot(),
+                    "backoff_level": limiter.backoff_level,
+                    "rate_scale": limiter.requests.scale,
+                }
+                for model_id, limiter in self._limiters.items()
+            }
+
+
+def format_metrics(metrics: Dict[str, Dict[str, Any]]) -> List[str]:
+    return [
+        f"{model_id}: {m['requests']} requests, {m['throttles']} throttles, {m['retries']} retries, "
+        f"{m['input_tokens']:,} in / {m['output_tokens']:,} out tokens, waited {m['limiter_wait_s']:.1f}s limiter "
+        f"+ {m['backoff_wait_s']:.1f}s backoff"
+        for model_id, m in metrics.items()
+    ]
@@ -0,0 +1,169 @@
+"""Local stand-in for the Bedrock Converse endpoint.
+
+Answers POST /model/<model-id>/converse like bedrock-runtime does, after a
+fixed latency, and returns ThrottlingException (HTTP 429) when more than
+--rpm requests arrive within a minute or at random with --throttle-rate. Use it
+to exercise bedrock_pool.BedrockClientManager (pool size, rate limits,
+coordinated backoff) without AWS. Streaming (converse-stream) is not emulated.
+
+Usage:
+    python benchmarks/bedrock_stub.py --port 8787 --latency 0.5 --rpm 60
+    BEDROCK_ENDPOINT_URL=http://127.0.0.1:8787 AWS_ACCESS_KEY_ID=stub AWS_SECRET_ACCESS_KEY=stub python main.py
+    python benchmarks/bedrock_stub.py --load 200 --concurrency 32 --client-rpm 50   # drive the stub through the manager
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+
+class StubState:
+    def __init__(self, latency: float, rpm: int, throttle_rate: float):
+        self.latency = latency
+        self.rpm = rpm
+        self.throttle_rate = throttle_rate
+        self.served = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._recent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if (self.rpm and len(self._recent) >= self.rpm) or random.random() < self.throttle_rate:
+                self.throttled += 1
+                return False
+            self._recent.append(now)
+            self.served += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def done(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: dict, headers: dict = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.endswith("/converse"):
+                self._send(404, {"message": f"Unsupported path {self.path}"}, {"x-amzn-ErrorType": "ValidationException"})
+                return
+            if not state.admit():
+                self._send(429, {"message": "Too many requests, please wait before trying again."},
+                           {"x-amzn-ErrorType": "ThrottlingException"})
+                return
+            try:
+                time.sleep(state.latency)
+                text = " ".join(
+                    block.get("text", "") for message in request.get("messages", []) for block in message["content"]
+                )
+                input_tokens = max(1, len(text) // 4)
+                self._send(200, {
+                    "output": {"message": {"role": "assistant", "content": [{"text": f"Stub answer ({input_tokens} tokens in)"}]}},
+                    "stopReason": "end_turn",
+                    "usage": {"inputTokens": input_tokens, "outputTokens": 8, "totalTokens": input_tokens + 8},
+                    "metrics": {"latencyMs": int(state.latency * 1000)},
+                })
+            finally:
+                state.done()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int, state: StubState) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_load(port: int, requests: int, concurrency: int, args) -> dict:
+    """Send `requests` Converse calls through BedrockClientManager from `concurrency` threads."""
+    import boto3
+
+    from bedrock_pool import BedrockClientManager
+
+    session = boto3.Session(aws_access_key_id="stub", aws_secret_access_key="stub", region_name="us-east-1")
+    manager = BedrockClientManager(
+        session,
+        max_pool_connections=args.pool,
+        requests_per_minute=args.client_rpm,
+        base_delay=0.2,
+        max_delay=5,
+        endpoint_url=f"http://127.0.0.1:{port}",
+    )
+
+    def call(i: int) -> None:
+        manager.client.converse(
+            modelId="stub.model-v1",
+            messages=[{"role": "user", "content": [{"text": f"Request {i}: Safaricom FY25 revenue"}]}],
+        )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "requests_per_sec": requests / seconds, "client": manager.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per response")
+    parser.add_argument("--rpm", type=int, default=0, help="Server-side requests/min before throttling (0 = off)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests throttled at random")
+    parser.add_argument("--load", type=int, default=0, help="Send this many requests through the manager, then exit")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool", type=int, default=50, help="Client connection pool size")
+    parser.add_argument("--client-rpm", type=float, default=0, help="Client-side requests/min limit")
+    args = parser.parse_args()
+
+    state = StubState(args.latency, args.rpm, args.throttle_rate)
+    server = serve(args.port, state)
+    if not args.load:
+        print(f"Bedrock stub on http://127.0.0.1:{args.port} (latency {args.latency}s, rpm {args.rpm or 'unlimited'})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    results = run_load(args.port, args.load, args.concurrency, args)
+    results["server"] = {"served": state.served, "throttled": state.throttled, "peak_in_flight": state.peak_in_flight}
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
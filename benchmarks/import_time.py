@@ -0,0 +1,75 @@
+"""Import-time benchmark for main.py.
+
+Runs each scenario in a fresh interpreter so module caches do not hide the
+cost, and compares a bare `import main` with importing and then building the
+whole CFO team (what every import used to pay before construction was lazy).
+
+Usage:
+    python benchmarks/import_time.py --runs 5
+    python benchmarks/import_time.py --runs 3 --build   # also time get_team()
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "import main": "import main",
+    "import main + get_team()": "import main; main.get_team()",
+}
+
+TIMER = """
+import time
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def time_scenario(code: str, runs: int) -> list:
+    """Time `code` in `runs` fresh interpreters, returning seconds per run."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--build", action="store_true", help="Also time building the team (needs the full environment)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        if "get_team" in code and not args.build:
+            continue
+        timings = time_scenario(code, args.runs)
+        results[name] = {
+            "runs": args.runs,
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, stats in results.items():
+        print(f"{name:<28} median {stats['median_s'] * 1000:9.1f} ms  (min {stats['min_s'] * 1000:.1f}, max {stats['max_s'] * 1000:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""End-to-end pipeline benchmark with the Bedrock model replaced by a local stub.
+
+Times each stage of main.py separately so regressions can be pinned down:
+
+    ingest     PDF parse + chunk + embed + store into main.py's shards, in pages/sec,
+               plus the KPI extraction the reporting agents load
+    embedding  re-embedding every stored chunk, in chunks/sec
+    search     knowledge.search over finance queries, p50/p99
+    skills     validating and loading every skill folder
+    team_build building the six agents and the CFO team
+    team_run   team.run for each EXAMPLE_PROMPTS entry in main.py
+
+The model is benchmarks/stub_model.StubModel: every call sleeps `--latency`
+seconds and the leader delegates each prompt to two members, so team_run
+reports wall time, model calls and the time spent outside the model
+(orchestration overhead). Team runs are repeated with zero latency to give the
+pure framework cost. Everything runs in a temporary Chroma folder; the
+hashing embedder from retrieval_latency.py keeps it offline unless
+--embedder main is passed.
+
+Usage:
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --latency 1.5 --output results.json
+    python benchmarks/pipeline.py --baseline results.json --tolerance 0.25   # exit 1 on regressions
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from agno.knowledge.knowledge import Knowledge  # noqa: E402
+from agno.utils.log import logger  # noqa: E402
+
+from embedding_cache import embed_texts  # noqa: E402
+from hybrid_search import HybridChromaDb  # noqa: E402
+from ingestion import _collection  # noqa: E402
+from retrieval_latency import QUERIES, HashingEmbedder  # noqa: E402
+from section_chunker import SectionChunker  # noqa: E402
+from sharded_knowledge import ShardedVectorDb, ShardRouter, shard_collection_name, sync_shards  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+
+# Members the stub leader delegates to, matching the Excel + PowerPoint shape of the example prompts
+DELEGATE_TO = ["Business Case Analyst", "Financial Reporting Lead"]
+
+# Metrics checked against --baseline, and the direction that counts as better
+REGRESSION_KEYS = {
+    "ingest.seconds": "lower",
+    "ingest.pages_per_sec": "higher",
+    "embedding.chunks_per_sec": "higher",
+    "search.p50_ms": "lower",
+    "search.p99_ms": "lower",
+    "skills.seconds": "lower",
+    "team_build.seconds": "lower",
+    "team_run_no_latency.wall_s": "lower",
+}
+
+
+def percentile(timings: List[float], q: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def build_knowledge(db_dir: str, embedder) -> Knowledge:
+    """The sharded knowledge base of main.get_knowledge, without ingesting anything."""
+    router = ShardRouter()
+    shards = {
+        name: HybridChromaDb(
+            name=shard_collection_name("safaricom_finance_team", name),
+            path=db_dir,
+            persistent_client=True,
+            embedder=embedder,
+        )
+        for name in router.names
+    }
+    return Knowledge(
+        vector_db=ShardedVectorDb(shards, router), max_results=int(os.getenv("KNOWLEDGE_MAX_RESULTS", "5"))
+    )
+
+
+def bench_ingest(app, knowledge: Knowledge, pdf_dir: Path) -> dict:
+    start = time.perf_counter()
+    summary = sync_shards(knowledge, pdf_dir, chunker=SectionChunker(chunk_size=int(os.getenv("CHUNK_SIZE", "1500"))))
+    seconds = time.perf_counter() - start
+    # The reporting agents extract KPIs from the same PDFs when they are built; count it here, not in team_build
+    start = time.perf_counter()
+    app.get_kpi_tools()
+    kpi_seconds = time.perf_counter() - start
+    return {
+        "pdfs": len(summary["added"]) + len(summary["updated"]),
+        "pages": summary["pages"],
+        "chunks": knowledge.vector_db.get_count(),
+        "shards": summary["shards"],
+        "seconds": seconds,
+        "pages_per_sec": summary["pages"] / seconds if seconds else 0.0,
+        "kpi_seconds": kpi_seconds,
+    }
+
+
+def bench_embedding(vector_db: ShardedVectorDb, embedder) -> dict:
+    texts = []
+    for shard in vector_db.shards.values():
+        texts += _collection(shard).get(include=["documents"])["documents"] or []
+    start = time.perf_counter()
+    embed_texts(embedder, texts)
+    seconds = time.perf_counter() - start
+    return {"chunks": len(texts), "seconds": seconds, "chunks_per_sec": len(texts) / seconds if seconds else 0.0}
+
+
+def bench_search(knowledge: Knowledge, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        for query in QUERIES:
+            start = time.perf_counter()
+            knowledge.search(query)
+            timings.append(time.perf_counter() - start)
+    return {
+        "queries": len(timings),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+
+def bench_team_run(app, model: StubModel, latency: float) -> dict:
+    team = app.get_team()
+    model.latency = latency
+    prompts = {}
+    for title, prompt in app.EXAMPLE_PROMPTS.items():
+        model.reset_stats()
+        start = time.perf_counter()
+        team.run(prompt)
+        wall = time.perf_counter() - start
+        prompts[title] = {
+            "wall_s": wall,
+            "model_calls": model.calls,
+            "model_s": model.model_seconds,
+            # Member calls can overlap under parallel delegation, so this is a lower bound
+            "overhead_s": max(wall - model.model_seconds, 0.0),
+        }
+    return {
+        "latency_s": latency,
+        "prompts": prompts,
+        "wall_s": sum(p["wall_s"] for p in prompts.values()),
+        "overhead_s": sum(p["overhead_s"] for p in prompts.values()),
+    }
+
+
+def run(args) -> dict:
+    import main as app
+
+    embedder = app.get_embedder() if args.embedder == "main" else HashingEmbedder()
+    model = StubModel(delegate_to=DELEGATE_TO)
+    results: Dict[str, dict] = {}
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        # Point main.py's factories at the throwaway store, the stub model and the chosen embedder
+        app.db_path = Path(db_dir)
+        app.pdf_path = args.pdf_dir
+        app.get_model = lambda: model
+        app.get_embedder = lambda: embedder
+
+        # Same shards and chunker as main.get_knowledge; the agents reuse it instead of ingesting again
+        knowledge = build_knowledge(db_dir, embedder)
+        app.get_knowledge = lambda: knowledge
+        results["ingest"] = bench_ingest(app, knowledge, args.pdf_dir)
+        results["embedding"] = bench_embedding(knowledge.vector_db, getattr(embedder, "embedder", None) or embedder)
+        results["search"] = bench_search(knowledge, args.runs)
+
+        start = time.perf_counter()
+        app.check_skill_folders()
+        for folders in app.AGENT_SKILL_FOLDERS.values():
+            app.safaricom_skills(folders)
+        results["skills"] = {"seconds": time.perf_counter() - start}
+
+        start = time.perf_counter()
+        team = app.get_team()
+        results["team_build"] = {"seconds": time.perf_counter() - start, "members": len(team.members)}
+        team.debug_mode = False  # debug logging would dominate the orchestration timings
+
+        results["team_run_no_latency"] = bench_team_run(app, model, 0.0)
+        results["team_run"] = bench_team_run(app, model, args.latency)
+    return results
+
+
+def _lookup(results: dict, dotted: str):
+    value = results
+    for part in dotted.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Metrics that got worse than `baseline` by more than `tolerance` (a fraction)."""
+    problems = []
+    for key, better in REGRESSION_KEYS.items():
+        current, previous = _lookup(results, key), _lookup(baseline, key)
+        if not isinstance(current, (int, float)) or not previous:
+            continue
+        change = (current - previous) / previous
+        if (better == "lower" and change > tolerance) or (better == "higher" and change < -tolerance):
+            problems.append(f"{key}: {previous:.4g} -> {current:.4g} ({change:+.0%})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", type=Path, default=REPO_ROOT / "finance_data" / "safaricom_docs")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stub model call")
+    parser.add_argument("--runs", type=int, default=10, help="Search repetitions per query")
+    parser.add_argument("--embedder", choices=["hashing", "main"], default="hashing")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--output", type=Path, help="Also write the JSON results to this file")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+    args.pdf_dir = args.pdf_dir.resolve()
+    os.chdir(REPO_ROOT)  # skill folders in main.py are relative to the repo
+    logger.setLevel(logging.WARNING)
+
+    results = run(args)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        ingest, embedding, search = results["ingest"], results["embedding"], results["search"]
+        print(
+            f"ingest     {ingest['pages']} pages, {ingest['chunks']} chunks in {ingest['seconds']:.2f}s "
+            f"({ingest['pages_per_sec']:.1f} pages/sec), KPI extraction {ingest['kpi_seconds']:.2f}s"
+        )
+        print(f"embedding  {embedding['chunks']} chunks at {embedding['chunks_per_sec']:.1f} chunks/sec")
+        print(f"search     p50 {search['p50_ms']:.2f} ms  p99 {search['p99_ms']:.2f} ms over {search['queries']} queries")
+        print(f"skills     {results['skills']['seconds'] * 1000:.1f} ms")
+        print(f"team_build {results['team_build']['seconds'] * 1000:.1f} ms ({results['team_build']['members']} members)")
+        for name in ("team_run_no_latency", "team_run"):
+            team_run = results[name]
+            for title, stats in team_run["prompts"].items():
+                print(
+                    f"{name:<19} {title[:34]:<34} wall {stats['wall_s']:.2f}s  model {stats['model_s']:.2f}s "
+                    f"({stats['model_calls']} calls @ {team_run['latency_s']}s)  overhead {stats['overhead_s']:.2f}s"
+                )
+
+    if args.baseline:
+        problems = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Retrieval latency benchmark: vector-only vs hybrid BM25 + vector search.
+
+Ingests a PDF folder into a throwaway HybridChromaDb and times both search
+paths over a set of number-heavy finance queries. Alongside latency it reports
+how many of the returned chunks contain an exact query token such as "FY25"
+or "95B", a rough proxy for precision on the queries MiniLM handles badly.
+
+By default a deterministic hashing embedder is used so the benchmark runs
+offline and measures retrieval rather than the embedding API; pass
+--embedder main to use the embedder configured in main.py.
+
+Usage:
+    python benchmarks/retrieval_latency.py --runs 20
+    python benchmarks/retrieval_latency.py --pdf-dir finance_data --embedder main --json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import re
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from agno.knowledge.embedder.base import Embedder  # noqa: E402
+from agno.knowledge.knowledge import Knowledge  # noqa: E402
+from agno.utils.log import logger  # noqa: E402
+
+from hybrid_search import HybridChromaDb, tokenize  # noqa: E402
+from ingestion import sync_knowledge  # noqa: E402
+
+QUERIES = [
+    "Fuliza revenue FY25",
+    "M-PESA revenue KES billion H1 FY25",
+    "EBIT margin guidance FY25",
+    "capex guidance KES 55B",
+    "Ethiopia EBIT loss",
+    "dividend per share FY24",
+    "IFRS 16 lease liabilities",
+    "service revenue growth 11.2%",
+]
+
+
+@dataclass
+class HashingEmbedder(Embedder):
+    """Bag-of-words feature hashing; fast, deterministic and needs no network."""
+
+    dimensions: int = 384
+    id: str = "hashing-bow-384"
+
+    def get_embedding(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def get_embedding_and_usage(self, text: str):
+        return self.get_embedding(text), None
+
+
+def exact_tokens(query: str) -> List[str]:
+    """Query tokens that contain a digit, e.g. 'fy25', '55b', '11.2'."""
+    return [token for token in tokenize(query) if re.search(r"\d", token)]
+
+
+def run_path(search, queries: List[str], limit: int, runs: int) -> dict:
+    timings, hits, returned = [], 0, 0
+    for _ in range(runs):
+        for query in queries:
+            start = time.perf_counter()
+            search(query, limit)
+            timings.append(time.perf_counter() - start)
+    for query in queries:
+        tokens = exact_tokens(query)
+        for document in search(query, limit):
+            returned += 1
+            content = set(tokenize(document.content))
+            hits += bool(tokens) and any(token in content for token in tokens)
+    timings.sort()
+    return {
+        "queries": len(timings),
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95) - 1] * 1000,
+        "chunks_returned": returned,
+        "exact_token_hit_rate": hits / returned if returned else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", type=Path, default=REPO_ROOT / "finance_data")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--embedder", choices=["hashing", "main"], default="hashing")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)  # per-search "Found N documents" lines would swamp the timings
+
+    if args.embedder == "main":
+        import main as app
+
+        embedder = app.get_embedder()
+    else:
+        embedder = HashingEmbedder()
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        vector_db = HybridChromaDb(name="retrieval_bench", path=db_dir, persistent_client=True, embedder=embedder)
+        knowledge = Knowledge(vector_db=vector_db)
+        summary = sync_knowledge(knowledge, args.pdf_dir, max_workers=1)
+        results = {
+            "chunks": vector_db.get_count(),
+            "pdfs": len(summary["added"]),
+            "vector": run_path(vector_db.vector_search, QUERIES, args.limit, args.runs),
+            "hybrid": run_path(vector_db.search, QUERIES, args.limit, args.runs),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['chunks']} chunks from {results['pdfs']} PDFs, top-{args.limit}, {args.runs} runs per query")
+    for name in ("vector", "hybrid"):
+        stats = results[name]
+        print(
+            f"{name:<7} median {stats['median_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+            f"exact-token hit rate {stats['exact_token_hit_rate']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Deterministic stand-in for the Bedrock model, for benchmarks and offline runs.
+
+StubModel answers every call after a fixed, configurable delay, so timings
+separate the framework's own overhead (ingestion, retrieval, skills, Team
+orchestration) from model latency. When the model is offered a delegation
+tool and has not called it yet in the current run it delegates once, so Team
+runs exercise member runs the way Bedrock would, and then it answers from the
+tool results.
+"""
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from agno.models.base import Model
+from agno.models.metrics import Metrics
+from agno.models.response import ModelResponse
+
+PARALLEL_DELEGATION = "delegate_tasks_in_parallel"
+SINGLE_DELEGATION = "delegate_task_to_member"
+
+
+def _tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class StubModel(Model):
+    """
+    Model that returns canned responses after `latency` seconds.
+
+    Args:
+        latency: Seconds each call sleeps, standing in for a Bedrock round-trip
+        delegate_to: Member names the Team leader hands the prompt to on its first call
+        answer: Text returned by final answers; "{prompt}" is replaced with the last user message
+    """
+
+    id: str = "stub-model"
+    name: str = "StubModel"
+    provider: str = "Stub"
+    latency: float = 0.0
+    delegate_to: List[str] = field(default_factory=list)
+    answer: str = "Stub answer to: {prompt}"
+    calls: int = 0
+    model_seconds: float = 0.0
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._lock = threading.Lock()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.model_seconds = 0.0
+
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.model_seconds += seconds
+
+    def _respond(self, messages: List[Any], tools: Optional[List[Dict[str, Any]]]) -> ModelResponse:
+        names = {tool.get("function", {}).get("name") for tool in tools or []}
+        prompt = next((str(m.content) for m in reversed(messages) if m.role == "user"), "")
+        already_delegated = any(m.role == "tool" for m in messages)
+        response = ModelResponse(role="assistant")
+
+        if self.delegate_to and not already_delegated and PARALLEL_DELEGATION in names:
+            arguments = {"assignments": [{"member": member, "task": prompt} for member in self.delegate_to]}
+            response.tool_calls = [self._tool_call(PARALLEL_DELEGATION, arguments)]
+        elif self.delegate_to and not already_delegated and SINGLE_DELEGATION in names:
+            arguments = {"member_id": self.delegate_to[0], "task": prompt}
+            response.tool_calls = [self._tool_call(SINGLE_DELEGATION, arguments)]
+        else:
+            tool_results = " ".join(str(m.content)[:200] for m in messages if m.role == "tool")
+            response.content = self.answer.format(prompt=prompt[:200]) + (f"\n\n{tool_results}" if tool_results else "")
+
+        output = response.content or json.dumps(response.tool_calls)
+        input_tokens = sum(_tokens(str(m.content or "")) for m in messages)
+        response.response_usage = Metrics(
+            input_tokens=input_tokens, output_tokens=_tokens(output), total_tokens=input_tokens + _tokens(output)
+        )
+        return response
+
+    def _tool_call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"stub-{self.calls}-{name}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)},
+        }
+
+    def invoke(self, messages: List[Any], assistant_message: Any, tools=None, **kwargs) -> ModelResponse:
+        assistant_message.metrics.start_timer()
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        response = self._respond(messages, tools)
+        self._record(time.perf_counter() - start)
+        assistant_message.metrics.stop_timer()
+        return response
+
+    async def ainvoke(self, messages: List[Any], assistant_message: Any, tools=None, **kwargs) -> ModelResponse:
+        assistant_message.metrics.start_timer()
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = self._respond(messages, tools)
+        self._record(time.perf_counter() - start)
+        assistant_message.metrics.stop_timer()
+        return response
+
+    @staticmethod
+    def _chunks(response: ModelResponse) -> Iterator[ModelResponse]:
+        """Split a text answer into word deltas, the way a streaming provider returns it."""
+        if not response.content:
+            yield response
+            return
+        words = response.content.split(" ")
+        for index, word in enumerate(words):
+            delta = ModelResponse(role="assistant", content=word if index == 0 else " " + word)
+            if index == len(words) - 1:
+                delta.response_usage = response.response_usage
+            yield delta
+
+    def invoke_stream(self, *args, **kwargs) -> Iterator[ModelResponse]:
+        yield from self._chunks(self.invoke(*args, **kwargs))
+
+    async def ainvoke_stream(self, *args, **kwargs) -> AsyncIterator[ModelResponse]:
+        for delta in self._chunks(await self.ainvoke(*args, **kwargs)):
+            yield delta
+
+    def _parse_provider_response(self, response: Any, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return response
@@ -1,5 +1,13 @@
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Document URLs
 documents = {
@@ -19,25 +27,195 @@ documents = {
 # Base directory
 base_dir = 'finance_data/safaricom_docs'
 
-# Download function
-def download_documents():
+# Checksums and validators of everything downloaded so far
+MANIFEST_NAME = 'download_manifest.json'
+CHUNK_SIZE = 1 << 16
+
+
+def make_session(pool_size: int = 8, retries: int = 3) -> requests.Session:
+    """
+    Create a session whose connection pool is shared by all download workers.
+
+    Args:
+        pool_size: Connections kept open per host (match the worker count)
+        retries: Retries for connection errors and 5xx responses
+
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path: str, manifest: Dict[str, Dict]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _sha256_of(path: str) -> 'hashlib._Hash':
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest
+
+
+class DownloadInterrupted(Exception):
+    """Raised when a transfer fails midway; `entry` holds the validators needed to resume it."""
+
+    def __init__(self, entry: Dict, cause: Exception):
+        super().__init__(str(cause))
+        self.entry = entry
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    filepath: str,
+    previous: Optional[Dict] = None,
+    timeout: int = 30,
+    verify: bool = False,
+) -> Dict:
+    """
+    Download one file, streaming it to disk in chunks.
+
+    The file is skipped when the server says it is unchanged (ETag /
+    Last-Modified from the previous run), and a leftover `.part` file from an
+    interrupted run is resumed with a Range request.
+
+    Args:
+        session: Pooled session shared by all workers
+        url: Source URL
+        filepath: Destination path
+        previous: Manifest entry from the previous run, if any
+        timeout: Connect/read timeout in seconds
+        verify: Verify TLS certificates
+
+    Returns:
+        Manifest entry with status, size, sha256, etag, last_modified and seconds
+
+    Raises:
+        DownloadInterrupted: If the transfer broke off after it started
+    """
+    started = time.perf_counter()
+    part_path = f"{filepath}.part"
+    previous = previous if previous and previous.get('url') == url else {}
+    headers = {}
+
+    if previous.get('sha256') and os.path.exists(filepath):
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    resume_from = 0
+    if previous.get('status') == 'partial' and os.path.exists(part_path):
+        validator = previous.get('etag') or previous.get('last_modified')
+        if validator:
+            resume_from = os.path.getsize(part_path)
+            headers = {'Range': f"bytes={resume_from}-", 'If-Range': validator}
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout, verify=verify) as response:
+        if response.status_code == 304:
+            unchanged = {key: value for key, value in previous.items() if key != 'error'}
+            return {**unchanged, 'status': 'unchanged', 'seconds': time.perf_counter() - started}
+        if response.status_code == 416:
+            # The partial file is already complete (or larger than the remote one); start over
+            os.remove(part_path)
+            return download_file(session, url, filepath, None, timeout, verify)
+        response.raise_for_status()
+
+        resumed = response.status_code == 206 and resume_from > 0
+        digest = _sha256_of(part_path) if resumed else hashlib.sha256()
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag') or previous.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or previous.get('last_modified'),
+        }
+        try:
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+        except Exception as e:
+            raise DownloadInterrupted({**entry, 'status': 'partial'}, e) from e
+
+    os.replace(part_path, filepath)
+    return {
+        **entry,
+        'status': 'resumed' if resumed else 'downloaded',
+        'size': os.path.getsize(filepath),
+        'sha256': digest.hexdigest(),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def download_documents(
+    documents: Dict[str, Dict[str, str]] = documents,
+    base_dir: str = base_dir,
+    max_workers: int = 4,
+    session: Optional[requests.Session] = None,
+    verify: bool = False,
+) -> Dict[str, Dict]:
+    """
+    Download every document concurrently and write a checksum manifest.
+
+    Args:
+        documents: {category: {filename: url}} map of files to fetch
+        base_dir: Folder the category folders are created in
+        max_workers: Number of concurrent downloads
+        session: Session to use (default: a pooled session sized to max_workers)
+        verify: Verify TLS certificates
+
+    Returns:
+        Manifest keyed by 'category/filename'
+    """
+    session = session or make_session(pool_size=max_workers)
+    os.makedirs(base_dir, exist_ok=True)
+    manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    jobs = []
     for category, files in documents.items():
         category_path = os.path.join(base_dir, category)
         os.makedirs(category_path, exist_ok=True)
-        
         for filename, url in files.items():
-            filepath = os.path.join(category_path, filename)
-            print(f"Downloading {filename}...")
-            
-            try:
-                response = requests.get(url, timeout=30, verify=False)
-                response.raise_for_status()
-                
-                with open(filepath, 'wb') as f:
-                    f.write(response.content)
-                print(f"✓ Downloaded: {filepath}")
-            except Exception as e:
-                print(f"✗ Failed to download {filename}: {e}")
+            jobs.append((f"{category}/{filename}", url, os.path.join(category_path, filename)))
+
+    def _download(job):
+        key, url, filepath = job
+        print(f"Downloading {key.split('/', 1)[1]}...")
+        try:
+            entry = download_file(session, url, filepath, manifest.get(key), verify=verify)
+            print(f"✓ {entry['status'].capitalize()}: {filepath}")
+            return key, entry
+        except DownloadInterrupted as e:
+            print(f"✗ Interrupted {key.split('/', 1)[1]} (will resume next run): {e}")
+            return key, {**e.entry, 'error': str(e)}
+        except Exception as e:
+            print(f"✗ Failed to download {key.split('/', 1)[1]}: {e}")
+            return key, {**manifest.get(key, {'url': url}), 'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, entry in pool.map(_download, jobs):
+            manifest[key] = entry
+
+    save_manifest(manifest_path, manifest)
+    return manifest
 
 if __name__ == "__main__":
     download_documents()
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from agno.tools import Toolkit
+
+INSTRUCTIONS = (
+    "When a request needs work from several offices that does not depend on each other "
+    "(for example an Excel model from one member and a PowerPoint deck from another), call "
+    "delegate_tasks_in_parallel once with all assignments instead of delegating one member at a time."
+)
+
+# Receives member run events while a caller is streaming the team (see team_stream.py).
+# None means members run without streaming and only their final content is used.
+member_event_sink: "contextvars.ContextVar[Optional[Callable[[Any], None]]]" = contextvars.ContextVar(
+    "member_event_sink", default=None
+)
+
+
+def run_member_task(member: Any, task: str) -> str:
+    """Run one task on a member, forwarding its events to member_event_sink when one is set."""
+    sink = member_event_sink.get()
+    if sink is None:
+        return str(member.run(task).content)
+    content = None
+    for event in member.run(task, stream=True, stream_events=True):
+        sink(event)
+        if event.event in ("RunCompleted", "RunError", "TeamRunCompleted", "TeamRunError"):
+            content = event.content
+    return str(content)
+
+
+async def arun_member_task(member: Any, task: str) -> str:
+    """Async variant of run_member_task."""
+    sink = member_event_sink.get()
+    if sink is None:
+        return str((await member.arun(task)).content)
+    content = None
+    async for event in member.arun(task, stream=True, stream_events=True):
+        sink(event)
+        if event.event in ("RunCompleted", "RunError", "TeamRunCompleted", "TeamRunError"):
+            content = event.content
+    return str(content)
+
+
+class ParallelDelegationTools(Toolkit):
+    """
+    Lets the CFO leader hand independent subtasks to several members at once.
+
+    Members run concurrently up to `max_concurrency`; tasks for the same member
+    run one after another so a member never handles two runs at the same time.
+    Results are merged in team member order, then assignment order, so the
+    output is the same no matter which member finishes first.
+
+    Args:
+        members: Team members that can receive assignments
+        max_concurrency: Maximum number of members running at the same time
+    """
+
+    def __init__(self, members: Sequence[Any], max_concurrency: int = 3, **kwargs):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.members = list(members)
+        self.max_concurrency = max_concurrency
+        super().__init__(
+            name="parallel_delegation",
+            tools=[self.delegate_tasks_in_parallel],
+            async_tools=[(self.adelegate_tasks_in_parallel, "delegate_tasks_in_parallel")],
+            instructions=INSTRUCTIONS,
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def _group(self, assignments: List[Dict[str, str]]) -> List[Tuple[int, Any, List[str]]]:
+        """Resolve member names and group tasks per member, in team member order."""
+        by_name = {member.name.lower(): (index, member) for index, member in enumerate(self.members)}
+        grouped: Dict[int, Tuple[int, Any, List[str]]] = {}
+        for assignment in assignments:
+            name = str(assignment.get("member", "")).strip().lower()
+            if name not in by_name:
+                raise ValueError(
+                    f"Unknown member '{assignment.get('member')}', expected one of {[m.name for m in self.members]}"
+                )
+            index, member = by_name[name]
+            grouped.setdefault(index, (index, member, []))[2].append(assignment["task"])
+        return [grouped[index] for index in sorted(grouped)]
+
+    @staticmethod
+    def _merge(results: List[Tuple[Any, List[str]]]) -> str:
+        return "\n\n".join(f"## {member.name}\n\n" + "\n\n".join(outputs) for member, outputs in results)
+
+    def delegate_tasks_in_parallel(self, assignments: List[Dict[str, str]]) -> str:
+        """Use this function to delegate independent tasks to several team members at the same time.
+
+        Args:
+            assignments (List[Dict[str, str]]): One entry per task, each with a "member" key (the member's
+                name, e.g. "Business Case Analyst") and a "task" key (a clear description of the task and
+                the expected output).
+
+        Returns:
+            str: Each member's response under a heading with the member's name.
+        """
+        try:
+            groups = self._group(assignments)
+        except (KeyError, ValueError) as e:
+            return f"Error: {e}"
+
+        def _run_member(member: Any, tasks: List[str]) -> Tuple[Any, List[str]]:
+            outputs = []
+            for task in tasks:
+                try:
+                    outputs.append(run_member_task(member, task))
+                except Exception as e:
+                    outputs.append(f"Failed: {e}")
+            return member, outputs
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            # Each worker gets a copy of the caller's context, so tracing spans nest under this call
+            futures = [
+                pool.submit(contextvars.copy_context().run, _run_member, member, tasks) for _, member, tasks in groups
+            ]
+            return self._merge([future.result() for future in futures])
+
+    async def adelegate_tasks_in_parallel(self, assignments: List[Dict[str, str]]) -> str:
+        """Use this function to delegate independent tasks to several team members at the same time.
+
+        Args:
+            assignments (List[Dict[str, str]]): One entry per task, each with a "member" key (the member's
+                name, e.g. "Business Case Analyst") and a "task" key (a clear description of the task and
+                the expected output).
+
+        Returns:
+            str: Each member's response under a heading with the member's name.
+        """
+        try:
+            groups = self._group(assignments)
+        except (KeyError, ValueError) as e:
+            return f"Error: {e}"
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _run_member(member: Any, tasks: List[str]) -> Tuple[Any, List[str]]:
+            async with semaphore:
+                outputs = []
+                for task in tasks:
+                    try:
+                        outputs.append(await arun_member_task(member, task))
+                    except Exception as e:
+                        outputs.append(f"Failed: {e}")
+                return member, outputs
+
+        results = await asyncio.gather(*(_run_member(member, tasks) for _, member, tasks in groups))
+        return self._merge(list(results))
@@ -0,0 +1,197 @@
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agno.knowledge.embedder.base import Embedder
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so trivially different copies share a cache key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def text_key(text: str) -> str:
+    """Hash of the normalized text, used as the cache key together with the model id."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _feature_extraction_batch(embedder: Embedder, texts: List[str]) -> Optional[List[List[float]]]:
+    """
+    One Inference API call for many texts, for HuggingfaceCustomEmbedder.
+
+    agno turns enable_batch off for that embedder, but feature_extraction
+    accepts a list of inputs and returns one row per text. Returns None when
+    the response does not have that shape (e.g. token-level outputs).
+    """
+    rows = embedder.client.feature_extraction(text=texts, model=embedder.id)
+    rows = rows.tolist() if hasattr(rows, "tolist") else rows
+    if len(rows) != len(texts) or any(not row or isinstance(row[0], list) for row in rows):
+        return None
+    return rows
+
+
+def embed_texts(embedder: Embedder, texts: List[str]) -> List[List[float]]:
+    """
+    Embed a list of texts, using the embedder's batch API when it has one.
+
+    Raises:
+        ValueError: If the model returned no vector for a text (agno's
+            Hugging Face embedder returns [] when a call fails)
+    """
+    batch_fn = getattr(embedder, "get_embeddings_batch_and_usage", None)
+    embeddings = None
+    if batch_fn is not None and embedder.enable_batch:
+        embeddings, _ = batch_fn(texts)
+    elif len(texts) > 1 and callable(getattr(getattr(embedder, "client", None), "feature_extraction", None)):
+        embeddings = _feature_extraction_batch(embedder, texts)
+    if embeddings is None:
+        embeddings = [embedder.get_embedding(text) for text in texts]
+
+    failed = sum(1 for embedding in embeddings if not embedding)
+    if failed:
+        raise ValueError(f"{type(embedder).__name__} returned no vector for {failed} of {len(texts)} texts")
+    return embeddings
+
+
+@dataclass
+class CachedEmbedder(Embedder):
+    """
+    Embedder wrapper that batches requests and caches vectors on disk.
+
+    Vectors are stored in SQLite keyed by (model id, hash of normalized text),
+    so boilerplate repeated across reports, re-ingests and repeated questions
+    never reach the wrapped model twice.
+
+    Args:
+        embedder: The embedder that actually computes vectors
+        cache_path: SQLite file holding the cached vectors
+        batch_size: Maximum number of texts sent to the model per batch
+        max_batch_chars: Maximum total characters per batch; long chunks get smaller batches
+    """
+
+    embedder: Optional[Embedder] = None
+    cache_path: str = "./embedding_cache/embeddings.sqlite3"
+    max_batch_chars: int = 64_000
+    id: Optional[str] = None
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _conn: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.embedder is None:
+            raise ValueError("CachedEmbedder requires an embedder to wrap")
+        self.id = self.id or getattr(self.embedder, "id", type(self.embedder).__name__)
+        self.dimensions = self.embedder.dimensions
+        self.enable_batch = True
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model_id TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model_id, text_hash))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({placeholders})",
+                    [self.id, *batch],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, vector) VALUES (?, ?, ?)",
+                [(self.id, key, array("f", vector).tobytes()) for key, vector in items.items() if vector],
+            )
+            self.conn.commit()
+
+    def _batches(self, texts: List[str]) -> Iterator[List[str]]:
+        """Group texts of similar length, capped by count and total characters."""
+        batch: List[str] = []
+        batch_chars = 0
+        for text in sorted(texts, key=len):
+            if batch and (len(batch) >= self.batch_size or batch_chars + len(text) > self.max_batch_chars):
+                yield batch
+                batch, batch_chars = [], 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            yield batch
+
+    def get_embeddings_batch_and_usage(self, texts: List[str]) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        """
+        Embed many texts, only sending cache misses to the wrapped model.
+
+        Args:
+            texts: Texts to embed (duplicates are embedded once)
+
+        Returns:
+            Tuple of embeddings in input order and per-text usage (always None)
+        """
+        keys = [text_key(text) for text in texts]
+        found = self._lookup(sorted(set(keys)))
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            key_by_text = {text: key for key, text in missing.items()}
+            for batch in self._batches(list(missing.values())):
+                computed = dict(zip((key_by_text[text] for text in batch), embed_texts(self.embedder, batch)))
+                self._store(computed)
+                found.update(computed)
+
+        return [found.get(key, []) for key in keys], [None] * len(keys)
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embeddings_batch_and_usage([text])[0][0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+
+    async def async_get_embedding(self, text: str) -> List[float]:
+        key = text_key(text)
+        cached = self._lookup([key]).get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        embedding = await self.embedder.async_get_embedding(text)
+        if not embedding:
+            raise ValueError(f"{type(self.embedder).__name__} returned no vector")
+        self._store({key: embedding})
+        return embedding
+
+    async def async_get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return await self.async_get_embedding(text), None
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
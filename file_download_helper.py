@@ -1,6 +1,15 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import os
 import re
+import threading
+import time
+
+FILES_API_BETA = "files-api-2025-04-14"
+CHUNK_SIZE = 1 << 16
+# detect_file_extension looks at the first 2000 bytes for the ZIP folder names
+SNIFF_BYTES = 2000
 
 
 def detect_file_extension(file_content: bytes) -> str:
@@ -33,6 +42,172 @@ def detect_file_extension(file_content: bytes) -> str:
         return ".bin"
 
 
+@contextmanager
+def _open_download(client, file_id: str) -> Iterator:
+    """
+    Open a Files API download without reading the body.
+
+    client.beta.files.download() reads the whole file into memory before
+    returning; the streaming-response variant leaves the body on the socket
+    until iter_bytes() pulls it. Clients without it (test doubles, old SDKs)
+    fall back to the buffered call.
+    """
+    streaming = getattr(client.beta.files, "with_streaming_response", None)
+    if streaming is None:
+        yield client.beta.files.download(file_id=file_id, betas=[FILES_API_BETA])
+        return
+    with streaming.download(file_id=file_id, betas=[FILES_API_BETA]) as response:
+        yield response
+
+
+def _iter_file_chunks(file_content, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Iterate a download in chunks, falling back to read() for responses without iter_bytes."""
+    if hasattr(file_content, "iter_bytes"):
+        yield from file_content.iter_bytes(chunk_size)
+    else:
+        data = file_content.read()
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+
+def _filename_from_stdout(stdout: Optional[str], detected_ext: str) -> Optional[str]:
+    """Use the filename the skill printed, corrected to the detected extension."""
+    if not stdout:
+        return None
+    match = re.search(r"[\w\-]+\.(pptx|xlsx|docx|pdf)", stdout)
+    if not match:
+        return None
+    basename, extracted_ext = os.path.splitext(match.group(0))
+    return f"{basename}{extracted_ext if extracted_ext == detected_ext else detected_ext}"
+
+
+def _collect_file_ids(response) -> List[Tuple[str, Optional[str]]]:
+    """
+    Find the file ids in a response, together with the stdout that produced them.
+
+    Args:
+        response: The Anthropic API response object OR a dict with 'file_ids' key
+
+    Returns:
+        Unique (file_id, stdout) pairs in the order they appear
+    """
+    found: Dict[str, Optional[str]] = {}
+
+    # Check if response is a dict with file_ids (from provider_data)
+    if isinstance(response, dict) and "file_ids" in response:
+        for file_id in response["file_ids"]:
+            found.setdefault(file_id, None)
+        return list(found.items())
+
+    # Iterate through response content blocks
+    for block in getattr(response, "content", None) or []:
+        if getattr(block, "type", None) != "bash_code_execution_tool_result":
+            continue
+        result = getattr(block, "content", None)
+        outputs = getattr(result, "content", None)
+        if not isinstance(outputs, list):
+            continue
+        for output_block in outputs:
+            if hasattr(output_block, "file_id"):
+                found.setdefault(output_block.file_id, getattr(result, "stdout", None))
+    return list(found.items())
+
+
+def _download_artifact(
+    client,
+    file_id: str,
+    stdout: Optional[str],
+    output_dir: str,
+    default_filename: Optional[str],
+    claim: Callable[[str, str], str] = lambda filename, file_id: filename,
+) -> Dict:
+    """Stream one artifact to disk, choosing its name from the first buffer and claiming it via `claim`."""
+    started = time.perf_counter()
+    with _open_download(client, file_id) as file_content:
+        chunks = _iter_file_chunks(file_content)
+
+        # Buffer just enough of the head to sniff the file type
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+        detected_ext = detect_file_extension(head)
+
+        filename = claim(
+            default_filename
+            or _filename_from_stdout(stdout, detected_ext)
+            or f"skill_output_{file_id[-8:]}{detected_ext}",
+            file_id,
+        )
+        filepath = os.path.join(output_dir, filename)
+
+        size = len(head)
+        with open(filepath, "wb") as f:
+            f.write(head)
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+
+    return {
+        "file_id": file_id,
+        "path": filepath,
+        "extension": detected_ext,
+        "size": size,
+        "seconds": time.perf_counter() - started,
+        "error": None,
+    }
+
+
+def download_skill_artifacts(
+    response, client, output_dir: str = ".", default_filename: str = None, max_workers: int = 4
+) -> List[Dict]:
+    """
+    Download files created by Claude Agent Skills concurrently.
+
+    Args:
+        response: The Anthropic API response object OR a dict with 'file_ids' key
+        client: Anthropic client instance (anything with beta.files.download)
+        output_dir: Directory to save files (default: current directory)
+        default_filename: Default filename to use
+        max_workers: Maximum number of downloads in flight
+
+    Returns:
+        Manifest with one entry per file id: file_id, path, extension, size,
+        seconds and error (None on success)
+    """
+    jobs = _collect_file_ids(response)
+    if not jobs:
+        return []
+
+    claimed: set = set()
+    lock = threading.Lock()
+
+    def _claim(filename: str, file_id: str) -> str:
+        # Several files cannot share one name when they are written concurrently; this covers
+        # default_filename and the name printed in a stdout block that produced several files
+        with lock:
+            if filename in claimed:
+                base, ext = os.path.splitext(filename)
+                filename = f"{base}_{file_id[-8:]}{ext}"
+            claimed.add(filename)
+            return filename
+
+    def _run(job) -> Dict:
+        file_id, stdout = job
+        print(f"Found file ID: {file_id}")
+        try:
+            entry = _download_artifact(client, file_id, stdout, output_dir, default_filename, _claim)
+            print(f"Downloaded: {entry['path']} ({entry['size']} bytes in {entry['seconds']:.2f}s)")
+            return entry
+        except Exception as e:
+            print(f"Failed to download file {file_id}: {e}")
+            return {"file_id": file_id, "path": None, "extension": None, "size": 0, "seconds": 0.0, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_run, jobs))
+
+
 def download_skill_files(
     response, client, output_dir: str = ".", default_filename: str = None
 ) -> List[str]:
@@ -48,114 +223,5 @@ def download_skill_files(
     Returns:
         List of downloaded file paths
     """
-    downloaded_files = []
-    seen_file_ids = set()
-
-    # Check if response is a dict with file_ids (from provider_data)
-    if isinstance(response, dict) and "file_ids" in response:
-        for file_id in response["file_ids"]:
-            if file_id in seen_file_ids:
-                continue
-            seen_file_ids.add(file_id)
-
-            print(f"Found file ID: {file_id}")
-
-            try:
-                # Download the file
-                file_content = client.beta.files.download(
-                    file_id=file_id, betas=["files-api-2025-04-14"]
-                )
-
-                # Read file content
-                file_data = file_content.read()
-
-                # Detect actual file type from content
-                detected_ext = detect_file_extension(file_data)
-
-                # Use default filename or generate one
-                filename = (
-                    default_filename
-                    if default_filename
-                    else f"skill_output_{file_id[-8:]}{detected_ext}"
-                )
-                filepath = os.path.join(output_dir, filename)
-
-                # Save to disk
-                with open(filepath, "wb") as f:
-                    f.write(file_data)
-
-                downloaded_files.append(filepath)
-                print(f"Downloaded: {filepath}")
-
-            except Exception as e:
-                print(f"Failed to download file {file_id}: {e}")
-
-        return downloaded_files
-
-    # Original logic: Iterate through response content blocks
-    if not hasattr(response, "content"):
-        return downloaded_files
-
-    for block in response.content:
-        if block.type == "bash_code_execution_tool_result":
-            if hasattr(block, "content") and hasattr(block.content, "content"):
-                if isinstance(block.content.content, list):
-                    for output_block in block.content.content:
-                        if hasattr(output_block, "file_id"):
-                            file_id = output_block.file_id
-
-                            if file_id in seen_file_ids:
-                                continue
-                            seen_file_ids.add(file_id)
-
-                            print(f"Found file ID: {file_id}")
-
-                            try:
-                                file_content = client.beta.files.download(
-                                    file_id=file_id, betas=["files-api-2025-04-14"]
-                                )
-
-                                file_data = file_content.read()
-                                detected_ext = detect_file_extension(file_data)
-
-                                filename = default_filename
-
-                                if (
-                                    not filename
-                                    and hasattr(block.content, "stdout")
-                                    and block.content.stdout
-                                ):
-                                    match = re.search(
-                                        r"[\w\-]+\.(pptx|xlsx|docx|pdf)",
-                                        block.content.stdout,
-                                    )
-                                    if match:
-                                        extracted_filename = match.group(0)
-                                        extracted_ext = os.path.splitext(
-                                            extracted_filename
-                                        )[1]
-                                        if extracted_ext == detected_ext:
-                                            filename = extracted_filename
-                                        else:
-                                            basename = os.path.splitext(
-                                                extracted_filename
-                                            )[0]
-                                            filename = f"{basename}{detected_ext}"
-
-                                if not filename:
-                                    filename = (
-                                        f"skill_output_{file_id[-8:]}{detected_ext}"
-                                    )
-
-                                filepath = os.path.join(output_dir, filename)
-
-                                with open(filepath, "wb") as f:
-                                    f.write(file_data)
-
-                                downloaded_files.append(filepath)
-                                print(f"Downloaded: {filepath}")
-
-                            except Exception as e:
-                                print(f"Failed to download file {file_id}: {e}")
-
-    return downloaded_files
\ No newline at end of file
+    manifest = download_skill_artifacts(response, client, output_dir, default_filename)
+    return [entry["path"] for entry in manifest if entry["error"] is None]
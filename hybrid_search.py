@@ -0,0 +1,230 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agno.knowledge.document import Document
+from agno.vectordb.chroma import ChromaDb
+from agno.vectordb.search import SearchType
+
+INDEX_NAME = "bm25_index.json"
+
+# Keeps "fy25", "95b", "m-pesa", "15.3" and "ifrs-15" as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Persistent BM25 inverted index over the chunks stored in Chroma.
+
+    Chunks are indexed under their Chroma ids and grouped by source_path so a
+    re-ingested or removed PDF can be dropped from the index in one call.
+
+    Args:
+        path: JSON file the index is saved to
+        k1: Term frequency saturation
+        b: Document length normalization
+    """
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_sources: Dict[str, str] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.postings = defaultdict(dict, data["postings"])
+        self.doc_lengths = data["doc_lengths"]
+        self.doc_sources = data["doc_sources"]
+        self._total_length = sum(self.doc_lengths.values())
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with self._lock:
+            data = {"postings": self.postings, "doc_lengths": self.doc_lengths, "doc_sources": self.doc_sources}
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def add(self, ids: List[str], texts: List[str], source_path: str) -> None:
+        """Index chunks of one source file, replacing any earlier copy of the same ids."""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                self._remove_ids([doc_id])
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self.postings[term][doc_id] = tf
+                length = sum(counts.values())
+                self.doc_lengths[doc_id] = length
+                self.doc_sources[doc_id] = source_path
+                self._total_length += length
+
+    def _remove_ids(self, ids: List[str]) -> None:
+        doomed = {doc_id for doc_id in ids if doc_id in self.doc_lengths}
+        if not doomed:
+            return
+        for term in list(self.postings):
+            posting = self.postings[term]
+            for doc_id in doomed & posting.keys():
+                del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+        for doc_id in doomed:
+            self._total_length -= self.doc_lengths.pop(doc_id)
+            self.doc_sources.pop(doc_id, None)
+
+    def remove_source(self, source_path: str) -> None:
+        """Drop every chunk that came from `source_path`."""
+        with self._lock:
+            self._remove_ids([doc_id for doc_id, source in self.doc_sources.items() if source == source_path])
+
+    def search(self, query: str, limit: int = 10, allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to `limit` (chunk id, BM25 score) pairs, best first, only from `allowed` ids when given."""
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def rebuild(self, collection: Any, page_size: int = 1000) -> None:
+        """Rebuild the index from everything already stored in a Chroma collection."""
+        with self._lock:
+            self.postings = defaultdict(dict)
+            self.doc_lengths, self.doc_sources, self._total_length = {}, {}, 0
+        offset = 0
+        while True:
+            batch = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not batch["ids"]:
+                break
+            for doc_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                self.add([doc_id], [text or ""], (metadata or {}).get("source_path", ""))
+            offset += len(batch["ids"])
+        self.save()
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists; an id ranked r in a list contributes 1 / (k + r)."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranked in ranked_lists:
+        for rank, doc_id in enumerate(ranked, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridChromaDb(ChromaDb):
+    """
+    ChromaDb that fuses its vector search with a BM25 index using RRF.
+
+    MiniLM embeddings blur exact tokens such as "FY25", "Fuliza", "KES 95B" or
+    IFRS clause numbers; BM25 matches them exactly. The ingestion pipeline keeps
+    `lexical_index` in sync with the collection (see ingestion.sync_knowledge).
+
+    Args:
+        candidates: Results taken from each retriever before fusion
+        **kwargs: Passed to ChromaDb
+    """
+
+    def __init__(self, candidates: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.candidates = candidates
+        self.lexical_index = BM25Index(Path(self.path) / f"{self.collection_name}_{INDEX_NAME}")
+
+    def _collection_handle(self):
+        if not self._collection:
+            self._collection = self.client.get_collection(name=self.collection_name)
+        return self._collection
+
+    def _convert_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Like ChromaDb's, but several fields are joined with $and (Chroma allows one
+        field per clause) and operator values such as {"$gte": 3} pass through.
+        """
+        if not filters or any(key.startswith("$") for key in filters):
+            return filters or {}
+        clauses = []
+        for key, value in filters.items():
+            if isinstance(value, dict) and all(op.startswith("$") for op in value):
+                clauses.append({key: value})
+            elif isinstance(value, (list, tuple)):
+                clauses.append({key: {"$in": list(value)}})
+            else:
+                clauses.append({key: {"$eq": value}})
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def vector_search(self, query: str, limit: int = 5, filters: Optional[Any] = None) -> List[Document]:
+        """Plain Chroma vector search, bypassing the lexical index."""
+        return ChromaDb.search(self, query=query, limit=limit, filters=filters)
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Any] = None) -> List[Document]:
+        if self.search_type != SearchType.vector or not len(self.lexical_index) or isinstance(filters, list):
+            return super().search(query=query, limit=limit, filters=filters)
+
+        where = self._convert_filters(filters) if filters else None
+        by_id: Dict[str, Document] = {}
+        vector_ids: List[str] = []
+        for doc in self._vector_search(query, limit=self.candidates, filters=filters):
+            by_id[doc.id or ""] = doc
+            vector_ids.append(doc.id or "")
+
+        # With filters, BM25 ranks only the chunks the where clause selects, not the whole index
+        allowed = set(self._collection_handle().get(where=where, include=[])["ids"]) if where else None
+        lexical_hits = self.lexical_index.search(query, limit=self.candidates, allowed=allowed)
+        lexical_ids = [doc_id for doc_id, _ in lexical_hits]
+        missing = [doc_id for doc_id in lexical_ids if doc_id not in by_id]
+        if missing:
+            # BM25 hits the vector search did not return; the where clause keeps filters applied
+            fetched = self._collection_handle().get(ids=missing, where=where, include=["documents", "metadatas"])
+            for doc_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                metadata = dict(metadata or {})
+                by_id[doc_id] = Document(
+                    id=doc_id,
+                    name=metadata.pop("name", None),
+                    content_id=metadata.pop("content_id", None),
+                    content=text or "",
+                    meta_data=metadata,
+                )
+        lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in by_id]
+
+        results = []
+        for doc_id, score in reciprocal_rank_fusion([vector_ids, lexical_ids], k=self.hybrid_rrf_k)[:limit]:
+            doc = by_id[doc_id]
+            doc.reranking_score = score
+            results.append(doc)
+        if self.reranker and results:
+            results = self.reranker.rerank(query=query, documents=results)
+        return results
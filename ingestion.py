@@ -0,0 +1,413 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agno.knowledge.document import Document
+from agno.knowledge.reader.pdf_reader import PDFReader
+from agno.utils.log import log_warning
+from pypdf import PdfReader
+
+from embedding_cache import embed_texts
+
+# Bump when the way a PDF is turned into chunks changes, so every file is
+# re-ingested on the next start even if its bytes did not change.
+READER_VERSION = "pdf-reader-v1"
+MANIFEST_NAME = "ingest_manifest.json"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Hash a file's content without loading it all into memory.
+
+    Args:
+        path: File to hash
+        block_size: Number of bytes read per iteration
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_versions(reader: PDFReader, embedder: Any, chunker: Any = None) -> Dict[str, str]:
+    """
+    Describe the reader, chunker and embedder that produced the stored vectors.
+
+    Args:
+        reader: PDF reader used to parse and chunk the files
+        embedder: Embedder attached to the vector database
+        chunker: SectionChunker replacing the reader's chunking, if any
+
+    Returns:
+        Dict of version strings recorded in the manifest
+    """
+    if chunker is not None:
+        chunker_version = chunker.version
+    else:
+        strategy = reader.chunking_strategy
+        chunk_size = getattr(strategy, "chunk_size", reader.chunk_size)
+        chunker_version = f"{type(strategy).__name__}:{chunk_size}:{reader.chunk}"
+    return {
+        "reader": READER_VERSION,
+        "chunker": chunker_version,
+        "embedder": getattr(embedder, "id", None) or type(embedder).__name__,
+    }
+
+
+def load_manifest(manifest_path: Path) -> Dict[str, Any]:
+    """Load the ingestion manifest, returning an empty one if it is missing or corrupt."""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+    manifest.setdefault("files", {})
+    return manifest
+
+
+def manifest_fingerprint(manifest_path: Path) -> str:
+    """
+    Version string for the indexed corpus, changing whenever any file is re-ingested.
+
+    Args:
+        manifest_path: Ingestion manifest to fingerprint
+
+    Returns:
+        Hex digest over every file's path, content hash and pipeline versions
+    """
+    manifest = load_manifest(Path(manifest_path))
+    digest = hashlib.sha256()
+    for source_path, entry in sorted(manifest["files"].items()):
+        digest.update(f"{source_path}:{entry.get('sha256')}:{json.dumps(entry.get('versions'), sort_keys=True)}\n".encode())
+    return digest.hexdigest()
+
+
+def save_manifest(manifest_path: Path, manifest: Dict[str, Any]) -> None:
+    """Atomically write the ingestion manifest next to the vector store."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def _parse_page_range(
+    reader: PDFReader,
+    path: str,
+    doc_name: str,
+    start: int,
+    stop: int,
+    chunker: Any = None,
+    source_path: str = "",
+) -> List[Document]:
+    """
+    Extract and chunk pages [start, stop) of one PDF.
+
+    Runs inside a worker process, so it reopens the file instead of sharing a
+    parsed PdfReader across processes. With a SectionChunker, the section in
+    effect at `start` is taken from the last heading on the pages before it.
+    """
+    pdf = PdfReader(path)
+    if pdf.is_encrypted and not pdf.decrypt(reader.password or ""):
+        return []
+    pages = [
+        Document(
+            name=doc_name,
+            id=f"{doc_name}_{page_number + 1}",
+            meta_data={"page": page_number + 1},
+            content=pdf.pages[page_number].extract_text() or "",
+        )
+        for page_number in range(start, stop)
+    ]
+    if chunker is not None:
+        from section_chunker import document_metadata, last_heading
+
+        first_page_text = pages[0].content if start == 0 and pages else pdf.pages[0].extract_text() or ""
+        section = None
+        for page_number in range(start - 1, max(start - 4, -1), -1):
+            section = last_heading(pdf.pages[page_number].extract_text() or "")
+            if section:
+                break
+        return chunker.chunk_pages(pages, document_metadata(source_path, first_page_text), section)
+    if not reader.chunk:
+        return pages
+    return reader._build_chunked_documents(pages)
+
+
+def parse_pdfs_parallel(
+    files: List[Tuple[str, Path]],
+    reader: PDFReader,
+    max_workers: Optional[int] = None,
+    pages_per_task: int = 8,
+    stats: Optional[Dict[str, float]] = None,
+    chunker: Any = None,
+    errors: Optional[Dict[str, str]] = None,
+) -> Iterator[Tuple[str, List[Document], bool]]:
+    """
+    Fan page extraction and chunking out to a process pool.
+
+    Each file is split into page ranges so one large annual report keeps every
+    core busy. Chunks are yielded as soon as their page range is done rather
+    than after the whole corpus has been parsed. A file that cannot be opened
+    or whose page range fails to parse is recorded in `errors` and yields
+    nothing further (in particular no file_done); the other files carry on.
+
+    Args:
+        files: (source_path, absolute path) pairs to parse
+        reader: PDF reader whose chunking settings are applied in the workers
+        max_workers: Process count (default: os.cpu_count()); 1 parses in-process
+        pages_per_task: Pages handled by a single worker task
+        stats: Optional dict filled with 'pages', 'seconds' and 'pages_per_sec'
+        chunker: SectionChunker used instead of the reader's chunking
+        errors: Optional dict filled with source_path -> error message for files that failed
+
+    Yields:
+        (source_path, chunks, file_done) where file_done is True for the last
+        page range of that file
+    """
+    stats = stats if stats is not None else {}
+    errors = errors if errors is not None else {}
+    started = time.perf_counter()
+    tasks: List[Tuple[str, str, str, int, int]] = []
+    remaining: Dict[str, int] = {}
+
+    def _fail(source_path: str, error: BaseException) -> None:
+        if source_path not in errors:
+            errors[source_path] = f"{type(error).__name__}: {error}"
+            log_warning(f"Skipping {source_path}, it could not be parsed: {errors[source_path]}")
+
+    for source_path, path in files:
+        try:
+            page_count = len(PdfReader(path).pages)
+        except Exception as e:
+            _fail(source_path, e)
+            continue
+        doc_name = path.stem.replace(" ", "_")
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        remaining[source_path] = len(ranges)
+        stats["pages"] = stats.get("pages", 0) + page_count
+        if not ranges:
+            yield source_path, [], True
+        tasks.extend((source_path, str(path), doc_name, start, stop) for start, stop in ranges)
+
+    def _finish(source_path: str) -> bool:
+        remaining[source_path] -= 1
+        return remaining[source_path] == 0
+
+    if max_workers == 1:
+        for source_path, path_str, doc_name, start, stop in tasks:
+            if source_path in errors:
+                continue
+            try:
+                chunks = _parse_page_range(reader, path_str, doc_name, start, stop, chunker, source_path)
+            except Exception as e:
+                _fail(source_path, e)
+                continue
+            yield source_path, chunks, _finish(source_path)
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(
+                    _parse_page_range, reader, path_str, doc_name, start, stop, chunker, source_path
+                ): source_path
+                for source_path, path_str, doc_name, start, stop in tasks
+            }
+            for future in as_completed(futures):
+                source_path = futures[future]
+                try:
+                    chunks = future.result()
+                except Exception as e:
+                    _fail(source_path, e)
+                    continue
+                if source_path not in errors:
+                    yield source_path, chunks, _finish(source_path)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["pages_per_sec"] = stats.get("pages", 0) / stats["seconds"] if stats["seconds"] else 0.0
+
+
+def _collection(vector_db: Any):
+    return vector_db.client.get_or_create_collection(name=vector_db.collection_name)
+
+
+def _delete_source(vector_db: Any, source_path: str) -> None:
+    """Remove a file's vectors, and its BM25 entries when the store keeps a lexical index."""
+    vector_db.delete_by_metadata({"source_path": source_path})
+    lexical_index = getattr(vector_db, "lexical_index", None)
+    if lexical_index is not None:
+        lexical_index.remove_source(source_path)
+
+
+def _write_chunks(vector_db: Any, source_path: str, file_hash: str, documents: List[Document]) -> int:
+    """
+    Embed and store a batch of chunks belonging to one file.
+
+    Chunk ids are derived from the source path, page and chunk position rather
+    than the chunk text, so boilerplate shared by two reports is stored once
+    per report and deleting one report never removes the other's vectors.
+    Batches of the same file may arrive in any order.
+    """
+    ids, texts, metadatas = [], [], []
+    for index, document in enumerate(documents):
+        content = document.content.replace("\x00", "\ufffd")
+        if not content.strip():
+            continue
+        metadata = {
+            key: value
+            for key, value in (document.meta_data or {}).items()
+            if isinstance(value, (str, int, float, bool))
+        }
+        chunk_key = f"{metadata.get('page', 0)}.{metadata.get('chunk', index)}"
+        metadata.update(
+            {
+                "name": document.name or Path(source_path).stem,
+                "source_path": source_path,
+                "content_hash": file_hash,
+                "chunk_key": chunk_key,
+            }
+        )
+        ids.append(md5(f"{source_path}#{chunk_key}".encode()).hexdigest())
+        texts.append(content)
+        metadatas.append(metadata)
+
+    if ids:
+        embeddings = embed_texts(vector_db.embedder, texts)
+        _collection(vector_db).upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        lexical_index = getattr(vector_db, "lexical_index", None)
+        if lexical_index is not None:
+            lexical_index.add(ids, texts, source_path)
+    return len(ids)
+
+
+def sync_knowledge(
+    knowledge: Any,
+    pdf_dir: Path,
+    manifest_path: Optional[Path] = None,
+    reader: Optional[PDFReader] = None,
+    max_workers: Optional[int] = None,
+    chunker: Any = None,
+    include: Optional[Callable[[str], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Bring the knowledge base's vector store in line with the PDFs on disk.
+
+    Only new or changed PDFs are parsed and embedded, vectors of PDFs that were
+    removed are deleted, and everything else is left untouched. A change in the
+    reader, chunker or embedder version re-ingests every file. Parsing runs in a
+    process pool (see parse_pdfs_parallel) while the parent embeds and stores
+    chunks as they arrive. When the vector store has a `lexical_index`
+    (see hybrid_search.HybridChromaDb) it is updated alongside the vectors.
+
+    Args:
+        knowledge: Knowledge instance backed by a ChromaDb vector store
+        pdf_dir: Folder scanned recursively for PDFs
+        manifest_path: Manifest location (default: inside the Chroma path)
+        reader: PDF reader used for parsing and chunking
+        max_workers: Parser process count (default: os.cpu_count())
+        chunker: SectionChunker for heading/table-aware chunks with category,
+            fiscal year, page and section metadata (default: the reader's chunking)
+        include: Keeps only the source paths this store holds (default: every PDF);
+            see sharded_knowledge.sync_shards
+
+    Returns:
+        Dict with 'added', 'updated', 'removed', 'unchanged' and 'failed' source
+        paths, plus 'pages' and 'pages_per_sec' for the files that were parsed.
+        Failed files (corrupt or unreadable PDFs) are left out of the manifest,
+        so they are retried on the next run.
+    """
+    vector_db = knowledge.vector_db
+    reader = reader or PDFReader(chunk=True)
+    pdf_dir = Path(pdf_dir)
+    if manifest_path is None:
+        manifest_path = Path(vector_db.path) / MANIFEST_NAME
+
+    manifest = load_manifest(manifest_path)
+    versions = pipeline_versions(reader, vector_db.embedder, chunker)
+    previous: Dict[str, Dict[str, Any]] = manifest["files"]
+    summary: Dict[str, Any] = {"added": [], "updated": [], "removed": [], "unchanged": [], "failed": []}
+
+    lexical_index = getattr(vector_db, "lexical_index", None)
+    if lexical_index is not None and not len(lexical_index) and previous:
+        # Vectors ingested before the lexical index existed (or its file was lost)
+        lexical_index.rebuild(_collection(vector_db))
+
+    current: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[str, Dict[str, Any]] = {}
+    to_parse: List[Tuple[str, Path]] = []
+    for path in sorted(pdf_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() != ".pdf":
+            continue
+        source_path = path.relative_to(pdf_dir).as_posix()
+        if include is not None and not include(source_path):
+            continue
+        stat = path.stat()
+        entry = previous.get(source_path)
+
+        # Cheap check first: same size and mtime means same content, no hashing needed
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            file_hash = entry["sha256"]
+        else:
+            file_hash = file_sha256(path)
+
+        if entry and entry["sha256"] == file_hash and entry.get("versions") == versions:
+            current[source_path] = {**entry, "size": stat.st_size, "mtime": stat.st_mtime}
+            summary["unchanged"].append(source_path)
+            continue
+
+        # Also clears vectors left behind by an interrupted earlier run
+        _delete_source(vector_db, source_path)
+        pending[source_path] = {
+            "sha256": file_hash,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunks": 0,
+            "versions": versions,
+        }
+        summary["updated" if entry else "added"].append(source_path)
+        to_parse.append((source_path, path))
+
+    stats: Dict[str, float] = {}
+    errors: Dict[str, str] = {}
+    parsed = parse_pdfs_parallel(
+        to_parse, reader, max_workers=max_workers, stats=stats, chunker=chunker, errors=errors
+    )
+    for source_path, chunks, file_done in parsed:
+        if source_path in errors:
+            continue
+        entry = pending[source_path]
+        entry["chunks"] += _write_chunks(vector_db, source_path, entry["sha256"], chunks)
+        if file_done:
+            current[source_path] = entry
+            # Persist after every file so an interrupted start does not redo finished work
+            if lexical_index is not None:
+                lexical_index.save()
+            save_manifest(manifest_path, {"files": {**previous, **current}})
+
+    for source_path in sorted(errors):
+        # Drop chunks of page ranges that finished before the failure
+        _delete_source(vector_db, source_path)
+        for key in ("added", "updated"):
+            if source_path in summary[key]:
+                summary[key].remove(source_path)
+        summary["failed"].append(source_path)
+
+    for source_path in sorted(set(previous) - set(current) - set(pending)):
+        _delete_source(vector_db, source_path)
+        summary["removed"].append(source_path)
+
+    if lexical_index is not None:
+        lexical_index.save()
+
+    save_manifest(manifest_path, {"files": current})
+    summary["pages"] = int(stats.get("pages", 0))
+    summary["pages_per_sec"] = stats.get("pages_per_sec", 0.0)
+    return summary
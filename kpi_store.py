@@ -0,0 +1,505 @@
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.tools import Toolkit
+from agno.utils.log import log_warning
+from pypdf import PdfReader
+
+from ingestion import file_sha256
+
+# Bump when the extraction rules change so every PDF is extracted again
+EXTRACTOR_VERSION = "kpi-rules-v2"
+STORE_NAME = "kpis.sqlite3"
+
+# Canonical metric -> phrases used for it in reports. Longer phrases win over
+# shorter ones ending at the same place ("m-pesa revenue" over "revenue").
+METRIC_ALIASES: Dict[str, List[str]] = {
+    "total_revenue": ["total revenue", "group revenue"],
+    "service_revenue": ["service revenue", "group service revenue"],
+    "mpesa_revenue": ["m-pesa revenue", "mpesa revenue"],
+    "voice_revenue": ["voice revenue"],
+    "mobile_data_revenue": ["mobile data revenue"],
+    "messaging_revenue": ["messaging revenue"],
+    "fixed_revenue": ["fixed service and wholesale transit revenue", "fixed revenue", "fixed data revenue"],
+    "fuliza_revenue": ["fuliza"],
+    "ebitda": ["ebitda"],
+    "ebitda_margin": ["ebitda margin"],
+    "ebit_margin": ["ebit margin", "operating profit margin"],
+    "capex": ["capex", "capital expenditure"],
+    "capex_intensity": ["capex intensity"],
+    "pbt": ["pbt", "profit before tax"],
+    "pat": ["pat", "profit after tax"],
+    "eps": ["eps", "earnings per share"],
+    "arpu": ["arpu"],
+    "data_arpu": ["data arpu"],
+    "customers": ["customers", "total customers"],
+    "active_customers": ["one-month active customers", "active customers"],
+    "mobile_data_customers": ["mobile data customers"],
+    "mpesa_agents": ["m-pesa agents"],
+    "direct_costs": ["direct costs"],
+    "operating_costs": ["operating costs", "operating expenses"],
+    "finance_costs": ["finance costs"],
+    "borrowings": ["long-term borrowings", "borrowings"],
+    "net_debt_to_ebitda": ["net debt to ebitda"],
+    "roce": ["roce"],
+    "roe": ["roe"],
+}
+
+UNITS = {"tn": 1e12, "trillion": 1e12, "bn": 1e9, "billion": 1e9, "b": 1e9, "mn": 1e6, "million": 1e6, "m": 1e6, "k": 1e3}
+
+PERIOD = r"(?:(?:H[12]|HY|Q[1-4])\s?(?:FY)?\s?'?(?:20)?\d{2}|FY\s?'?(?:20)?\d{2}|20\d{2}F?)"
+NUMBER = r"(?P<{0}cur>KES|USD|ETB)?\s?(?P<{0}num>-?\d[\d,]*(?:\.\d+)?)\s?(?P<{0}unit>%|(?:x|tn|trillion|bn|billion|mn|million|b|m|k)\b)?(?!\w|\s\d)"
+
+# from KES 79.7Bn in HY24 to KES 75.1Bn in HY25
+FROM_TO = re.compile(
+    rf"from\s+{NUMBER.format('a')}\s+in\s+(?P<aper>{PERIOD})\s+to\s+{NUMBER.format('b')}\s+in\s+(?P<bper>{PERIOD})",
+    re.IGNORECASE,
+)
+# KES 189.4Bn in HY25 from KES 164.6Bn in HY24
+TO_FROM = re.compile(
+    rf"{NUMBER.format('b')}\s+in\s+(?P<bper>{PERIOD})\s+from\s+{NUMBER.format('a')}\s+in\s+(?P<aper>{PERIOD})",
+    re.IGNORECASE,
+)
+# to 39.6% from 48.4% / fell from 48.4% to 39.6% (periods implied: this one and the one before)
+TO_FROM_IMPLIED = re.compile(rf"\bto\s+{NUMBER.format('b')}\s+from\s+{NUMBER.format('a')}", re.IGNORECASE)
+FROM_TO_IMPLIED = re.compile(rf"\bfrom\s+{NUMBER.format('a')}\s+to\s+{NUMBER.format('b')}", re.IGNORECASE)
+DIRECTION_WORDS = r"\b(?:up|down|grew|rose|increased|increase|jumped|surged|declined|decreased|fell|dropped|growth)\b"
+DIRECTION = re.compile(DIRECTION_WORDS, re.IGNORECASE)
+# Up 16.6% to KES 77.24Bn / grew by 15% to KES 189.4Bn / declined by 63.2% to KES 10.01Bn
+CHANGE_TO = re.compile(
+    rf"{DIRECTION_WORDS}"
+    rf"[^.%]{{0,25}}?(?<!\d\s)(?P<pct>\d+(?:\.\d+)?)\s?%[^.%]{{0,40}}?\bto\s+{NUMBER.format('b')}",
+    re.IGNORECASE,
+)
+NEGATIVE_WORDS = {"down", "declined", "decreased", "fell", "dropped"}
+# A metric must be named in the same sentence, at most this many characters before its figure
+METRIC_WINDOW = 120
+
+# Reporting scope of a figure -> phrases that set it. "Safaricom PLC" is the Kenyan company; reports
+# quote consolidated (Group) figures unless a row label or heading says otherwise.
+SCOPE_ALIASES: Dict[str, List[str]] = {
+    "Group": ["group", "consolidated"],
+    "Kenya": ["kenya", "safaricom plc", "safaricom kenya"],
+    "Ethiopia": ["ethiopia", "ethiopian", "safaricom ethiopia"],
+}
+DEFAULT_SCOPE = "Group"
+SCOPE_PATTERN = re.compile(
+    r"(?<![A-Za-z])("
+    + "|".join(re.escape(p) for p in sorted({a for aliases in SCOPE_ALIASES.values() for a in aliases}, key=len, reverse=True))
+    + r")(?![A-Za-z])",
+    re.IGNORECASE,
+)
+SCOPE_BY_ALIAS = {alias: scope for scope, aliases in SCOPE_ALIASES.items() for alias in aliases}
+
+
+def normalize_period(text: str) -> str:
+    """
+    Canonical period label: "HY'25", "H1 2025" and "H1FY25" all become "H1 FY25".
+
+    Args:
+        text: Period as written in a report or file name
+
+    Returns:
+        "FY25", "H1 FY25", "Q3 FY25" or "2025F" style label
+    """
+    text = text.upper().replace("'", "").replace("’", "").replace(" ", "").replace("_", "")
+    forecast = text.endswith("F") and not text.startswith("F")
+    match = re.match(r"^(H[12]|HY|Q[1-4])?(?:FY)?(?:20)?(\d{2})F?$", text)
+    if not match:
+        return text
+    half, year = match.groups()
+    if forecast and not half:
+        return f"20{year}F"
+    if half == "HY":
+        half = "H1"
+    return f"{half} FY{year}" if half else f"FY{year}"
+
+
+def previous_period(period: str) -> str:
+    """Same period one fiscal year earlier ("H1 FY25" -> "H1 FY24")."""
+    match = re.search(r"(\d{2})$", period)
+    if not match:
+        return f"{period} prior"
+    return f"{period[: match.start()]}{int(match.group(1)) - 1:02d}"
+
+
+def document_period(path: Path, text: str) -> Optional[str]:
+    """Reporting period of a document, from its file name or else its first page."""
+    for candidate in (path.stem, text[:500]):
+        match = re.search(rf"(?<![A-Za-z0-9]){PERIOD}(?![A-Za-z0-9])", candidate.replace("_", " "), re.IGNORECASE)
+        if match:
+            return normalize_period(match.group(0))
+    return None
+
+
+def _clean(text: str) -> str:
+    """
+    Undo common PDF extraction artefacts ("K ES", "M -PESA") and join wrapped lines.
+
+    Paragraphs (blocks separated by blank lines) stay on separate lines, so
+    sentences, and the scope looked up in them, never run across a paragraph.
+    """
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = re.sub(r"\bK\s+ES\b", "KES", paragraph)
+        paragraph = re.sub(r"\bM\s?-\s?(PESA|Pesa|pesa)\b", r"M-\1", paragraph)
+        paragraph = re.sub(r"\s+", " ", paragraph.replace("’", "'")).strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    return "\n".join(paragraphs)
+
+
+def _scope(text: str, start: int, position: int) -> str:
+    """Scope named closest before `position` after `start` (sentence, or table title and row label), else Group."""
+    found = list(SCOPE_PATTERN.finditer(text, start, position))
+    return SCOPE_BY_ALIAS[found[-1].group(1).lower()] if found else DEFAULT_SCOPE
+
+
+def _value(match: re.Match, prefix: str) -> Tuple[float, str, Optional[str]]:
+    number = float(match.group(f"{prefix}num").replace(",", ""))
+    unit = (match.group(f"{prefix}unit") or "").lower()
+    currency = match.group(f"{prefix}cur")
+    if unit in ("%", "x"):
+        return number, unit, currency
+    return number * UNITS.get(unit, 1), unit, currency.upper() if currency else None
+
+
+def _alias_pattern() -> re.Pattern:
+    phrases = sorted({alias for aliases in METRIC_ALIASES.values() for alias in aliases}, key=len, reverse=True)
+    return re.compile(r"(?<![A-Za-z])(" + "|".join(re.escape(p) for p in phrases) + r")(?![A-Za-z])", re.IGNORECASE)
+
+
+ALIAS_PATTERN = _alias_pattern()
+METRIC_BY_ALIAS = {alias: metric for metric, aliases in METRIC_ALIASES.items() for alias in aliases}
+
+
+def _metric_before(mentions: List[Tuple[int, int, str]], position: int, floor: int) -> Optional[str]:
+    """The metric mentioned closest before `position` but after `floor` (longest phrase on ties)."""
+    best = None
+    for start, end, metric in mentions:
+        if floor <= start and end <= position and (best is None or end > best[1] or (end == best[1] and start < best[0])):
+            best = (start, end, metric)
+    return best[2] if best else None
+
+
+def extract_kpis(text: str, default_period: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Pull KPI figures out of report text with rules, without any model call.
+
+    Recognizes "<metric> ... from X in P1 to Y in P2", "<metric> ... Y in P2
+    from X in P1", "<metric> ... to Y% from X%" and "<metric> up/grew N% to Y"
+    (the summary-table style). Values are normalized to base units, e.g.
+    "KES 77.2Bn" becomes 77.2e9 with unit "bn" kept for display. Each figure
+    gets a scope (Group, Kenya or Ethiopia) from the nearest scope phrase before
+    it in the same sentence, such as "PAT for the Group", or in the title of its
+    table ("Safaricom PLC Key Ratios"), so Group and Kenya figures for one
+    period stay apart.
+
+    Args:
+        text: Text of one page
+        default_period: Period a figure belongs to when the text does not say
+
+    Returns:
+        List of dicts with metric, period, scope, value, unit, currency, change_pct and context
+    """
+    text = _clean(text)
+    mentions = [(m.start(), m.end(), METRIC_BY_ALIAS[m.group(1).lower()]) for m in ALIAS_PATTERN.finditer(text)]
+    rows: List[Dict[str, Any]] = []
+    taken: List[Tuple[int, int]] = []
+
+    def _sentence_start(position: int) -> int:
+        # ". " rather than "." so decimals such as "KES 0.70" do not end a sentence; paragraphs end one too
+        stop = text.rfind(". ", 0, position)
+        return max(stop + 2 if stop != -1 else 0, text.rfind("\n", 0, position) + 1)
+
+    def _sentence_end(position: int) -> int:
+        stops = [stop for stop in (text.find(". ", position), text.find("\n", position)) if stop != -1]
+        return min(stops) if stops else len(text)
+
+    def _add(metric_pos: int, match: re.Match, prefix: str, period: Optional[str], change: Optional[float] = None):
+        metric = _metric_before(mentions, metric_pos, max(_sentence_start(metric_pos), metric_pos - METRIC_WINDOW))
+        if metric is None or period is None:
+            return
+        value, unit, currency = _value(match, prefix)
+        start = _sentence_start(match.start())
+        prefix_text = ""
+        if match.start() - start > 150:
+            # Table rows run together into one long "sentence"; keep the row, not the table's first rows
+            start, prefix_text = text.find(" ", match.start() - 80) + 1, "..."
+        end = _sentence_end(match.end())
+        rows.append(
+            {
+                "metric": metric,
+                "period": period,
+                "scope": _scope(text, _sentence_start(match.start()), match.start(f"{prefix}num")),
+                "value": value,
+                "unit": unit,
+                "currency": currency,
+                "change_pct": change,
+                "context": (prefix_text + text[start:end].strip())[:300],
+            }
+        )
+
+    def _free(match: re.Match) -> bool:
+        if any(match.start() < stop and start < match.end() for start, stop in taken):
+            return False
+        taken.append(match.span())
+        return True
+
+    for pattern in (FROM_TO, TO_FROM):
+        for match in pattern.finditer(text):
+            if _free(match):
+                _add(match.start(), match, "a", normalize_period(match.group("aper")))
+                _add(match.start(), match, "b", normalize_period(match.group("bper")))
+
+    prior = previous_period(default_period) if default_period else None
+    for pattern in (TO_FROM_IMPLIED, FROM_TO_IMPLIED):
+        for match in pattern.finditer(text):
+            if _free(match):
+                _add(match.start(), match, "b", default_period)
+                _add(match.start(), match, "a", prior)
+
+    for match in CHANGE_TO.finditer(text):
+        if _free(match):
+            # The direction word nearest the percentage decides the sign ("weighs down ... Capex saw a 25.9% increase")
+            pct_offset = match.start("pct") - match.start()
+            nearest = min(DIRECTION.finditer(match.group(0)), key=lambda word: abs(word.start() - pct_offset))
+            sign = -1 if nearest.group(0).lower() in NEGATIVE_WORDS else 1
+            _add(match.start("bnum"), match, "b", default_period, sign * float(match.group("pct")))
+
+    return rows
+
+
+class KPIStore:
+    """
+    Indexed SQLite store of KPI figures extracted from the report PDFs.
+
+    One row per (metric, period, scope, source file, page) so a figure can always
+    be cited back to its page, and Group and Kenya figures are told apart. Lookups hit the (metric, period) index on a
+    persistent connection and take microseconds.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway store)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS kpis (
+                    metric TEXT NOT NULL, period TEXT NOT NULL, value REAL NOT NULL, unit TEXT,
+                    currency TEXT, change_pct REAL, source_path TEXT NOT NULL, page INTEGER, context TEXT,
+                    scope TEXT
+                );
+                CREATE INDEX IF NOT EXISTS kpis_metric_period ON kpis (metric, period);
+                CREATE INDEX IF NOT EXISTS kpis_source ON kpis (source_path);
+                CREATE TABLE IF NOT EXISTS kpi_files (
+                    source_path TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER, mtime REAL, version TEXT
+                );
+                """
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(kpis)")}
+            if "scope" not in columns:
+                # Stores from kpi-rules-v1; the version bump re-extracts every file and fills it
+                self._conn.execute("ALTER TABLE kpis ADD COLUMN scope TEXT")
+                self._conn.commit()
+
+    def replace_file(self, source_path: str, rows: List[Dict[str, Any]], file_entry: Dict[str, Any]) -> None:
+        """Swap all figures of one file in a single transaction."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kpis WHERE source_path = ?", (source_path,))
+            self._conn.executemany(
+                "INSERT INTO kpis (metric, period, scope, value, unit, currency, change_pct, source_path, page, context) "
+                "VALUES (:metric, :period, :scope, :value, :unit, :currency, :change_pct, :source_path, :page, :context)",
+                [{**row, "source_path": source_path} for row in rows],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kpi_files (source_path, sha256, size, mtime, version) VALUES (?, ?, ?, ?, ?)",
+                (source_path, file_entry["sha256"], file_entry["size"], file_entry["mtime"], EXTRACTOR_VERSION),
+            )
+
+    def remove_file(self, source_path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kpis WHERE source_path = ?", (source_path,))
+            self._conn.execute("DELETE FROM kpi_files WHERE source_path = ?", (source_path,))
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT source_path, sha256, size, mtime, version FROM kpi_files").fetchall()
+        return {row[0]: {"sha256": row[1], "size": row[2], "mtime": row[3], "version": row[4]} for row in rows}
+
+    def lookup(
+        self, metric: str, periods: Optional[List[str]] = None, scope: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Figures for one metric, optionally restricted to some periods and a scope.
+
+        Args:
+            metric: Canonical metric name or any alias ("M-PESA revenue", "mpesa_revenue")
+            periods: Periods in any common spelling ("FY25", "HY25", "H1 FY25")
+            scope: "Group", "Kenya" or "Ethiopia" (case-insensitive)
+
+        Returns:
+            Matching rows ordered by period and scope
+        """
+        metric = resolve_metric(metric)
+        columns = ["metric", "period", "scope", "value", "unit", "currency", "change_pct", "source_path", "page", "context"]
+        query = f"SELECT {', '.join(columns)} FROM kpis WHERE metric = ?"
+        params: List[Any] = [metric]
+        if periods:
+            normalized = [normalize_period(period) for period in periods]
+            query += f" AND period IN ({','.join('?' * len(normalized))})"
+            params.extend(normalized)
+        if scope:
+            query += " AND scope = ? COLLATE NOCASE"
+            params.append(scope.strip())
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY period, scope, source_path, page", params).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def metrics(self) -> Dict[str, List[str]]:
+        """Every stored metric with the periods it is available for."""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT metric, period FROM kpis ORDER BY metric, period").fetchall()
+        available: Dict[str, List[str]] = {}
+        for metric, period in rows:
+            available.setdefault(metric, []).append(period)
+        return available
+
+
+def resolve_metric(name: str) -> str:
+    """Map an alias or canonical name to the canonical metric name."""
+    key = name.strip().lower()
+    if key.replace(" ", "_") in METRIC_ALIASES:
+        return key.replace(" ", "_")
+    return METRIC_BY_ALIAS.get(key, key.replace(" ", "_"))
+
+
+def sync_kpis(store: KPIStore, pdf_dir: Path) -> Dict[str, List[str]]:
+    """
+    Extract KPIs from new or changed PDFs and drop figures of removed ones.
+
+    Args:
+        store: Store to update
+        pdf_dir: Folder scanned recursively for PDFs
+
+    Returns:
+        Dict with 'extracted', 'removed', 'unchanged' and 'failed' source paths;
+        failed files (corrupt or encrypted PDFs) are not recorded, so they are retried next run
+    """
+    pdf_dir = Path(pdf_dir)
+    known = store.files()
+    summary: Dict[str, List[str]] = {"extracted": [], "removed": [], "unchanged": [], "failed": []}
+    seen = set()
+    for path in sorted(pdf_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() != ".pdf":
+            continue
+        source_path = path.relative_to(pdf_dir).as_posix()
+        seen.add(source_path)
+        stat = path.stat()
+        entry = known.get(source_path)
+        if entry and entry["version"] == EXTRACTOR_VERSION:
+            if (entry["size"], entry["mtime"]) == (stat.st_size, stat.st_mtime) or entry["sha256"] == file_sha256(path):
+                summary["unchanged"].append(source_path)
+                continue
+
+        try:
+            pages = [page.extract_text() or "" for page in PdfReader(path).pages]
+        except Exception as e:
+            log_warning(f"Skipping KPI extraction for {source_path}: {type(e).__name__}: {e}")
+            # Figures of an earlier version of the file would no longer match it
+            store.remove_file(source_path)
+            summary["failed"].append(source_path)
+            continue
+        period = document_period(path, pages[0] if pages else "")
+        rows = []
+        for page_number, page_text in enumerate(pages, start=1):
+            rows.extend({**row, "page": page_number} for row in extract_kpis(page_text, period))
+        store.replace_file(
+            source_path, rows, {"sha256": file_sha256(path), "size": stat.st_size, "mtime": stat.st_mtime}
+        )
+        summary["extracted"].append(source_path)
+
+    for source_path in sorted(set(known) - seen):
+        store.remove_file(source_path)
+        summary["removed"].append(source_path)
+    return summary
+
+
+def _format_value(row: Dict[str, Any]) -> str:
+    unit = row["unit"] or ""
+    if unit in ("%", "x"):
+        return f"{row['value']:g}{unit}"
+    scaled = row["value"] / UNITS[unit] if unit in UNITS else row["value"]
+    return " ".join(part for part in (row["currency"], f"{scaled:,.2f}{unit.capitalize() if unit else ''}") if part)
+
+
+class KPITools(Toolkit):
+    """
+    Numeric KPI lookups against the KPIStore, answered without a model call.
+
+    Args:
+        store: Store holding the extracted figures
+    """
+
+    def __init__(self, store: KPIStore, **kwargs):
+        self.store = store
+        super().__init__(
+            name="kpi_lookup",
+            tools=[self.lookup_kpi, self.list_kpis],
+            instructions=(
+                "For reported figures (revenue by segment, EBITDA, capex, ARPU, margins, EPS by period) call "
+                "lookup_kpi before searching the knowledge base, and cite the source file and page it returns. "
+                "A metric can have Group, Kenya and Ethiopia figures for the same period; always state the scope."
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def lookup_kpi(self, metric: str, periods: Optional[List[str]] = None, scope: Optional[str] = None) -> str:
+        """Use this function to look up a reported financial KPI, e.g. M-PESA revenue for FY24 and FY25.
+
+        Args:
+            metric (str): KPI name, e.g. "mpesa_revenue", "M-PESA revenue", "EBITDA margin", "capex", "data ARPU".
+            periods (Optional[List[str]]): Periods to return, e.g. ["H1 FY24", "H1 FY25"]. All periods if omitted.
+            scope (Optional[str]): "Group", "Kenya" (Safaricom PLC) or "Ethiopia". All scopes if omitted.
+
+        Returns:
+            str: JSON list of figures with period, scope, value, change_pct, the source file and page and the
+                sentence or table row the figure came from.
+        """
+        rows = self.store.lookup(metric, periods, scope)
+        if not rows:
+            return json.dumps({"metric": resolve_metric(metric), "results": [], "available": self.store.metrics()})
+        return json.dumps(
+            [
+                {
+                    "metric": row["metric"],
+                    "period": row["period"],
+                    "scope": row["scope"],
+                    "value": _format_value(row),
+                    "change_pct": row["change_pct"],
+                    "source": f"{row['source_path']} p.{row['page']}",
+                    "context": row["context"],
+                }
+                for row in rows
+            ]
+        )
+
+    def list_kpis(self) -> str:
+        """Use this function to list which KPIs and periods are available for lookup_kpi.
+
+        Returns:
+            str: JSON object mapping each metric to its available periods.
+        """
+        return json.dumps(self.store.metrics())
@@ -1,77 +1,205 @@
-import os
-import boto3
-from agno.agent import Agent
-from agno.knowledge.knowledge import Knowledge
-from agno.knowledge.reader.pdf_reader import PDFReader
-from agno.models.aws import AwsBedrock
-from agno.team import Team
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.exa import ExaTools
-from agno.vectordb.chroma import ChromaDb
-from agno.knowledge.embedder.huggingface import HuggingfaceCustomEmbedder
-from agno.skills import Skills, LocalSkills
-
-# Initialize Boto3 session
-session = boto3.Session(
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
-    region_name="us-east-1"
-)
-
-# Clean base model (NO skills parameter for AwsBedrock)
-model_base = AwsBedrock(
-    id="anthropic.claude-3-sonnet-20240229-v1:0",#"anthropic.claude-3-5-sonnet-20241022-v2:0",
-    session=session
-)
-
+"""Safaricom CFO team.
 
+Nothing heavy happens at import time: the boto3 session, Bedrock model,
+embedder, knowledge base, agents and team are built by memoized factories the
+first time they are used. The historical module attributes (`knowledge`,
+`model_base`, `safaricom_finance_team`, ...) still work and resolve lazily.
+"""
 import os
-import shutil
+from functools import lru_cache
 from pathlib import Path
-from agno.knowledge.knowledge import Knowledge
-from agno.knowledge.reader.pdf_reader import PDFReader
-from agno.vectordb.chroma import ChromaDb
-from agno.knowledge.embedder.huggingface import HuggingfaceCustomEmbedder
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
-print("🔍 CHECKING PDF SETUP...")
-pdf_path = Path("finance_data/safaricom_docs")
-print(f"📁 Folder: {pdf_path.exists()}")
-print(f"📄 PDFs: {[f for f in pdf_path.iterdir() if f.suffix.lower() == '.pdf']}")
+if TYPE_CHECKING:
+    from agno.agent import Agent
+    from agno.knowledge.knowledge import Knowledge
+    from agno.models.base import Model
+    from agno.skills import Skills
+    from agno.team import Team
 
-# CRITICAL: Force permissions + clear
+    from kpi_store import KPITools
+
+pdf_path = Path("finance_data/safaricom_docs")
 db_path = Path("./chroma_db")
-if db_path.exists():
-    shutil.rmtree(db_path)
-    print("🗑️ Cleared old DB")
-
-# TRY SIMPLEST EMBEDDER FIRST (no download)
-print("🚀 Creating Knowledge...")
-try:
-    knowledge = Knowledge(
-        vector_db=ChromaDb(
-            name="safaricom_finance_team",
-            path="./chroma_db",
-            embedder=HuggingfaceCustomEmbedder(
-                id="sentence-transformers/all-MiniLM-L6-v2"  # Smaller, faster
-            ),
+
+
+@lru_cache(maxsize=None)
+def get_session():
+    """Boto3 session shared by every Bedrock model."""
+    import boto3
+
+    return boto3.Session(
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        aws_session_token=os.getenv("AWS_SESSION_TOKEN"),
+        region_name="us-east-1"
+    )
+
+
+@lru_cache(maxsize=None)
+def get_bedrock_manager():
+    """Pooled, rate-limited bedrock-runtime client shared by every agent (see bedrock_pool).
+
+    BEDROCK_MAX_CONNECTIONS sizes the connection pool, BEDROCK_RPM and
+    BEDROCK_TPM cap requests and tokens per minute per model (0 = unlimited),
+    and BEDROCK_ENDPOINT_URL points the client at a local stub.
+    """
+    from bedrock_pool import BedrockClientManager
+
+    return BedrockClientManager(
+        get_session(),
+        max_pool_connections=int(os.getenv("BEDROCK_MAX_CONNECTIONS", "50")),
+        requests_per_minute=float(os.getenv("BEDROCK_RPM", "0")),
+        tokens_per_minute=float(os.getenv("BEDROCK_TPM", "0")),
+        endpoint_url=os.getenv("BEDROCK_ENDPOINT_URL") or None,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_model() -> "Model":
+    """Clean base model (NO skills parameter for AwsBedrock).
+
+    MODEL_CACHE_MODE=record stores Bedrock responses and replays exact repeats,
+    replay never calls Bedrock (unrecorded requests fail), and passthrough (the
+    default) uses Bedrock directly. See model_cache.RecordReplayModel.
+    """
+    from bedrock_pool import PooledAwsBedrock
+
+    # Sync and async (arun) calls both go through the pooled, rate-limited client
+    model = PooledAwsBedrock(
+        id="anthropic.claude-3-sonnet-20240229-v1:0",#"anthropic.claude-3-5-sonnet-20241022-v2:0",
+        session=get_session(),
+        client=get_bedrock_manager().client,
+    )
+    mode = os.getenv("MODEL_CACHE_MODE", "passthrough")
+    if mode == "passthrough":
+        return model
+
+    from model_cache import RecordReplayModel
+
+    cache_path = os.getenv("MODEL_CACHE_PATH", "./model_cache/responses.sqlite3")
+    print(f"📼 Model cache: {mode} ({cache_path})")
+    return RecordReplayModel(model=model, mode=mode, cache_path=cache_path)
+
+
+@lru_cache(maxsize=None)
+def get_embedder():
+    """Disk-cached, batched MiniLM embedder: repeated chunks and questions skip the model."""
+    from agno.knowledge.embedder.huggingface import HuggingfaceCustomEmbedder
+    from embedding_cache import CachedEmbedder
+
+    return CachedEmbedder(
+        embedder=HuggingfaceCustomEmbedder(
+            id="sentence-transformers/all-MiniLM-L6-v2"  # Smaller, faster
         ),
-        readers=[PDFReader(path=str(pdf_path), chunk=True)],
     )
-    print("✅ Knowledge CREATED")
-    
-    # IMMEDIATE VERIFICATION
-    from chromadb import PersistentClient
-    client = PersistentClient(path="./chroma_db")
-    collection = client.get_or_create_collection("safaricom_finance_team")
-    count = collection.count()
-    print(f"✅ CHROMADB LIVE: {count} chunks indexed!")
-    print(f"📂 DB files: {list(Path('./chroma_db').iterdir())}")
-    
-except Exception as e:
-    print(f"❌ Knowledge FAILED: {e}")
-    print("💡 Fix: Run `pip install chromadb sentence-transformers torch`")
-    raise
+
+
+@lru_cache(maxsize=None)
+def get_knowledge() -> "Knowledge":
+    """Build the knowledge base and incrementally ingest new/changed PDFs."""
+    from agno.knowledge.knowledge import Knowledge
+    from agno.knowledge.reader.pdf_reader import PDFReader
+    from hybrid_search import HybridChromaDb
+    from section_chunker import SectionChunker
+    from sharded_knowledge import ShardedVectorDb, ShardRouter, shard_collection_name, sync_shards
+
+    print("🔍 CHECKING PDF SETUP...")
+    print(f"📁 Folder: {pdf_path.exists()}")
+    print(f"📄 PDFs: {sorted(f.name for f in pdf_path.rglob('*.pdf'))}")
+
+    print("🚀 Creating Knowledge...")
+    try:
+        # One collection per entity or document family (Safaricom, peers, regulators);
+        # each query searches only the shards the router picks, in parallel
+        router = ShardRouter()
+        shards = {
+            name: HybridChromaDb(  # BM25 + vector search fused with RRF; exact tokens like "FY25" or "KES 95B" match
+                name=shard_collection_name("safaricom_finance_team", name),
+                path=str(db_path),
+                persistent_client=True,  # vectors survive restarts; ingestion is incremental
+                embedder=get_embedder(),
+            )
+            for name in router.names
+        }
+        knowledge = Knowledge(
+            vector_db=ShardedVectorDb(shards, router),
+            readers=[PDFReader(path=str(pdf_path), chunk=True)],
+            max_results=int(os.getenv("KNOWLEDGE_MAX_RESULTS", "5")),
+        )
+        print("✅ Knowledge CREATED")
+
+        # Only new/changed PDFs are parsed and embedded, each into its shard; see ingest_manifest.json.
+        # Chunks follow headings and tables and carry category/fiscal_year/period/page/section metadata
+        ingest_summary = sync_shards(
+            knowledge, pdf_path, chunker=SectionChunker(chunk_size=int(os.getenv("CHUNK_SIZE", "1500")))
+        )
+        print(
+            f"📥 Ingestion: added={len(ingest_summary['added'])} updated={len(ingest_summary['updated'])} "
+            f"removed={len(ingest_summary['removed'])} unchanged={len(ingest_summary['unchanged'])} "
+            f"({ingest_summary['pages']} pages @ {ingest_summary['pages_per_sec']:.1f} pages/sec)"
+        )
+        if ingest_summary["failed"]:
+            print(f"⚠️ Not indexed, retried on next start: {', '.join(ingest_summary['failed'])}")
+        print(f"✅ CHROMADB LIVE: {knowledge.vector_db.get_count()} chunks indexed!")
+        print(f"🗂️ Shards: {', '.join(f'{name}={count}' for name, count in ingest_summary['shards'].items())}")
+        print(f"🔤 BM25 index: {sum(len(shard.lexical_index) for shard in shards.values())} chunks")
+    except Exception as e:
+        print(f"❌ Knowledge FAILED: {e}")
+        print("💡 Fix: Run `pip install chromadb sentence-transformers torch`")
+        raise
+    return knowledge
+
+
+@lru_cache(maxsize=None)
+def get_kpi_tools() -> "KPITools":
+    """KPI figures extracted from the PDFs into SQLite, for numeric lookups without a model call."""
+    from kpi_store import STORE_NAME, KPIStore, KPITools, sync_kpis
+
+    store = KPIStore(str(db_path / STORE_NAME))
+    kpi_summary = sync_kpis(store, pdf_path)
+    print(
+        f"📊 KPI store: extracted={len(kpi_summary['extracted'])} removed={len(kpi_summary['removed'])} "
+        f"unchanged={len(kpi_summary['unchanged'])} ({len(store.metrics())} metrics)"
+    )
+    if kpi_summary["failed"]:
+        print(f"⚠️ No KPIs from unreadable PDFs, retried on next start: {', '.join(kpi_summary['failed'])}")
+    return KPITools(store)
+
+
+@lru_cache(maxsize=None)
+def get_document_search_tools():
+    """Knowledge base search pre-filtered by category, fiscal year, period, section or pages."""
+    from section_chunker import DocumentSearchTools
+
+    return DocumentSearchTools(get_knowledge())
+
+
+@lru_cache(maxsize=None)
+def get_search_cache():
+    """Web search results shared by every agent, persisted for SEARCH_CACHE_TTL seconds (see search_cache)."""
+    from search_cache import SearchCache
+
+    return SearchCache(
+        cache_path=os.getenv("SEARCH_CACHE_PATH", "./search_cache/results.sqlite3"),
+        ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600))),
+    )
+
+
+def duckduckgo_tools():
+    """DuckDuckGo search with results cached and concurrent duplicate queries coalesced."""
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    from search_cache import with_search_cache
+
+    return with_search_cache(DuckDuckGoTools(), get_search_cache())
+
+
+def exa_tools():
+    """Exa search with results cached and concurrent duplicate queries coalesced."""
+    from agno.tools.exa import ExaTools
+    from search_cache import with_search_cache
+
+    return with_search_cache(ExaTools(), get_search_cache())
 
 # Knowledge base setup
 # knowledge = Knowledge(
@@ -85,149 +213,304 @@ except Exception as e:
 #     readers=[PDFReader(path="finance_data/safaricom_docs", chunk=True)],
 # )
 
-# Shared Safaricom skills (loaded per-agent as needed)
-def safaricom_skills(role_specific_folders=None):
+# Shared Safaricom skills (parsed once per process, see skill_registry.py)
+BASE_SKILL_FOLDERS = [
+    "./skills/financial-metrics",
+    "./skills/mpesa-financial-services", 
+    "./skills/safaricom-telco-expertise",
+]
+
+# Role-specific skill folders, validated up front by check_skill_folders()
+AGENT_SKILL_FOLDERS: Dict[str, List[str]] = {
+    "ai_innovation_officer": ["./skills/safaricom-ai-innovation"],
+    "financial_reporting_agent": ["./skills/financial-reporting"],  # Add this folder if needed
+    "business_case_agent": ["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"],
+    "budget_planning_agent": ["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"],
+    "treasury_agent": ["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"],
+    "financial_analyst_agent": ["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"],
+}
+
+
+@lru_cache(maxsize=None)
+def check_skill_folders() -> Dict[str, List[str]]:
+    """Validate every configured skill folder once, before any agent is built."""
+    from skill_registry import get_skill_registry
+
+    folders = BASE_SKILL_FOLDERS + [f for role in AGENT_SKILL_FOLDERS.values() for f in role]
+    problems = get_skill_registry().validate(folders)
+    for folder, errors in problems.items():
+        print(f"⚠️ Skill folder {folder} skipped: {'; '.join(errors)}")
+    return problems
+
+
+def safaricom_skills(role_specific_folders=None) -> "Skills":
     """Helper to create role-specific skills"""
-    base_folders = [
-        "./skills/financial-metrics",
-        "./skills/mpesa-financial-services", 
-        "./skills/safaricom-telco-expertise",
-    ]
+    from skill_registry import get_skill_registry
+
+    problems = check_skill_folders()
+    base_folders = list(BASE_SKILL_FOLDERS)
     if role_specific_folders:
         base_folders.extend(role_specific_folders)
-    return Skills(loaders=[LocalSkills(folder) for folder in base_folders])
-
-# AI & Innovation Officer
-ai_innovation_officer = Agent(
-    name="AI & Innovation Officer",
-    role="AI Strategy & Innovation",
-    model=model_base,
-    skills=safaricom_skills(["./skills/safaricom-ai-innovation"]),
-    tools=[ExaTools(), DuckDuckGoTools()],
-    knowledge=knowledge,
-    instructions=[
-        "You are the AI & Innovation Officer at Safaricom, responsible for driving AI strategy and innovation across finance and operations.",
-        "Key Responsibilities: Identify AI/ML opportunities, develop fraud detection solutions, lead M-PESA innovation, ensure ethical AI.",
-        "Document Creation: Use get_skill_instructions('pptx') for presentations, get_skill_instructions('xlsx') for ROI models, get_skill_instructions('docx') for strategy papers.",
-        "Focus on M-PESA fraud detection, Ethiopia market intelligence, and finance automation.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# Financial Reporting Lead
-financial_reporting_agent = Agent(
-    name="Financial Reporting Lead",
-    role="Financial Reporting & Compliance",
-    model=model_base,
-    skills=safaricom_skills(["./skills/financial-reporting"]),  # Add this folder if needed
-    knowledge=knowledge,
-    tools=[ExaTools()],
-    instructions=[
-        "You are the Financial Reporting Lead at Safaricom, responsible for accurate financial reporting per IFRS.",
-        "Handle quarterly/annual statements, audit coordination, NSE compliance, M-PESA revenue recognition.",
-        "Document Creation: Use get_skill_instructions('xlsx') for financial statements, get_skill_instructions('pptx') for board presentations.",
-        "Segments: Mobile, M-PESA, Fixed, Enterprise. Track EBITDA, capex, Ethiopia consolidation.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# Business Case Analyst
-business_case_agent = Agent(
-    name="Business Case Analyst",
-    role="Business Case Development & Evaluation",
-    model=model_base,
-        skills=safaricom_skills(["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"]),
-    knowledge=knowledge,
-    tools=[DuckDuckGoTools(), ExaTools()],
-    instructions=[
-        "You are the Business Case Analyst at Safaricom, evaluating investments and strategic initiatives.",
-        "Develop NPV/IRR models, assess M-PESA expansion, Ethiopia 5G rollout, enterprise growth.",
-        "Document Creation: Use get_skill_instructions('xlsx') for financial models with sensitivity analysis, get_skill_instructions('pptx') for executive presentations.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# Budget Planning Manager
-budget_planning_agent = Agent(
-    name="Budget Planning Manager",
-    role="Budgeting & Financial Planning",
-    model=model_base,
-    skills=safaricom_skills(["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"]),
-    knowledge=knowledge,
-    tools=[],
-    instructions=[
-        "You are the Budget Planning Manager at Safaricom, leading annual budgeting and forecasting.",
-        "Handle revenue/opex/capex allocation across Kenya/Ethiopia, variance analysis.",
-        "Document Creation: Use get_skill_instructions('xlsx') for budget templates with pivots, get_skill_instructions('pptx') for reviews.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# Treasury Manager
-treasury_agent = Agent(
-    name="Treasury Manager",
-    role="Treasury & Cash Management",
-    model=model_base,
-    skills=safaricom_skills(["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"]),
-    knowledge=knowledge,
-    tools=[DuckDuckGoTools()],
-    instructions=[
-        "You are the Treasury Manager at Safaricom, managing liquidity, M-PESA float, currency risks.",
-        "Forecast cash flows, manage KES/USD/ETB exposure, dividend payments.",
-        "Document Creation: Use get_skill_instructions('xlsx') for cash flow forecasts, get_skill_instructions('pptx') for treasury reports.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# Senior Financial Analyst
-financial_analyst_agent = Agent(
-    name="Senior Financial Analyst",
-    role="Financial Analysis & Strategic Insights",
-    model=model_base,
-    skills=safaricom_skills(["./skills/financial-metrics","./skills/mpesa-financial-services","./skills/safaricom-telco-expertise"]),
-    knowledge=knowledge,
-    tools=[DuckDuckGoTools(), ExaTools()],
-    instructions=[
-        "You are the Senior Financial Analyst at Safaricom, providing data-driven strategic insights.",
-        "Analyze KPIs (ARPU, churn, EBITDA), competitive benchmarking, Ethiopia performance.",
-        "Document Creation: Use get_skill_instructions('xlsx') for KPI dashboards, get_skill_instructions('pptx') for strategy decks.",
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-)
-
-# CFO Team
-safaricom_finance_team = Team(
-    name="Chief Financial Officer",
-    model=model_base,
-    instructions=[
-        "You are the CFO of Safaricom PLC. Delegate tasks to specialized offices:",
-        "- Reporting/Compliance → Financial Reporting Lead",
-        "- Business cases/Investments → Business Case Analyst",
-        "- Budgeting/Forecasting → Budget Planning Manager", 
-        "- Cash/Liquidity → Treasury Manager",
-        "- Analysis/Insights → Senior Financial Analyst",
-        "- AI/Innovation → AI & Innovation Officer",
-        "Maintain financial discipline and strategic focus on Ethiopia, M-PESA, 5G.",
-    ],
-    members=[
-        financial_reporting_agent,
-        business_case_agent,
-        budget_planning_agent,
-        treasury_agent,
-        financial_analyst_agent,
-        ai_innovation_officer,
-    ],
-    add_datetime_to_context=True,
-    markdown=True,
-    debug_mode=True,
-    show_members_responses=True,
-)
+    return get_skill_registry().skills(folder for folder in base_folders if folder not in problems)
+
+
+def build_ai_innovation_officer() -> "Agent":
+    """AI & Innovation Officer"""
+    from agno.agent import Agent
+    from transaction_anomaly import AnomalyTools
+
+    return Agent(
+        name="AI & Innovation Officer",
+        role="AI Strategy & Innovation",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["ai_innovation_officer"]),
+        tools=[AnomalyTools(), get_document_search_tools(), exa_tools(), duckduckgo_tools()],
+        knowledge=get_knowledge(),
+        instructions=[
+            "You are the AI & Innovation Officer at Safaricom, responsible for driving AI strategy and innovation across finance and operations.",
+            "Key Responsibilities: Identify AI/ML opportunities, develop fraud detection solutions, lead M-PESA innovation, ensure ethical AI.",
+            "Document Creation: Use get_skill_instructions('pptx') for presentations, get_skill_instructions('xlsx') for ROI models, get_skill_instructions('docx') for strategy papers.",
+            "Focus on M-PESA fraud detection, Ethiopia market intelligence, and finance automation.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+def build_financial_reporting_agent() -> "Agent":
+    """Financial Reporting Lead"""
+    from agno.agent import Agent
+
+    return Agent(
+        name="Financial Reporting Lead",
+        role="Financial Reporting & Compliance",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["financial_reporting_agent"]),
+        knowledge=get_knowledge(),
+        tools=[get_kpi_tools(), get_document_search_tools(), exa_tools()],
+        instructions=[
+            "You are the Financial Reporting Lead at Safaricom, responsible for accurate financial reporting per IFRS.",
+            "Handle quarterly/annual statements, audit coordination, NSE compliance, M-PESA revenue recognition.",
+            "Document Creation: Use get_skill_instructions('xlsx') for financial statements, get_skill_instructions('pptx') for board presentations.",
+            "Segments: Mobile, M-PESA, Fixed, Enterprise. Track EBITDA, capex, Ethiopia consolidation.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+def build_business_case_agent() -> "Agent":
+    """Business Case Analyst"""
+    from agno.agent import Agent
+    from valuation_tools import ValuationTools
+
+    return Agent(
+        name="Business Case Analyst",
+        role="Business Case Development & Evaluation",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["business_case_agent"]),
+        knowledge=get_knowledge(),
+        tools=[ValuationTools(), get_document_search_tools(), duckduckgo_tools(), exa_tools()],
+        instructions=[
+            "You are the Business Case Analyst at Safaricom, evaluating investments and strategic initiatives.",
+            "Develop NPV/IRR models, assess M-PESA expansion, Ethiopia 5G rollout, enterprise growth.",
+            "Document Creation: Use get_skill_instructions('xlsx') for financial models with sensitivity analysis, get_skill_instructions('pptx') for executive presentations.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+def build_budget_planning_agent() -> "Agent":
+    """Budget Planning Manager"""
+    from agno.agent import Agent
+    from variance_engine import VarianceTools
+
+    return Agent(
+        name="Budget Planning Manager",
+        role="Budgeting & Financial Planning",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["budget_planning_agent"]),
+        knowledge=get_knowledge(),
+        tools=[VarianceTools(), get_document_search_tools()],
+        instructions=[
+            "You are the Budget Planning Manager at Safaricom, leading annual budgeting and forecasting.",
+            "Handle revenue/opex/capex allocation across Kenya/Ethiopia, variance analysis.",
+            "Document Creation: Use get_skill_instructions('xlsx') for budget templates with pivots, get_skill_instructions('pptx') for reviews.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+def build_treasury_agent() -> "Agent":
+    """Treasury Manager"""
+    from agno.agent import Agent
+    from treasury_simulation import TreasuryTools
+
+    return Agent(
+        name="Treasury Manager",
+        role="Treasury & Cash Management",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["treasury_agent"]),
+        knowledge=get_knowledge(),
+        tools=[TreasuryTools(), get_document_search_tools(), duckduckgo_tools()],
+        instructions=[
+            "You are the Treasury Manager at Safaricom, managing liquidity, M-PESA float, currency risks.",
+            "Forecast cash flows, manage KES/USD/ETB exposure, dividend payments.",
+            "Document Creation: Use get_skill_instructions('xlsx') for cash flow forecasts, get_skill_instructions('pptx') for treasury reports.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+def build_financial_analyst_agent() -> "Agent":
+    """Senior Financial Analyst"""
+    from agno.agent import Agent
+
+    return Agent(
+        name="Senior Financial Analyst",
+        role="Financial Analysis & Strategic Insights",
+        model=get_model(),
+        skills=safaricom_skills(AGENT_SKILL_FOLDERS["financial_analyst_agent"]),
+        knowledge=get_knowledge(),
+        tools=[get_kpi_tools(), get_document_search_tools(), duckduckgo_tools(), exa_tools()],
+        instructions=[
+            "You are the Senior Financial Analyst at Safaricom, providing data-driven strategic insights.",
+            "Analyze KPIs (ARPU, churn, EBITDA), competitive benchmarking, Ethiopia performance.",
+            "Document Creation: Use get_skill_instructions('xlsx') for KPI dashboards, get_skill_instructions('pptx') for strategy decks.",
+        ],
+        add_datetime_to_context=True,
+        markdown=True,
+    )
+
+
+# Agent registry, in the order the CFO team lists its members
+AGENT_BUILDERS: Dict[str, Callable[[], "Agent"]] = {
+    "financial_reporting_agent": build_financial_reporting_agent,
+    "business_case_agent": build_business_case_agent,
+    "budget_planning_agent": build_budget_planning_agent,
+    "treasury_agent": build_treasury_agent,
+    "financial_analyst_agent": build_financial_analyst_agent,
+    "ai_innovation_officer": build_ai_innovation_officer,
+}
+
+
+@lru_cache(maxsize=None)
+def get_agent(name: str) -> "Agent":
+    """Build an agent from AGENT_BUILDERS on first use and reuse it afterwards."""
+    if name not in AGENT_BUILDERS:
+        raise KeyError(f"Unknown agent '{name}', expected one of {sorted(AGENT_BUILDERS)}")
+    return AGENT_BUILDERS[name]()
+
+
+def build_team(members: Optional[List["Agent"]] = None) -> "Team":
+    """CFO Team over `members`; by default the shared agents from get_agent()."""
+    from agno.team import Team
+    from delegation import ParallelDelegationTools
+
+    if members is None:
+        members = [get_agent(name) for name in AGENT_BUILDERS]
+    return Team(
+        name="Chief Financial Officer",
+        model=get_model(),
+        instructions=[
+            "You are the CFO of Safaricom PLC. Delegate tasks to specialized offices:",
+            "- Reporting/Compliance → Financial Reporting Lead",
+            "- Business cases/Investments → Business Case Analyst",
+            "- Budgeting/Forecasting → Budget Planning Manager", 
+            "- Cash/Liquidity → Treasury Manager",
+            "- Analysis/Insights → Senior Financial Analyst",
+            "- AI/Innovation → AI & Innovation Officer",
+            "Maintain financial discipline and strategic focus on Ethiopia, M-PESA, 5G.",
+        ],
+        members=members,
+        # Independent subtasks fan out to several members at once (CFO_MAX_PARALLEL_MEMBERS caps it)
+        tools=[ParallelDelegationTools(members, max_concurrency=int(os.getenv("CFO_MAX_PARALLEL_MEMBERS", "3")))],
+        add_datetime_to_context=True,
+        markdown=True,
+        debug_mode=True,
+        show_members_responses=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_team() -> "Team":
+    """CFO Team"""
+    return build_team()
+
+
+def build_independent_team() -> "Team":
+    """A CFO team with its own member agents, for running several requests at once (see batch_runner.py)."""
+    return build_team([builder() for builder in AGENT_BUILDERS.values()])
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """Semantic cache in front of the CFO team, invalidated when the indexed PDFs of any shard change."""
+    from response_cache import SemanticResponseCache
+
+    return SemanticResponseCache(
+        embedder=get_embedder(),
+        threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+        knowledge_version=lambda: get_knowledge().vector_db.fingerprint(),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_tracer():
+    """Span tracer for Team/Agent/tool/retrieval/model calls, enabled by TRACE_DIR (None when unset)."""
+    trace_dir = os.getenv("TRACE_DIR")
+    if not trace_dir:
+        return None
+    from tracing import Tracer, instrument
+
+    formats = [f.strip() for f in os.getenv("TRACE_FORMATS", "jsonl").split(",") if f.strip()]
+    print(f"🧭 Tracing to {trace_dir} ({', '.join(formats)})")
+    return instrument(Tracer(directory=trace_dir, formats=formats))
+
+
+def run_team(prompt: str, **kwargs):
+    """Run the CFO team, answering near-identical repeat questions from the response cache."""
+    from response_cache import cached_run
+
+    tracer = get_tracer()
+    if tracer is None:
+        return cached_run(get_team(), prompt, get_response_cache(), **kwargs)
+
+    from tracing import summarize
+
+    with tracer.span("run_team", "request", input_bytes=len(prompt)):
+        response = cached_run(get_team(), prompt, get_response_cache(), **kwargs)
+    print(summarize(tracer.last_trace))
+    return response
+
+
+def stream_team(prompt: str, **kwargs):
+    """Stream the CFO team's answer as leader/member tokens and tool events (see team_stream.TeamStream)."""
+    from team_stream import TeamStream
+
+    return TeamStream(get_team(), prompt, cache=get_response_cache(), tracer=get_tracer(), **kwargs)
+
+
+# Backwards-compatible module attributes, resolved on first access (PEP 562)
+_LAZY_ATTRIBUTES: Dict[str, Callable[[], object]] = {
+    "session": get_session,
+    "model_base": get_model,
+    "knowledge": get_knowledge,
+    "safaricom_finance_team": get_team,
+    **{name: (lambda name=name: get_agent(name)) for name in AGENT_BUILDERS},
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # File download helper (adapt as needed)
 def download_files_from_response(response):
@@ -236,28 +519,33 @@ def download_files_from_response(response):
     print(f"Response summary: {response.content[:200]}...")
     return []
 
-if __name__ == "__main__":
-    # Test the full team
-    print("\n" + "="*80)
-    print("Q4 2025 Financial Report Package")
-    print("="*80)
-    response1 = safaricom_finance_team.run(
-        """Create Q4 2025 financial report package:
+# Example team prompts, also replayed by benchmarks/pipeline.py
+EXAMPLE_PROMPTS: Dict[str, str] = {
+    "Q4 2025 Financial Report Package": """Create Q4 2025 financial report package:
         1. EXCEL: Revenue Mobile KES 180B, M-PESA KES 95B, EBITDA KES 150B (50% margin)
         2. POWERPOINT: Executive summary, financial highlights, segment comparison
-        3. WORD: IFRS 15 notes for M-PESA"""
-    )
-    download_files_from_response(response1)
-    
-    print("\n" + "="*80)
-    print("Ethiopia 5G Business Case")
-    print("="*80)
-    response2 = safaricom_finance_team.run(
-        """Ethiopia 5G business case:
+        3. WORD: IFRS 15 notes for M-PESA""",
+    "Ethiopia 5G Business Case": """Ethiopia 5G business case:
         1. EXCEL: 5yr projections, Year1 revenue USD 50M (40% growth), Capex USD 200M, NPV/IRR
-        2. POWERPOINT: Market opportunity, financials, risks, recommendation"""
-    )
-    download_files_from_response(response2)
+        2. POWERPOINT: Market opportunity, financials, risks, recommendation""",
+}
+
+
+if __name__ == "__main__":
+    # Test the full team
+    for title, prompt in EXAMPLE_PROMPTS.items():
+        print("\n" + "="*80)
+        print(title)
+        print("="*80)
+        response = run_team(prompt)
+        download_files_from_response(response)
+    print(f"🗄️ Response cache: {get_response_cache().stats()}")
+    print(f"🔎 Search cache: {get_search_cache().stats()}")
+
+    from bedrock_pool import format_metrics
+
+    for line in format_metrics(get_bedrock_manager().metrics()):
+        print(line)
 
 
 # from agno.agent import Agent
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+from pydantic import BaseModel
+
+MODES = ("record", "replay", "passthrough")
+
+# Parts of a prompt that change on every run without changing the question
+VOLATILE_PATTERNS: Tuple[str, ...] = (
+    # add_datetime_to_context=True puts "The current time is 2025-11-03 14:02:11.482913." in every system message
+    r"The current time is \d{4}-\d{2}-\d{2}[ T][0-9:.+\-]*",
+)
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _message_data(message: Any) -> Dict[str, Any]:
+    return {
+        "role": message.role,
+        "content": message.content,
+        "name": getattr(message, "name", None),
+        "tool_calls": message.tool_calls,
+        "tool_call_id": message.tool_call_id,
+    }
+
+
+def _response_format_data(response_format: Any) -> Any:
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        return response_format.model_json_schema()
+    return response_format
+
+
+def request_key(
+    model_id: str,
+    messages: List[Any],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    response_format: Any = None,
+    tool_choice: Any = None,
+    stream: bool = False,
+    volatile_patterns: Tuple[str, ...] = VOLATILE_PATTERNS,
+) -> str:
+    """
+    Canonical hash of one model request.
+
+    Messages (role, content, tool calls and tool call ids), the tool definitions,
+    the response format, tool choice and model id are serialized as sorted-key
+    JSON, with volatile fragments such as the current time masked out.
+
+    Args:
+        model_id: Id of the wrapped model
+        messages: Messages sent to the model
+        tools: Tool definitions offered to the model
+        response_format: Structured output format, if any
+        tool_choice: Tool choice, if any
+        stream: Whether the response is streamed (streams are recorded separately)
+        volatile_patterns: Regexes replaced with a placeholder before hashing
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        {
+            "model_id": model_id,
+            "messages": [_message_data(message) for message in messages],
+            "tools": tools or [],
+            "response_format": _response_format_data(response_format),
+            "tool_choice": tool_choice,
+            "stream": stream,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    for pattern in volatile_patterns:
+        payload = re.sub(pattern, "<volatile>", payload)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _dump(response: ModelResponse) -> Dict[str, Any]:
+    data = response.to_dict()
+    # Metrics carry a live timer object; keep only the token counts
+    data["response_usage"] = response.response_usage.to_dict() if response.response_usage is not None else None
+    return data
+
+
+def _load(data: Dict[str, Any]) -> ModelResponse:
+    return ModelResponse.from_dict(dict(data))
+
+
+@dataclass
+class RecordReplayModel(Model):
+    """
+    Model wrapper that records responses to SQLite and replays exact repeats.
+
+    Every invoke is keyed by request_key (messages, tools, response format and
+    model id). In "record" mode a recorded response is replayed and anything new
+    is sent to the wrapped model and stored; "replay" never calls the wrapped
+    model and raises ReplayMissError for unrecorded requests; "passthrough"
+    calls the wrapped model and stores nothing. Tool calls still execute for
+    real: only the model round-trips are replayed.
+
+    Args:
+        model: The model that actually answers (e.g. AwsBedrock)
+        mode: "record", "replay" or "passthrough"
+        cache_path: SQLite file holding the recorded responses
+    """
+
+    model: Optional[Model] = None
+    mode: str = "record"
+    cache_path: str = "./model_cache/responses.sqlite3"
+    volatile_patterns: Tuple[str, ...] = VOLATILE_PATTERNS
+    id: str = ""
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _conn: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.model is None:
+            raise ValueError("RecordReplayModel requires a model to wrap")
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got '{self.mode}'")
+        self.id = self.model.id
+        self.name = self.model.name
+        self.provider = self.model.provider
+        self.supports_native_structured_outputs = self.model.supports_native_structured_outputs
+        self.supports_json_schema_outputs = self.model.supports_json_schema_outputs
+        self.assistant_message_role = self.model.assistant_message_role
+        self.tool_message_role = self.model.tool_message_role
+        super().__post_init__()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "request_hash TEXT PRIMARY KEY, model_id TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _key(self, kwargs: Dict[str, Any], stream: bool) -> str:
+        return request_key(
+            self.id,
+            kwargs["messages"],
+            tools=kwargs.get("tools"),
+            response_format=kwargs.get("response_format"),
+            tool_choice=kwargs.get("tool_choice"),
+            stream=stream,
+            volatile_patterns=self.volatile_patterns,
+        )
+
+    def _lookup(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE request_hash = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise ReplayMissError(f"No recorded response for request {key[:12]}; run once with mode='record'")
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _store(self, key: str, responses: List[ModelResponse]) -> None:
+        payload = json.dumps([_dump(response) for response in responses], default=str)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (request_hash, model_id, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, self.id, payload, time.time()),
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _replayed(assistant_message: Any) -> None:
+        # Replays take no model time, but agno expects the timer to have run
+        assistant_message.metrics.start_timer()
+        assistant_message.metrics.stop_timer()
+
+    def invoke(self, **kwargs) -> ModelResponse:
+        if self.mode == "passthrough":
+            return self.model.invoke(**kwargs)
+        key = self._key(kwargs, stream=False)
+        recorded = self._lookup(key)
+        if recorded is not None:
+            self._replayed(kwargs["assistant_message"])
+            return _load(recorded[0])
+        response = self.model.invoke(**kwargs)
+        self._store(key, [response])
+        return response
+
+    async def ainvoke(self, **kwargs) -> ModelResponse:
+        if self.mode == "passthrough":
+            return await self.model.ainvoke(**kwargs)
+        key = self._key(kwargs, stream=False)
+        recorded = self._lookup(key)
+        if recorded is not None:
+            self._replayed(kwargs["assistant_message"])
+            return _load(recorded[0])
+        response = await self.model.ainvoke(**kwargs)
+        self._store(key, [response])
+        return response
+
+    def invoke_stream(self, **kwargs) -> Iterator[ModelResponse]:
+        if self.mode == "passthrough":
+            yield from self.model.invoke_stream(**kwargs)
+            return
+        key = self._key(kwargs, stream=True)
+        recorded = self._lookup(key)
+        if recorded is not None:
+            self._replayed(kwargs["assistant_message"])
+            for data in recorded:
+                yield _load(data)
+            return
+        deltas = []
+        for delta in self.model.invoke_stream(**kwargs):
+            deltas.append(delta)
+            yield delta
+        self._store(key, deltas)
+
+    async def ainvoke_stream(self, **kwargs) -> AsyncIterator[ModelResponse]:
+        if self.mode == "passthrough":
+            async for delta in self.model.ainvoke_stream(**kwargs):
+                yield delta
+            return
+        key = self._key(kwargs, stream=True)
+        recorded = self._lookup(key)
+        if recorded is not None:
+            self._replayed(kwargs["assistant_message"])
+            for data in recorded:
+                yield _load(data)
+            return
+        deltas = []
+        async for delta in self.model.ainvoke_stream(**kwargs):
+            deltas.append(delta)
+            yield delta
+        self._store(key, deltas)
+
+    # Provider-specific behaviour stays with the wrapped model
+    def format_function_call_results(self, *args, **kwargs) -> None:
+        return self.model.format_function_call_results(*args, **kwargs)
+
+    def get_system_message_for_model(self, tools: Optional[List[Any]] = None) -> Optional[str]:
+        return self.model.get_system_message_for_model(tools)
+
+    def get_instructions_for_model(self, tools: Optional[List[Any]] = None) -> Optional[List[str]]:
+        return self.model.get_instructions_for_model(tools)
+
+    def _format_tools(self, tools):
+        return self.model._format_tools(tools)
+
+    def count_tokens(self, *args, **kwargs) -> int:
+        return self.model.count_tokens(*args, **kwargs)
+
+    async def acount_tokens(self, *args, **kwargs) -> int:
+        return await self.model.acount_tokens(*args, **kwargs)
+
+    def _parse_provider_response(self, response: Any, **kwargs) -> ModelResponse:
+        return self.model._parse_provider_response(response, **kwargs)
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return self.model._parse_provider_response_delta(response)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+import numpy as np
+from agno.run.base import RunStatus
+
+from embedding_cache import normalize_text
+from kpi_store import PERIOD, normalize_period
+
+PERIOD_PATTERN = re.compile(rf"\b{PERIOD}\b", re.IGNORECASE)
+# Period markers written without a year ("Q3", "first half") still change the question
+MARKER_PATTERN = re.compile(r"\b(?:H[12]|HY|Q[1-4]|FY|YTD|first half|second half|half[- ]year)\b", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+MARKERS = {"hy": "h1", "first half": "h1", "second half": "h2", "half year": "h1", "half-year": "h1"}
+
+
+def prompt_tokens(prompt: str) -> FrozenSet[str]:
+    """
+    Periods, period markers and numbers in a prompt, normalized for comparison.
+
+    "Ethiopia EBITDA in H1 FY25" and "Ethiopia EBITDA in HY'25" give the same
+    tokens; "... FY24" or "... above 20%" do not.
+
+    Args:
+        prompt: The user's request
+
+    Returns:
+        Set of tokens such as "H1 FY25", "q3" and "20"
+    """
+    tokens = set()
+    for match in PERIOD_PATTERN.finditer(prompt):
+        tokens.add(normalize_period(match.group(0)))
+    rest = PERIOD_PATTERN.sub(" ", prompt)
+    for match in MARKER_PATTERN.finditer(rest):
+        marker = match.group(0).lower()
+        tokens.add(MARKERS.get(marker, marker))
+    rest = MARKER_PATTERN.sub(" ", rest)
+    for match in NUMBER_PATTERN.finditer(rest):
+        number = match.group(0).replace(",", "")
+        tokens.add(number.rstrip("0").rstrip(".") if "." in number else number)
+    return frozenset(tokens)
+
+
+@dataclass
+class CacheEntry:
+    prompt: str
+    tokens: FrozenSet[str]
+    embedding: np.ndarray
+    response: Any
+    knowledge_version: str
+    created_at: float
+
+
+class SemanticResponseCache:
+    """
+    Returns a stored Team response for prompts that mean the same thing.
+
+    Prompts are embedded with the knowledge base embedder and compared by cosine
+    similarity against cached prompts. A hit needs similarity at or above
+    `threshold`, exactly the same periods and numbers (see prompt_tokens) and
+    the same knowledge base version the response was produced with. Entries expire after `ttl_seconds` and the least recently used entry
+    is evicted once `max_entries` is reached.
+
+    Args:
+        embedder: Embedder used for prompts (anything with get_embedding)
+        threshold: Minimum cosine similarity for a hit
+        ttl_seconds: Lifetime of a cached response
+        max_entries: Maximum number of cached responses
+        knowledge_version: Callable returning the current knowledge base version
+    """
+
+    def __init__(
+        self,
+        embedder: Any,
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600,
+        max_entries: int = 256,
+        knowledge_version: Optional[Callable[[], str]] = None,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.knowledge_version = knowledge_version or (lambda: "")
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "exact_hits": 0, "evictions": 0, "expired": 0, "stale": 0}
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(self.embedder.get_embedding(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop_invalid(self, version: str) -> None:
+        """Remove expired entries and entries built on an older knowledge base."""
+        now = time.time()
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if now - entry.created_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expired"] += 1
+            elif entry.knowledge_version != version:
+                del self._entries[key]
+                self._stats["stale"] += 1
+
+    def get(self, prompt: str) -> Optional[Any]:
+        """Return the cached response for `prompt`, or None on a miss."""
+        key = normalize_text(prompt)
+        version = self.knowledge_version()
+        with self._lock:
+            self._drop_invalid(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["exact_hits"] += 1
+                return self._entries[key].response
+            if not self._entries:
+                self._stats["misses"] += 1
+                return None
+            # Prompts that differ only in period or figure embed almost identically, so
+            # only entries asking about the same periods and numbers are candidates
+            tokens = prompt_tokens(prompt)
+            keys = [k for k, entry in self._entries.items() if entry.tokens == tokens]
+            if not keys:
+                self._stats["misses"] += 1
+                return None
+            matrix = np.stack([self._entries[k].embedding for k in keys])
+
+        embedding = self._embed(prompt)
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+
+        with self._lock:
+            entry = self._entries.get(keys[best])
+            if entry is None or scores[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(keys[best])
+            self._stats["hits"] += 1
+            return entry.response
+
+    def put(self, prompt: str, response: Any) -> None:
+        """Cache `response` for `prompt` under the current knowledge base version."""
+        entry = CacheEntry(
+            prompt=prompt,
+            tokens=prompt_tokens(prompt),
+            embedding=self._embed(prompt),
+            response=response,
+            knowledge_version=self.knowledge_version(),
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._entries[normalize_text(prompt)] = entry
+            self._entries.move_to_end(normalize_text(prompt))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
+
+
+def cacheable(run_kwargs: Dict[str, Any]) -> bool:
+    """
+    Whether a run may be answered from or stored in the shared response cache.
+
+    Runs tied to a caller's session or user are not: the cached answer came from
+    another conversation, and a cache hit would leave the turn out of the
+    caller's session history.
+    """
+    return not (run_kwargs.get("stream") or run_kwargs.get("session_id") or run_kwargs.get("user_id"))
+
+
+def is_error(response: Any) -> bool:
+    """True for a run that failed (agno puts the error text in `content` and sets status to error)."""
+    return getattr(response, "status", None) == RunStatus.error
+
+
+def cached_run(team: Any, prompt: str, cache: SemanticResponseCache, **kwargs) -> Any:
+    """
+    Run `team` on `prompt` unless a semantically equivalent prompt was answered already.
+
+    Streaming runs and runs with a session_id or user_id bypass the cache (see
+    cacheable); failed runs are never cached.
+
+    Args:
+        team: Team (or Agent) to run on a cache miss
+        prompt: The user's request
+        cache: Response cache to consult and fill
+        **kwargs: Passed through to team.run
+
+    Returns:
+        The cached or freshly produced run output
+    """
+    if not cacheable(kwargs):
+        return team.run(prompt, **kwargs)
+    response = cache.get(prompt)
+    if response is not None:
+        return response
+    response = team.run(prompt, **kwargs)
+    if getattr(response, "content", None) and not is_error(response):
+        cache.put(prompt, response)
+    return response
+
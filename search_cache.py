@@ -0,0 +1,194 @@
+import functools
+import hashlib
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Toolkit functions whose results depend only on their arguments
+CACHEABLE_TOOLS: Tuple[str, ...] = (
+    "duckduckgo_search",
+    "duckduckgo_news",
+    "search_exa",
+    "find_similar",
+    "get_contents",
+    "exa_answer",
+)
+
+# Arguments holding free-text search queries, normalized before keying
+QUERY_ARGUMENTS: Tuple[str, ...] = ("query",)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query.
+
+    Case, Unicode width, punctuation, whitespace and word order are ignored, so
+    "Safaricom Ethiopia subscribers 2025" and "safaricom subscribers (Ethiopia), 2025?"
+    share one cache entry. Decimal points, %, $ and hyphens inside words are kept.
+    """
+    text = unicodedata.normalize("NFKC", query).lower()
+    words = {word.strip(".-") for word in re.findall(r"[\w.%$-]+", text)}
+    return " ".join(sorted(word for word in words if word))
+
+
+def search_key(tool: str, arguments: Dict[str, Any]) -> str:
+    """Hash of the tool name and its arguments, with query arguments normalized."""
+    canonical = {
+        name: normalize_query(value) if name in QUERY_ARGUMENTS and isinstance(value, str) else value
+        for name, value in arguments.items()
+    }
+    payload = json.dumps({"tool": tool, "arguments": canonical}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_error(result: Any) -> bool:
+    # Exa and the repo's own toolkits report failures as "Error: ..." strings
+    return isinstance(result, str) and result.startswith("Error")
+
+
+class SearchCache:
+    """
+    TTL cache for web search results, persisted to SQLite and shared by every agent.
+
+    Results are keyed by search_key, so near-identical queries from different
+    team members hit the same entry. Concurrent calls for a key that is already
+    being fetched wait for that fetch instead of starting their own. Errors are
+    returned to every waiting caller but never stored.
+
+    Args:
+        cache_path: SQLite file holding the results
+        ttl_seconds: Lifetime of a cached result
+    """
+
+    def __init__(self, cache_path: str = "./search_cache/results.sqlite3", ttl_seconds: float = 6 * 3600):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, arguments TEXT NOT NULL, "
+                "result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _lookup(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT result, created_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def _store(self, key: str, tool: str, arguments: Dict[str, Any], result: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, tool, arguments, result, created_at) VALUES (?, ?, ?, ?, ?)",
+            (key, tool, json.dumps(arguments, sort_keys=True, default=str), result, time.time()),
+        )
+        self.conn.commit()
+
+    def fetch(self, tool: str, arguments: Dict[str, Any], search: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for `tool(**arguments)`, calling `search` on a miss.
+
+        Args:
+            tool: Tool function name
+            arguments: Arguments the tool was called with, defaults included
+            search: Runs the real search
+
+        Returns:
+            The search result
+        """
+        key = search_key(tool, arguments)
+        with self._lock:
+            result = self._lookup(key)
+            if result is not None:
+                self._stats["hits"] += 1
+                return result
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = Future()
+                owner = True
+                self._stats["misses"] += 1
+            else:
+                owner = False
+                self._stats["coalesced"] += 1
+        if not owner:
+            return pending.result()
+
+        try:
+            result = search()
+        except BaseException as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                del self._in_flight[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            if _is_error(result):
+                self._stats["errors"] += 1
+            elif isinstance(result, str):
+                self._store(key, tool, arguments, result)
+            del self._in_flight[key]
+        pending.set_result(result)
+        return result
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            self.conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / total if total else 0.0
+        return stats
+
+    def wrap(self, tool: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Cached version of a tool function that keeps its name, docstring and signature."""
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def cached(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return self.fetch(tool, dict(bound.arguments), lambda: function(*args, **kwargs))
+
+        return cached
+
+
+def with_search_cache(toolkit: Any, cache: SearchCache, tools: Iterable[str] = CACHEABLE_TOOLS) -> Any:
+    """
+    Route a toolkit's search functions through `cache`.
+
+    Args:
+        toolkit: A registered agno Toolkit (e.g. DuckDuckGoTools or ExaTools)
+        cache: Cache shared by every agent
+        tools: Names of the functions to cache; others are left untouched
+
+    Returns:
+        The same toolkit, with the matching functions cached
+    """
+    for name in tools:
+        function = toolkit.functions.get(name)
+        if function is not None and function.entrypoint is not None:
+            function.entrypoint = cache.wrap(name, function.entrypoint)
+    return toolkit
@@ -0,0 +1,415 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.knowledge.document import Document
+from agno.tools import Toolkit
+
+from kpi_store import document_period
+
+# Bump when headings, tables or chunk boundaries are detected differently
+CHUNKER_VERSION = "section-chunker-v1"
+
+# Chunk metadata that search_documents can filter on
+FILTER_KEYS = ("category", "fiscal_year", "period", "section", "page", "content_type")
+
+# Folder names used by data_.py; anything else is filed under its own folder name
+CATEGORIES = ("financial_reports", "investor_presentations", "market_analysis")
+
+BULLET = re.compile(r"^[▪•\-–*·●o]\s")
+NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*|[IVX]+\.)\s+[A-Z]")
+NUMERIC_TOKEN = re.compile(r"^[(\-]?(?:KES|USD|ETB)?\d[\d,.]*%?[)]?$|^[-–]$")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+# A line ending in one of these words runs on into the next line
+CONNECTIVES = {"a", "an", "and", "at", "by", "for", "from", "in", "its", "of", "on", "or", "the", "to", "with"}
+
+
+def document_metadata(source_path: str, first_page_text: str = "") -> Dict[str, Any]:
+    """
+    Category, reporting period and fiscal year of a PDF.
+
+    The category is the PDF's top-level folder (financial_reports,
+    investor_presentations, market_analysis). The period comes from the file
+    name or else the first page ("H1_FY25_NCBA_Analysis.pdf" -> "H1 FY25");
+    Safaricom's fiscal year ends in March, so FY25 is fiscal_year 2025.
+
+    Args:
+        source_path: Path relative to the PDF folder, e.g. "market_analysis/H1_FY25_NCBA_Analysis.pdf"
+        first_page_text: Text of the first page, used when the file name has no period
+
+    Returns:
+        Dict with 'category' and, when found, 'period' and 'fiscal_year'
+    """
+    parts = Path(source_path).parts
+    metadata: Dict[str, Any] = {"category": parts[0] if len(parts) > 1 else "uncategorized"}
+    period = document_period(Path(source_path), first_page_text)
+    if period:
+        metadata["period"] = period
+        year = re.search(r"(\d{2})F?$", period)
+        if year:
+            metadata["fiscal_year"] = 2000 + int(year.group(1))
+    return metadata
+
+
+def normalize_fiscal_year(value: Any) -> Optional[int]:
+    """2025 for "FY25", "FY2025", "2025", "H1 FY25" or 25; None if no year is found."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value if value > 1000 else 2000 + value
+    match = re.search(r"(?:20)?(\d{2})F?\s*$", str(value).strip())
+    return 2000 + int(match.group(1)) if match else None
+
+
+def is_table_row(line: str) -> bool:
+    """A line of mostly figures, such as a row of a results table or a chart axis."""
+    tokens = line.split()
+    numeric = sum(1 for token in tokens if NUMERIC_TOKEN.match(token))
+    return numeric >= 3 and numeric * 2 >= len(tokens)
+
+
+def is_heading(line: str, previous_blank: bool, next_line: str = "") -> bool:
+    """
+    A short title line after a blank line, e.g. "M-PESA as the key driver of growth".
+
+    Headings start with a capital or a section number, have at most 12 words,
+    no closing punctuation and few figures. Bullets, sources, table rows and
+    the first line of a wrapped paragraph (ending in "to"/"of"/..., followed by
+    a lowercase line, or a "Label: sentence" lead-in) are never headings.
+    """
+    text = line.strip()
+    if not previous_blank or not 3 <= len(text) <= 80 or BULLET.match(text):
+        return False
+    if text[-1] in ".,;" or text.lower().startswith(("source", "note", "*")) or is_table_row(text):
+        return False
+    words = text.split()
+    if len(words) > 12 or not (text[0].isupper() or NUMBERED_HEADING.match(text)):
+        return False
+    following = next_line.strip()
+    if words[-1].lower() in CONNECTIVES or (following and following[0].islower()):
+        return False
+    label, colon, rest = text.partition(": ")
+    if colon and len(rest.split()) > 3:
+        return False
+    letters = sum(c.isalpha() for c in text)
+    digits = sum(c.isdigit() for c in text)
+    return letters >= 3 and digits <= letters // 3
+
+
+def last_heading(text: str) -> Optional[str]:
+    """The last heading on a page, carried into the next page's chunks."""
+    heading, previous_blank = None, True
+    lines = text.splitlines()
+    for index, line in enumerate(lines):
+        if is_heading(line, previous_blank, lines[index + 1] if index + 1 < len(lines) else ""):
+            heading = " ".join(line.split())
+        previous_blank = not line.strip()
+    return heading
+
+
+class SectionChunker:
+    """
+    Splits PDF pages into chunks that follow headings and keep tables whole.
+
+    A heading always starts a new chunk and names the section of every chunk
+    after it, across page boundaries, until the next heading. Runs of table
+    rows become their own chunk (content_type "table"), prefixed with the
+    section name so the figures stay findable. Text is packed paragraph by
+    paragraph up to `chunk_size` characters; longer paragraphs are split at
+    sentence ends.
+
+    Args:
+        chunk_size: Target maximum characters per text chunk
+        max_table_size: Tables longer than this are split between rows
+    """
+
+    def __init__(self, chunk_size: int = 1500, max_table_size: int = 4000):
+        self.chunk_size = chunk_size
+        self.max_table_size = max_table_size
+
+    @property
+    def version(self) -> str:
+        return f"{CHUNKER_VERSION}:{self.chunk_size}:{self.max_table_size}"
+
+    def _blocks(self, text: str) -> List[Tuple[str, str]]:
+        """Split page text into ('heading' | 'table' | 'text', content) blocks, in page order."""
+        blocks: List[Tuple[str, str]] = []
+        paragraph: List[str] = []
+        table: List[str] = []
+        previous_blank = True
+
+        def flush_paragraph():
+            if paragraph:
+                blocks.append(("text", " ".join(paragraph)))
+                paragraph.clear()
+
+        def flush_table():
+            if len(table) >= 2:
+                blocks.append(("table", "\n".join(table)))
+            elif table:
+                paragraph.extend(table)
+            table.clear()
+
+        lines = text.splitlines()
+        for index, raw in enumerate(lines):
+            line = " ".join(raw.split())
+            if not line:
+                flush_table()
+                flush_paragraph()
+                previous_blank = True
+                continue
+            if is_table_row(line):
+                flush_paragraph()
+                table.append(line)
+            elif is_heading(line, previous_blank, lines[index + 1] if index + 1 < len(lines) else ""):
+                flush_table()
+                flush_paragraph()
+                blocks.append(("heading", line))
+            else:
+                flush_table()
+                paragraph.append(line)
+            previous_blank = False
+        flush_table()
+        flush_paragraph()
+        return blocks
+
+    def _split_text(self, text: str) -> List[str]:
+        if len(text) <= self.chunk_size:
+            return [text]
+        pieces, current = [], ""
+        for sentence in SENTENCE_END.split(text):
+            if current and len(current) + len(sentence) + 1 > self.chunk_size:
+                pieces.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _split_table(self, table: str) -> List[str]:
+        pieces, current = [], []
+        for row in table.split("\n"):
+            if current and sum(len(r) + 1 for r in current) + len(row) > self.max_table_size:
+                pieces.append("\n".join(current))
+                current = []
+            current.append(row)
+        pieces.append("\n".join(current))
+        return pieces
+
+    def chunk_pages(
+        self,
+        pages: List[Document],
+        base_metadata: Optional[Dict[str, Any]] = None,
+        section: Optional[str] = None,
+    ) -> List[Document]:
+        """
+        Chunk consecutive pages of one PDF.
+
+        Args:
+            pages: One Document per page, with meta_data["page"] set
+            base_metadata: Document-level metadata (see document_metadata) copied onto every chunk
+            section: Section in effect at the top of the first page
+
+        Returns:
+            Chunks with page, chunk, section and content_type metadata
+        """
+        chunks: List[Document] = []
+        for page in pages:
+            page_number = page.meta_data.get("page", 0)
+            pieces: List[Tuple[str, str, Optional[str]]] = []  # (content_type, text, section)
+            text_buffer = ""
+
+            def flush_text():
+                nonlocal text_buffer
+                if text_buffer:
+                    pieces.extend(("text", piece, section) for piece in self._split_text(text_buffer))
+                text_buffer = ""
+
+            for kind, content in self._blocks(page.content):
+                if kind == "heading":
+                    flush_text()
+                    section = content
+                elif kind == "table":
+                    flush_text()
+                    header = f"{section}\n" if section else ""
+                    pieces.extend(("table", header + piece, section) for piece in self._split_table(content))
+                elif text_buffer and len(text_buffer) + len(content) + 1 > self.chunk_size:
+                    flush_text()
+                    text_buffer = content
+                else:
+                    text_buffer = f"{text_buffer}\n{content}" if text_buffer else content
+            flush_text()
+
+            for index, (content_type, text, piece_section) in enumerate(pieces):
+                metadata = dict(base_metadata or {})
+                metadata.update({"page": page_number, "chunk": index + 1, "content_type": content_type})
+                if piece_section:
+                    metadata["section"] = piece_section
+                chunks.append(
+                    Document(
+                        name=page.name,
+                        id=f"{page.name}_{page_number}_{index + 1}",
+                        meta_data=metadata,
+                        content=text,
+                    )
+                )
+        return chunks
+
+
+def build_where(filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Chroma `where` clause for metadata filters.
+
+    Chroma accepts a single field per clause, so several filters are combined
+    with $and. Lists become $in, and "page_from"/"page_to" become a page range.
+
+    Args:
+        filters: Field -> value (None values are ignored)
+
+    Returns:
+        The where clause, or None when there is nothing to filter on
+    """
+    clauses: List[Dict[str, Any]] = []
+    for key, value in filters.items():
+        if value is None or value == "" or value == []:
+            continue
+        if key == "page_from":
+            clauses.append({"page": {"$gte": int(value)}})
+        elif key == "page_to":
+            clauses.append({"page": {"$lte": int(value)}})
+        elif isinstance(value, (list, tuple)):
+            clauses.append({key: {"$in": list(value)}})
+        elif isinstance(value, dict):
+            clauses.append({key: value})
+        else:
+            clauses.append({key: {"$eq": value}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class DocumentSearchTools(Toolkit):
+    """
+    Knowledge base search restricted by category, fiscal year, period, section or pages.
+
+    The filters become a Chroma `where` clause, so only the matching slice of
+    the index is searched.
+
+    Args:
+        knowledge: Knowledge base whose vector store holds SectionChunker chunks
+    """
+
+    def __init__(self, knowledge: Any, **kwargs):
+        self.knowledge = knowledge
+        super().__init__(
+            name="document_search",
+            tools=[self.search_documents, self.list_document_sections],
+            instructions=(
+                "When a question names a document type, fiscal year, period or section (e.g. 'FY25 investor "
+                "presentation', 'H1 FY25 analyst note on M-PESA'), call search_documents with those filters "
+                "instead of searching the whole knowledge base. Use list_document_sections to find section names. "
+                "Set entity (e.g. 'airtel', 'regulatory') to search one company's or the regulators' documents."
+            ),
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def search_documents(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        fiscal_year: Optional[str] = None,
+        period: Optional[str] = None,
+        section: Optional[str] = None,
+        content_type: Optional[str] = None,
+        page_from: Optional[int] = None,
+        page_to: Optional[int] = None,
+        entity: Optional[str] = None,
+        limit: int = 5,
+    ) -> str:
+        """Use this function to search the document library within a category, fiscal year, period or section.
+
+        Args:
+            query (str): What to look for, e.g. "M-PESA revenue growth drivers".
+            category (Optional[str]): One of "financial_reports", "investor_presentations", "market_analysis".
+            fiscal_year (Optional[str]): Fiscal year ending March, e.g. "FY25" or "2025".
+            period (Optional[str]): Reporting period, e.g. "FY25" or "H1 FY25".
+            section (Optional[str]): Exact section heading, as returned by list_document_sections.
+            content_type (Optional[str]): "table" for figures tables only, "text" for narrative only.
+            page_from (Optional[int]): First page to include.
+            page_to (Optional[int]): Last page to include.
+            entity (Optional[str]): Only this knowledge shard, e.g. "safaricom", "airtel", "mtn", "vodacom" or
+                "regulatory"; by default the shards are chosen from the query.
+            limit (int): Maximum number of chunks to return.
+
+        Returns:
+            str: JSON list of matching chunks with their source, page, section and text.
+        """
+        try:
+            from kpi_store import normalize_period
+
+            filters = {
+                "category": category,
+                "fiscal_year": normalize_fiscal_year(fiscal_year),
+                "period": normalize_period(period) if period else None,
+                "section": section,
+                "content_type": content_type,
+                "page_from": page_from,
+                "page_to": page_to,
+            }
+            where = build_where(filters)
+            vector_db = self.knowledge.vector_db
+            if entity and hasattr(vector_db, "shards"):
+                if entity.lower() not in vector_db.shards:
+                    return f"Error: unknown entity '{entity}', expected one of {sorted(vector_db.shards)}"
+                documents = vector_db.search(query=query, limit=limit, filters=where, shards=[entity.lower()])
+            else:
+                documents = vector_db.search(query=query, limit=limit, filters=where)
+            return json.dumps(
+                [
+                    {
+                        "source": document.meta_data.get("source_path", document.name),
+                        "page": document.meta_data.get("page"),
+                        "section": document.meta_data.get("section"),
+                        "period": document.meta_data.get("period"),
+                        "entity": document.meta_data.get("shard"),
+                        "content": document.content,
+                    }
+                    for document in documents
+                ]
+            )
+        except Exception as e:
+            return f"Error: {e}"
+
+    def list_document_sections(self, category: Optional[str] = None, fiscal_year: Optional[str] = None) -> str:
+        """Use this function to list the section headings available for search_documents.
+
+        Args:
+            category (Optional[str]): One of "financial_reports", "investor_presentations", "market_analysis".
+            fiscal_year (Optional[str]): Fiscal year ending March, e.g. "FY25" or "2025".
+
+        Returns:
+            str: JSON object mapping each source file to its section headings in page order.
+        """
+        try:
+            where = build_where({"category": category, "fiscal_year": normalize_fiscal_year(fiscal_year)})
+            vector_db = self.knowledge.vector_db
+            stores = getattr(vector_db, "shards", {"": vector_db})
+            metadatas: List[Dict[str, Any]] = []
+            for store in stores.values():
+                if store.exists():
+                    collection = store.client.get_collection(name=store.collection_name)
+                    metadatas.extend(collection.get(where=where, include=["metadatas"])["metadatas"])
+            sections: Dict[str, Dict[str, int]] = {}
+            for metadata in metadatas:
+                if metadata and metadata.get("section"):
+                    pages = sections.setdefault(metadata.get("source_path", ""), {})
+                    page = metadata.get("page", 0)
+                    pages[metadata["section"]] = min(page, pages.get(metadata["section"], page))
+            return json.dumps(
+                {source: sorted(pages, key=pages.get) for source, pages in sorted(sections.items())}
+            )
+        except Exception as e:
+            return f"Error: {e}"
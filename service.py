@@ -0,0 +1,439 @@
+"""HTTP service for the CFO team, with warm workers.
+
+Each worker process builds the knowledge base, skills and a pool of CFO teams
+once at startup, then serves requests until it is stopped. Requests beyond the
+pool wait in a bounded queue; when the queue is full, or a request waits longer
+than the queue timeout, the service answers 503 with Retry-After instead of
+piling up work.
+
+Endpoints:
+    POST /v1/ask     {"prompt": "...", "session_id": "...", "stream": false}
+                     stream=true returns NDJSON StreamEvents (see team_stream.py); requests
+                     with a session_id skip the shared response cache
+    GET  /healthz    200 while the process is up
+    GET  /readyz     200 once warm, 503 while warming up or if warm-up failed
+    GET  /metrics    Latency percentiles, throughput, queue depth, cache and Bedrock stats
+
+Usage:
+    python service.py --port 8000 --workers 2 --concurrency 4 --max-queue 32
+    uvicorn service:app --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+MAX_BODY_BYTES = 64 * 1024
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class Overloaded(Exception):
+    """The request queue is full or the request waited too long for a team."""
+
+
+class BodyTooLarge(ValueError):
+    """The request body is larger than MAX_BODY_BYTES."""
+
+
+class ServiceMetrics:
+    """
+    Request counters and a sliding window of latencies.
+
+    Args:
+        window: Number of recent requests kept for latency percentiles
+    """
+
+    def __init__(self, window: int = 1000):
+        self.started_at = time.time()
+        self.total = 0
+        self.by_status: Dict[int, int] = {}
+        self.rejected = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.queue_waits: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+        self.finished_at: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, status: int, latency: float, queue_wait: float = 0.0, ttft: Optional[float] = None) -> None:
+        with self._lock:
+            self.total += 1
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+            if status == 503:
+                self.rejected += 1
+            if status == 200:
+                self.latencies.append(latency)
+                self.queue_waits.append(queue_wait)
+                self.finished_at.append(time.time())
+                if ttft is not None:
+                    self.ttfts.append(ttft)
+
+    @staticmethod
+    def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p95": None, "p99": None, "max": None}
+        ordered = sorted(values)
+
+        def pick(q: float) -> float:
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        return {"p50": statistics.median(ordered), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            last_minute = sum(1 for t in self.finished_at if now - t <= 60)
+            return {
+                "uptime_s": now - self.started_at,
+                "requests": self.total,
+                "by_status": {str(k): v for k, v in sorted(self.by_status.items())},
+                "rejected": self.rejected,
+                "completed_last_minute": last_minute,
+                "latency_s": self._percentiles(list(self.latencies)),
+                "queue_wait_s": self._percentiles(list(self.queue_waits)),
+                "ttft_s": self._percentiles(list(self.ttfts)),
+            }
+
+
+def _default_warmup() -> Dict[str, Any]:
+    import main as app
+
+    app.get_knowledge()
+    app.check_skill_folders()
+    return {"model": getattr(app.get_model(), "id", None)}
+
+
+def _default_team_factory() -> Any:
+    import main as app
+
+    return app.build_independent_team()
+
+
+def _default_cache() -> Any:
+    import main as app
+
+    return app.get_response_cache()
+
+
+def _default_extra_metrics() -> Dict[str, Any]:
+    import main as app
+
+    return {
+        "response_cache": app.get_response_cache().stats(),
+        "search_cache": app.get_search_cache().stats(),
+        "bedrock": app.get_bedrock_manager().metrics(),
+    }
+
+
+class FinanceService:
+    """
+    Raw ASGI app serving the CFO team from a pool of warm teams.
+
+    Warm-up runs in the background when the server starts, so /healthz answers
+    at once and /readyz turns 200 when the pool is built. Each request borrows
+    one team for the whole run, so a team never handles two requests at once.
+
+    Args:
+        concurrency: Teams in the pool, i.e. requests running at the same time
+        max_queue: Requests allowed to wait for a team before new ones get 503
+        queue_timeout: Seconds a request may wait for a team before it gets 503
+        team_factory: Builds one team (default main.build_independent_team)
+        warmup: Builds shared state before the teams (default: knowledge base and skills)
+        response_cache: Semantic response cache consulted before running a team
+        extra_metrics: Returns additional stats for /metrics
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_queue: int = 32,
+        queue_timeout: float = 30.0,
+        team_factory: Callable[[], Any] = _default_team_factory,
+        warmup: Callable[[], Dict[str, Any]] = _default_warmup,
+        response_cache: Optional[Callable[[], Any]] = _default_cache,
+        extra_metrics: Optional[Callable[[], Dict[str, Any]]] = _default_extra_metrics,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.team_factory = team_factory
+        self.warmup = warmup
+        self.response_cache = response_cache
+        self.extra_metrics = extra_metrics
+        self.metrics = ServiceMetrics()
+        self.state = "starting"  # starting -> warming -> ready | failed
+        self.warmup_info: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self._teams: Optional["asyncio.Queue[Any]"] = None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cfo-team")
+        self._cache: Any = None
+        self._warmup_task: Optional["asyncio.Task[None]"] = None
+
+    async def _warm(self) -> None:
+        self.state = "warming"
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            self.warmup_info = dict(await loop.run_in_executor(self._executor, self.warmup) or {})
+            teams = await asyncio.gather(
+                *(loop.run_in_executor(self._executor, self.team_factory) for _ in range(self.concurrency))
+            )
+            self._cache = await loop.run_in_executor(self._executor, self.response_cache) if self.response_cache else None
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Warm-up failed: {self.error}")
+            return
+        self._teams = asyncio.Queue()
+        for team in teams:
+            self._teams.put_nowait(team)
+        self.warmup_info["seconds"] = time.perf_counter() - started
+        self.warmup_info["teams"] = len(teams)
+        self.state = "ready"
+        print(f"✅ Service ready: {len(teams)} warm teams in {self.warmup_info['seconds']:.1f}s (pid {os.getpid()})")
+
+    async def _acquire(self) -> Tuple[Any, float]:
+        # An idle team is taken at once; only requests that must wait count against max_queue.
+        # With requests already waiting, a newcomer queues behind them instead of taking a just-released team.
+        if not self.waiting:
+            try:
+                team = self._teams.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            else:
+                self.in_flight += 1
+                return team, 0.0
+        if self.waiting >= self.max_queue:
+            raise Overloaded(f"{self.waiting} requests already queued")
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            team = await asyncio.wait_for(self._teams.get(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded(f"No team free within {self.queue_timeout:.0f}s")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return team, time.perf_counter() - started
+
+    def _release(self, team: Any) -> None:
+        self.in_flight -= 1
+        self._teams.put_nowait(team)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._warmup_task = asyncio.create_task(self._warm())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._warmup_task is not None:
+                    self._warmup_task.cancel()
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        method, path = scope["method"], scope["path"]
+        if path == "/healthz" and method == "GET":
+            await _json(send, 200, {"status": "ok", "pid": os.getpid()})
+        elif path == "/readyz" and method == "GET":
+            body = {"status": self.state, **self.warmup_info}
+            if self.error:
+                body["error"] = self.error
+            await _json(send, 200 if self.state == "ready" else 503, body)
+        elif path == "/metrics" and method == "GET":
+            await _json(send, 200, self._metrics())
+        elif path == "/v1/ask" and method == "POST":
+            await self._ask(receive, send)
+        elif path in ("/healthz", "/readyz", "/metrics", "/v1/ask"):
+            await _json(send, 405, {"error": f"{method} not allowed on {path}"})
+        else:
+            await _json(send, 404, {"error": f"Unknown path {path}"})
+
+    def _metrics(self) -> Dict[str, Any]:
+        snapshot = self.metrics.snapshot()
+        snapshot.update(
+            {"state": self.state, "concurrency": self.concurrency, "in_flight": self.in_flight, "queued": self.waiting}
+        )
+        if self.extra_metrics is not None and self.state == "ready":
+            try:
+                snapshot.update(self.extra_metrics())
+            except Exception as e:
+                snapshot["extra_metrics_error"] = str(e)
+        return snapshot
+
+    async def _ask(self, receive: Receive, send: Send) -> None:
+        started = time.perf_counter()
+        try:
+            request = json.loads(await _read_body(receive))
+            prompt = request["prompt"]
+            if not isinstance(prompt, str) or not prompt.strip():
+                raise ValueError("prompt must be a non-empty string")
+        except ValueError as e:
+            status = 413 if isinstance(e, BodyTooLarge) else 400
+            await _json(send, status, {"error": str(e)})
+            self.metrics.record(status, time.perf_counter() - started)
+            return
+        except (KeyError, TypeError):
+            await _json(send, 400, {"error": 'Body must be JSON with a "prompt" field'})
+            self.metrics.record(400, time.perf_counter() - started)
+            return
+
+        if self.state != "ready":
+            await _json(send, 503, {"error": f"Service is {self.state}", "retry_after_s": 5}, retry_after=5)
+            self.metrics.record(503, time.perf_counter() - started)
+            return
+        try:
+            team, queue_wait = await self._acquire()
+        except Overloaded as e:
+            await _json(send, 503, {"error": f"Overloaded: {e}", "retry_after_s": 2}, retry_after=2)
+            self.metrics.record(503, time.perf_counter() - started)
+            return
+
+        # Only a caller's own session_id ties the run to a session; such runs skip the shared response cache
+        session_id = request.get("session_id") or None
+        label = session_id or f"http-{uuid.uuid4().hex[:12]}"
+        try:
+            if request.get("stream"):
+                status, ttft = await self._stream(team, prompt, session_id, label, send)
+                self.metrics.record(status, time.perf_counter() - started, queue_wait, ttft)
+                return
+            status, body = await self._run(team, prompt, session_id)
+        finally:
+            self._release(team)
+        body.update({"session_id": label, "latency_s": time.perf_counter() - started, "queue_wait_s": queue_wait})
+        await _json(send, status, body)
+        self.metrics.record(status, time.perf_counter() - started, queue_wait)
+
+    async def _run(self, team: Any, prompt: str, session_id: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        from response_cache import cached_run, is_error
+
+        run_kwargs = {"session_id": session_id} if session_id else {}
+        loop = asyncio.get_running_loop()
+        try:
+            if self._cache is not None:
+                response = await loop.run_in_executor(
+                    self._executor, lambda: cached_run(team, prompt, self._cache, **run_kwargs)
+                )
+            else:
+                response = await loop.run_in_executor(self._executor, lambda: team.run(prompt, **run_kwargs))
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        if is_error(response):
+            return 502, {"error": str(response.content), "status": "error"}
+        return 200, {"content": response.content, "status": str(getattr(response, "status", "completed"))}
+
+    async def _stream(
+        self, team: Any, prompt: str, session_id: Optional[str], label: str, send: Send
+    ) -> Tuple[int, Optional[float]]:
+        """Stream NDJSON events; returns the status to record (499 if the client went away) and the TTFT."""
+        from team_stream import TeamStream
+
+        run_kwargs = {"session_id": session_id} if session_id else {}
+        stream = TeamStream(team, prompt, cache=self._cache, **run_kwargs)
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache")],
+                }
+            )
+            async for event in stream:
+                line = json.dumps(asdict(event), default=str) + "\n"
+                await send({"type": "http.response.body", "body": line.encode(), "more_body": True})
+            summary = {"kind": "metrics", **asdict(stream.metrics), "session_id": label}
+            await send({"type": "http.response.body", "body": (json.dumps(summary) + "\n").encode(), "more_body": False})
+            return 200, stream.metrics.ttft_s
+        except Exception as e:
+            print(f"⚠️ Stream for {label} aborted: {type(e).__name__}: {e}")
+            return 499, stream.metrics.ttft_s
+        finally:
+            # After a disconnect the run goes on in TeamStream's thread; the team is only released once it ends
+            await asyncio.get_running_loop().run_in_executor(None, stream.join)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _json(send: Send, status: int, body: Dict[str, Any], retry_after: Optional[int] = None) -> None:
+    payload = json.dumps(body, default=str).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def create_app() -> FinanceService:
+    """Service configured from SERVICE_CONCURRENCY, SERVICE_MAX_QUEUE and SERVICE_QUEUE_TIMEOUT."""
+    return FinanceService(
+        concurrency=int(os.getenv("SERVICE_CONCURRENCY", "4")),
+        max_queue=int(os.getenv("SERVICE_MAX_QUEUE", "32")),
+        queue_timeout=float(os.getenv("SERVICE_QUEUE_TIMEOUT", "30")),
+    )
+
+
+# Module-level app for `uvicorn service:app`; nothing is built until the server starts
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own warm teams")
+    parser.add_argument("--concurrency", type=int, help="Teams per worker (default SERVICE_CONCURRENCY or 4)")
+    parser.add_argument("--max-queue", type=int, help="Queued requests per worker (default SERVICE_MAX_QUEUE or 32)")
+    parser.add_argument("--queue-timeout", type=float, help="Seconds a request may wait (default 30)")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError("`uvicorn` not installed. Please install using `pip install uvicorn`")
+
+    # Worker processes import this module again, so settings travel through the environment
+    for name, value in (
+        ("SERVICE_CONCURRENCY", args.concurrency),
+        ("SERVICE_MAX_QUEUE", args.max_queue),
+        ("SERVICE_QUEUE_TIMEOUT", args.queue_timeout),
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+    print(f"🚀 CFO service on http://{args.host}:{args.port} ({args.workers} worker(s))")
+    uvicorn.run("service:app", host=args.host, port=args.port, workers=args.workers, lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
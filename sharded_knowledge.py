@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from agno.knowledge.document import Document
+from agno.utils.log import log_warning
+
+from hybrid_search import reciprocal_rank_fusion
+from ingestion import MANIFEST_NAME, manifest_fingerprint, sync_knowledge
+
+# Shard that keeps the original collection and receives every document no other shard claims
+HOME_SHARD = "safaricom"
+
+
+@dataclass(frozen=True)
+class Shard:
+    name: str
+    aliases: Tuple[str, ...]  # Terms that route a query or a PDF path to this shard
+    family: str = "operator"  # "operator" (peer comparisons search all of them) or "regulator"
+
+
+DEFAULT_SHARDS: Tuple[Shard, ...] = (
+    Shard("safaricom", ("safaricom", "m-pesa", "mpesa", "fuliza", "m-shwari", "lipa na m-pesa")),
+    Shard("airtel", ("airtel", "airtel money", "airtel africa")),
+    Shard("mtn", ("mtn", "momo", "mtn mobile money")),
+    Shard("vodacom", ("vodacom", "vodafone", "vodacom group")),
+    Shard(
+        "regulatory",
+        (
+            "regulator",
+            "regulatory",
+            "regulation",
+            "cbk",
+            "central bank of kenya",
+            "communications authority",
+            "capital markets authority",
+            "cma",
+            "gazette",
+            "licence",
+            "license",
+            "directive",
+        ),
+        family="regulator",
+    ),
+)
+
+# Query terms asking for several operators at once
+PEER_TERMS = (
+    "peer",
+    "peers",
+    "competitor",
+    "competitors",
+    "rival",
+    "rivals",
+    "industry",
+    "market share",
+    "benchmark",
+    "compare",
+    "comparison",
+    "operators",
+)
+
+
+def _normalize(text: str) -> str:
+    """Lowercase words separated by single spaces and padded, so " m pesa " matches "M-PESA" and "m_pesa"."""
+    return f" {' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())} "
+
+
+def _position(text: str, terms: Iterable[str]) -> Optional[int]:
+    """Earliest position of any of `terms` in normalized `text`, or None."""
+    found = [text.find(_normalize(term)) for term in terms]
+    found = [index for index in found if index >= 0]
+    return min(found) if found else None
+
+
+def shard_collection_name(base: str, shard: str, home: str = HOME_SHARD) -> str:
+    """Chroma collection of a shard; the home shard keeps `base` so existing vectors are reused."""
+    return base if shard == home else f"{base}_{shard}"
+
+
+class ShardRouter:
+    """
+    Keyword router that maps PDFs and queries to knowledge shards without a model call.
+
+    A PDF belongs to the shard whose alias appears first in its path
+    ("peers/Airtel_Africa_FY25.pdf" -> airtel, "regulatory/CBK_Circular.pdf" ->
+    regulatory), otherwise to the home shard. A query is sent to every shard it
+    names, to all operator shards when it asks for a peer comparison, and to
+    the home shard when it names none.
+
+    Args:
+        shards: Shard definitions, in priority order
+        home: Name of the default shard
+    """
+
+    def __init__(self, shards: Sequence[Shard] = DEFAULT_SHARDS, home: str = HOME_SHARD):
+        self.shards = {shard.name: shard for shard in shards}
+        if home not in self.shards:
+            raise ValueError(f"Home shard '{home}' is not one of {sorted(self.shards)}")
+        self.home = home
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.shards)
+
+    def shard_for(self, source_path: str) -> str:
+        """Shard a PDF is stored in, from its path relative to the PDF folder."""
+        text = _normalize(source_path)
+        best, best_position = self.home, None
+        for shard in self.shards.values():
+            position = _position(text, shard.aliases)
+            if position is not None and (best_position is None or position < best_position):
+                best, best_position = shard.name, position
+        return best
+
+    def route(self, query: str, available: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Shards to search for a query.
+
+        Args:
+            query: The search query
+            available: Shards that hold documents (default: all)
+
+        Returns:
+            Shard names in definition order; never empty while any shard is available
+        """
+        text = _normalize(query)
+        selected = {shard.name for shard in self.shards.values() if _position(text, shard.aliases) is not None}
+        if _position(text, PEER_TERMS) is not None:
+            selected.update(shard.name for shard in self.shards.values() if shard.family == "operator")
+        if not selected:
+            selected = {self.home}
+
+        candidates = self.names if available is None else [name for name in self.names if name in set(available)]
+        routed = [name for name in candidates if name in selected]
+        if routed:
+            return routed
+        return [self.home] if self.home in candidates else candidates[:1]
+
+
+class ShardedVectorDb:
+    """
+    Knowledge vector store split into one collection per entity or document family.
+
+    Each shard is a HybridChromaDb. A search goes only to the shards the router
+    picks for the query, runs them in parallel, and merges their ranked results
+    with reciprocal rank fusion into one top-k list. Each returned document
+    records its shard in meta_data["shard"]. Ingestion goes through sync_shards,
+    not Knowledge.insert.
+
+    Args:
+        shards: Vector store per shard name
+        router: Picks the shards for each query
+        max_workers: Threads used to search shards in parallel (default: one per shard)
+    """
+
+    def __init__(self, shards: Dict[str, Any], router: Optional[ShardRouter] = None, max_workers: Optional[int] = None):
+        self.shards = shards
+        self.router = router or ShardRouter()
+        missing = set(shards) - set(self.router.names)
+        if missing:
+            raise ValueError(f"Shards {sorted(missing)} are unknown to the router")
+        self.populated: Optional[List[str]] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(shards), thread_name_prefix="shard-search")
+
+    @property
+    def home(self) -> Any:
+        return self.shards[self.router.home]
+
+    @property
+    def embedder(self) -> Any:
+        return self.home.embedder
+
+    def refresh(self) -> List[str]:
+        """Record which shards hold documents; only those are searched."""
+        self.populated = [name for name, shard in self.shards.items() if shard.get_count() > 0]
+        return self.populated
+
+    def counts(self) -> Dict[str, int]:
+        return {name: shard.get_count() for name, shard in self.shards.items()}
+
+    def get_count(self) -> int:
+        return sum(self.counts().values())
+
+    def exists(self) -> bool:
+        return all(shard.exists() for shard in self.shards.values())
+
+    def create(self) -> None:
+        for shard in self.shards.values():
+            shard.create()
+
+    def route(self, query: str) -> List[str]:
+        return self.router.route(query, self.populated)
+
+    def manifest_path(self, name: str) -> Path:
+        """Ingest manifest of a shard; the home shard keeps sync_knowledge's default location."""
+        shard_db = self.shards[name]
+        if name == self.router.home:
+            return Path(shard_db.path) / MANIFEST_NAME
+        return Path(shard_db.path) / f"{shard_db.collection_name}_{MANIFEST_NAME}"
+
+    def fingerprint(self) -> str:
+        """Version of the whole sharded corpus; changes when a PDF in any shard is re-ingested."""
+        digest = hashlib.sha256()
+        for name in self.shards:
+            digest.update(f"{name}:{manifest_fingerprint(self.manifest_path(name))}\n".encode())
+        return digest.hexdigest()
+
+    def search(
+        self, query: str, limit: int = 5, filters: Optional[Any] = None, shards: Optional[Sequence[str]] = None
+    ) -> List[Document]:
+        """
+        Search the routed shards in parallel and merge their results.
+
+        Args:
+            query: The search query
+            limit: Number of merged results to return
+            filters: Metadata filters, applied in every shard
+            shards: Search these shards instead of the routed ones
+
+        Returns:
+            Up to `limit` documents, best first
+        """
+        names = [name for name in shards if name in self.shards] if shards else self.route(query)
+        if not names:
+            return []
+        if len(names) > 1:
+            # Embed once; the shards then read the query vector from the embedder's cache
+            self.embedder.get_embedding(query)
+
+        futures = {name: self._executor.submit(self.shards[name].search, query, limit, filters) for name in names}
+        ranked: List[List[str]] = []
+        by_key: Dict[str, Document] = {}
+        for name, future in futures.items():
+            try:
+                documents = future.result()
+            except Exception as e:
+                log_warning(f"Shard '{name}' search failed: {e}")
+                continue
+            keys = []
+            for document in documents:
+                document.meta_data = {**(document.meta_data or {}), "shard": name}
+                key = f"{name}:{document.id}"
+                by_key[key] = document
+                keys.append(key)
+            ranked.append(keys)
+
+        if len(ranked) == 1:
+            return [by_key[key] for key in ranked[0][:limit]]
+        # Scores from different collections are not comparable, ranks are
+        return [by_key[key] for key, _ in reciprocal_rank_fusion(ranked)[:limit]]
+
+    async def async_search(self, query: str, limit: int = 5, filters: Optional[Any] = None) -> List[Document]:
+        return await asyncio.to_thread(self.search, query, limit, filters)
+
+
+def sync_shards(knowledge: Any, pdf_dir: Path, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Run sync_knowledge for every shard of a ShardedVectorDb.
+
+    Each shard ingests only the PDFs the router assigns to it and keeps its own
+    manifest; the home shard keeps the original collection and manifest, so an
+    unsharded knowledge base is not re-embedded. A PDF whose shard changes is
+    removed from the old shard and added to the new one.
+
+    Args:
+        knowledge: Knowledge instance backed by a ShardedVectorDb
+        pdf_dir: Folder scanned recursively for PDFs
+        **kwargs: Passed to sync_knowledge (reader, max_workers, chunker)
+
+    Returns:
+        sync_knowledge's summary summed over shards, plus 'shards' with the chunk count per shard
+    """
+    from agno.knowledge.knowledge import Knowledge
+
+    vector_db = knowledge.vector_db
+    router = vector_db.router
+    summary: Dict[str, Any] = {"added": [], "updated": [], "removed": [], "unchanged": [], "failed": [], "pages": 0}
+    started = time.perf_counter()
+    for name, shard_db in vector_db.shards.items():
+        shard_summary = sync_knowledge(
+            Knowledge(vector_db=shard_db),
+            pdf_dir,
+            manifest_path=vector_db.manifest_path(name),
+            include=lambda source_path, name=name: router.shard_for(source_path) == name,
+            **kwargs,
+        )
+        for key in ("added", "updated", "removed", "unchanged", "failed"):
+            summary[key].extend(shard_summary[key])
+        summary["pages"] += shard_summary["pages"]
+
+    seconds = time.perf_counter() - started
+    summary["pages_per_sec"] = summary["pages"] / seconds if seconds else 0.0
+    vector_db.refresh()
+    summary["shards"] = vector_db.counts()
+    return summary
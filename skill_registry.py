@@ -0,0 +1,109 @@
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from agno.skills import LocalSkills, Skill, SkillLoader, Skills, validate_skill_directory
+
+
+class SharedSkill(Skill):
+    """A parsed skill shared by several agents; attributes cannot be reassigned."""
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Skill '{self.name}' is shared between agents and is read-only")
+        super().__setattr__(name, value)
+
+    def freeze(self) -> "SharedSkill":
+        object.__setattr__(self, "_frozen", True)
+        return self
+
+
+def _folder_signature(folder: Path) -> Tuple[Tuple[str, int], ...]:
+    """mtime of every file in the skill folder; any edit, addition or removal changes it."""
+    return tuple(
+        sorted((str(path.relative_to(folder)), path.stat().st_mtime_ns) for path in folder.rglob("*") if path.is_file())
+    )
+
+
+@dataclass
+class _CachedFolder:
+    signature: Tuple[Tuple[str, int], ...]
+    skills: Tuple[SharedSkill, ...]
+
+
+class SkillRegistry:
+    """
+    Process-wide cache of parsed skill folders.
+
+    Each folder's SKILL.md files are parsed once and the resulting skills are
+    shared (read-only) by every agent that asks for them. A folder is parsed
+    again only when a file in it changes.
+    """
+
+    def __init__(self):
+        self._folders: Dict[Path, _CachedFolder] = {}
+        self._lock = threading.Lock()
+        self.parses = 0
+
+    def validate(self, folders: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Check skill folders before any agent is built.
+
+        Args:
+            folders: Skill folders to check
+
+        Returns:
+            Dict mapping each invalid folder to its problems (empty when all are valid)
+        """
+        problems: Dict[str, List[str]] = {}
+        for folder in dict.fromkeys(folders):
+            path = Path(folder)
+            if not path.is_dir():
+                problems[folder] = [f"Skills path does not exist: {path.resolve()}"]
+            elif (path / "SKILL.md").exists():
+                errors = validate_skill_directory(path)
+                if errors:
+                    problems[folder] = errors
+        return problems
+
+    def get(self, folder: str) -> Tuple[SharedSkill, ...]:
+        """Return the parsed skills of `folder`, parsing it only if it is new or has changed."""
+        path = Path(folder).resolve()
+        signature = _folder_signature(path) if path.is_dir() else ()
+        with self._lock:
+            cached = self._folders.get(path)
+            if cached is not None and cached.signature == signature:
+                return cached.skills
+            skills = tuple(SharedSkill.from_dict(skill.to_dict()).freeze() for skill in LocalSkills(str(path)).load())
+            self.parses += 1
+            self._folders[path] = _CachedFolder(signature=signature, skills=skills)
+            return skills
+
+    def loader(self, folder: str) -> "RegistrySkillLoader":
+        return RegistrySkillLoader(self, folder)
+
+    def skills(self, folders: Iterable[str]) -> Skills:
+        """Build an agent's Skills object backed by the shared parsed skills."""
+        return Skills(loaders=[self.loader(folder) for folder in dict.fromkeys(folders)])
+
+
+class RegistrySkillLoader(SkillLoader):
+    """SkillLoader that serves skills from a SkillRegistry instead of parsing files."""
+
+    def __init__(self, registry: SkillRegistry, folder: str):
+        self.registry = registry
+        self.folder = folder
+
+    def load(self) -> List[Skill]:
+        return list(self.registry.get(self.folder))
+
+    def __repr__(self) -> str:
+        return f"RegistrySkillLoader({self.folder!r})"
+
+
+@lru_cache(maxsize=None)
+def get_skill_registry() -> SkillRegistry:
+    """The process-wide skill registry."""
+    return SkillRegistry()
@@ -0,0 +1,180 @@
+import csv
+import glob
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+DEFAULT_BATCH_ROWS = 200_000
+
+# Folder that ledger and transaction paths supplied to agent tools must stay inside
+DATA_DIR_ENV = "LEDGER_DATA_DIR"
+
+
+def data_root(data_dir: Optional[Union[str, Path]] = None) -> Path:
+    """The tools' data folder: `data_dir`, else $LEDGER_DATA_DIR, else ./finance_data, fully resolved."""
+    return Path(data_dir or os.getenv(DATA_DIR_ENV) or "./finance_data").resolve()
+
+
+def expand_paths(paths: Union[str, Sequence[str]], root: Optional[Path] = None) -> List[Path]:
+    """
+    Resolve file paths and glob patterns ("ledgers/*.csv") to existing files.
+
+    Args:
+        paths: One path/pattern or a list of them
+        root: When set, relative paths are taken from this folder and any path that
+            resolves outside it (absolute, "..", symlinks) raises PermissionError
+
+    Returns:
+        Sorted, de-duplicated list of files
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [str(paths)]
+    files: Dict[Path, None] = {}
+    for pattern in paths:
+        if root is not None:
+            pattern = root / pattern
+        matches = sorted(glob.glob(str(pattern), recursive=True)) or [str(pattern)]
+        for match in matches:
+            path = Path(match)
+            if root is not None:
+                path = path.resolve()
+                if not path.is_relative_to(root):
+                    raise PermissionError(f"{match} is outside the data folder {root}")
+            if not path.is_file():
+                raise FileNotFoundError(f"No such file: {path}")
+            files[path] = None
+    return list(files)
+
+
+def _missing(columns: Sequence[str], available: Sequence[str], path: Path) -> None:
+    missing = [column for column in columns if column not in available]
+    if missing:
+        raise ValueError(f"{path.name} has no column(s) {missing}; available columns: {list(available)}")
+
+
+def _iter_csv(path: Path, columns: Sequence[str], batch_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    try:
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        pa_csv = None
+
+    if pa_csv is not None:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+        _missing(columns, header, path)
+        reader = pa_csv.open_csv(
+            str(path),
+            read_options=pa_csv.ReadOptions(block_size=1 << 24),
+            convert_options=pa_csv.ConvertOptions(include_columns=list(columns)),
+        )
+        for batch in reader:
+            yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in columns}
+        return
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        _missing(columns, header, path)
+        indexes = [header.index(column) for column in columns]
+        width = max(indexes) + 1
+        while True:
+            chunk = list(islice(reader, batch_rows))
+            if not chunk:
+                break
+            # Short rows (blank or truncated lines) are skipped
+            rows = [row for row in chunk if len(row) >= width]
+            if not rows:
+                continue
+            # Object arrays skip the fixed-width unicode copy; as_float/as_text convert them in C
+            yield {
+                column: np.array([row[index] for row in rows], dtype=object)
+                for column, index in zip(columns, indexes)
+            }
+
+
+def _iter_parquet(path: Path, columns: Sequence[str], batch_rows: int) -> Iterator[Dict[str, np.ndarray]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("`pyarrow` not installed. Please install using `pip install pyarrow` to read Parquet files")
+
+    parquet = pq.ParquetFile(str(path))
+    _missing(columns, parquet.schema_arrow.names, path)
+    for batch in parquet.iter_batches(batch_size=batch_rows, columns=list(columns)):
+        yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in columns}
+
+
+def iter_batches(
+    paths: Union[str, Sequence[str]],
+    columns: Sequence[str],
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    root: Optional[Path] = None,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream the selected columns of CSV/Parquet files as NumPy arrays, one batch at a time.
+
+    Only `columns` are materialized and at most about `batch_rows` rows are in
+    memory at once, so files far larger than RAM can be aggregated. CSV uses
+    pyarrow's streaming reader when pyarrow is installed and the csv module
+    otherwise; Parquet requires pyarrow.
+
+    Args:
+        paths: File paths or glob patterns
+        columns: Columns to read
+        batch_rows: Rows per batch
+        root: Data folder the files must be inside (see expand_paths)
+
+    Yields:
+        Dict mapping each column name to an array of that batch's values
+    """
+    for path in expand_paths(paths, root):
+        if path.suffix.lower() in (".parquet", ".pq"):
+            yield from _iter_parquet(path, columns, batch_rows)
+        else:
+            yield from _iter_csv(path, columns, batch_rows)
+
+
+def read_header(path: Union[str, Path], sample_rows: int = 3, root: Optional[Path] = None) -> Dict[str, List]:
+    """Column names and the first few rows of a CSV/Parquet file, which must be inside `root` when given."""
+    path = expand_paths(path, root)[0] if root is not None else Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("`pyarrow` not installed. Please install using `pip install pyarrow` to read Parquet files")
+        parquet = pq.ParquetFile(str(path))
+        sample = next(parquet.iter_batches(batch_size=sample_rows), None)
+        rows = [list(row.values()) for row in sample.to_pylist()] if sample is not None else []
+        return {"columns": parquet.schema_arrow.names, "rows": rows, "row_count": parquet.metadata.num_rows}
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row for _, row in zip(range(sample_rows), reader)]
+    return {"columns": header, "rows": rows}
+
+
+def as_text(values: np.ndarray) -> np.ndarray:
+    """Key column as a fixed-width string array (None/NaN become '')."""
+    text = values.astype(str)
+    if values.dtype.kind in ("U", "S"):
+        return text
+    return np.where((text == "None") | (text == "nan"), "", text)
+
+
+def as_float(values: np.ndarray) -> np.ndarray:
+    """Numeric column as float64; blanks become NaN and thousands separators are dropped."""
+    if values.dtype.kind in ("f", "i", "u", "b"):
+        return values.astype(np.float64)
+    if values.dtype.kind == "O":
+        try:
+            return values.astype(np.float64)
+        except (TypeError, ValueError):
+            pass
+    text = np.char.strip(values.astype(str))
+    if np.char.find(text, ",").max(initial=-1) >= 0:
+        text = np.char.replace(text, ",", "")
+    text = np.where((text == "") | (text == "None"), "nan", text)
+    return text.astype(np.float64)
@@ -0,0 +1,334 @@
+"""Stream the CFO team's answer as it is produced.
+
+Leader tokens, member tokens and tool calls are yielded as StreamEvents tagged
+with the agent that produced them, including members started by
+delegate_tasks_in_parallel, whose events interleave as they arrive. Each stream
+records time-to-first-token (any agent) and the leader's own first token.
+
+Usage:
+    python team_stream.py "What drove M-PESA revenue growth in FY2025?"
+    python team_stream.py --example "Ethiopia 5G Business Case" --json
+
+    for event in main.stream_team(prompt):
+        ...
+    async for event in main.stream_team(prompt):
+        ...
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import queue
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from agno.run.team import TeamRunOutput
+
+from delegation import member_event_sink
+from response_cache import cacheable, is_error
+
+# Event kinds yielded to callers
+TOKEN = "token"
+TOOL_STARTED = "tool_started"
+TOOL_COMPLETED = "tool_completed"
+MEMBER_STARTED = "member_started"
+MEMBER_COMPLETED = "member_completed"
+ERROR = "error"
+DONE = "done"
+
+_AGNO_KINDS = {
+    "RunContent": TOKEN,
+    "TeamRunContent": TOKEN,
+    "ToolCallStarted": TOOL_STARTED,
+    "TeamToolCallStarted": TOOL_STARTED,
+    "ToolCallCompleted": TOOL_COMPLETED,
+    "TeamToolCallCompleted": TOOL_COMPLETED,
+    "RunStarted": MEMBER_STARTED,
+    "RunCompleted": MEMBER_COMPLETED,
+    "RunError": ERROR,
+    "TeamRunError": ERROR,
+}
+
+_FINISHED = object()
+
+
+@dataclass
+class StreamEvent:
+    kind: str
+    source: str  # Team name for the leader, otherwise the member's name
+    text: str = ""
+    tool: Optional[str] = None
+    elapsed_s: float = 0.0
+    is_leader: bool = False
+
+
+@dataclass
+class StreamMetrics:
+    ttft_s: Optional[float] = None
+    leader_ttft_s: Optional[float] = None
+    total_s: Optional[float] = None
+    chunks: Dict[str, int] = field(default_factory=dict)
+    tool_calls: int = 0
+    cached: bool = False
+
+
+def _source(event: Any, leader: str) -> str:
+    return getattr(event, "agent_name", None) or getattr(event, "team_name", None) or leader
+
+
+def to_stream_event(event: Any, leader: str, elapsed_s: float) -> Optional[StreamEvent]:
+    """
+    Convert an agno run event into a StreamEvent.
+
+    Args:
+        event: Agent or Team run event
+        leader: Name of the team being streamed
+        elapsed_s: Seconds since the stream started
+
+    Returns:
+        The StreamEvent, or None for events callers do not need
+    """
+    name = getattr(event, "event", "")
+    source = _source(event, leader)
+    is_leader = source == leader
+    if name == "TeamRunCompleted" and is_leader:
+        return StreamEvent(DONE, source, str(event.content or ""), elapsed_s=elapsed_s, is_leader=True)
+    kind = _AGNO_KINDS.get(name)
+    if kind is None or (kind in (MEMBER_STARTED, MEMBER_COMPLETED) and is_leader):
+        return None
+    if kind == TOKEN:
+        if not isinstance(event.content, str) or not event.content:
+            return None
+        return StreamEvent(TOKEN, source, event.content, elapsed_s=elapsed_s, is_leader=is_leader)
+    if kind in (TOOL_STARTED, TOOL_COMPLETED):
+        tool = getattr(event, "tool", None)
+        text = ""
+        if kind == TOOL_STARTED and tool is not None and tool.tool_args:
+            text = json.dumps(tool.tool_args, default=str)
+        elif kind == TOOL_COMPLETED and tool is not None and tool.result is not None:
+            text = str(tool.result)
+        return StreamEvent(
+            kind, source, text, tool=getattr(tool, "tool_name", None), elapsed_s=elapsed_s, is_leader=is_leader
+        )
+    text = str(event.content or "") if kind in (ERROR, MEMBER_COMPLETED) else ""
+    return StreamEvent(kind, source, text, elapsed_s=elapsed_s, is_leader=is_leader)
+
+
+class TeamStream:
+    """
+    One streamed team run, usable as a sync or async iterator of StreamEvents.
+
+    The team runs on a background thread and every event (the leader's own and
+    those of members, including parallel ones) goes through a single queue, so
+    the consumer sees them in arrival order. The final event has kind "done"
+    and carries the full answer. A semantic response cache hit is streamed as
+    a single token followed by "done".
+
+    Args:
+        team: Team to run
+        prompt: The user's request
+        cache: SemanticResponseCache consulted before and filled after the run;
+            ignored when run_kwargs carry a session_id or user_id
+        tracer: Tracer that times the run as a "stream_team" request span
+        **run_kwargs: Passed through to team.run (e.g. session_id)
+    """
+
+    def __init__(self, team: Any, prompt: str, cache: Any = None, tracer: Any = None, **run_kwargs: Any):
+        self.team = team
+        self.prompt = prompt
+        # Session- or user-bound runs neither read nor fill the shared cache (see response_cache.cacheable)
+        self.cache = cache if cacheable(run_kwargs) else None
+        self.tracer = tracer
+        self.run_kwargs = run_kwargs
+        self.leader = team.name or "Team"
+        self.metrics = StreamMetrics()
+        self.content: Optional[str] = None
+        self.response: Any = None
+        self._started: Optional[float] = None
+        self._finished = threading.Event()
+
+    def _run(self, put: Callable[[Any], None]) -> None:
+        member_event_sink.set(put)
+        try:
+            cached = self.cache.get(self.prompt) if self.cache is not None else None
+            if cached is not None:
+                put(("cached", cached))
+                return
+            for event in self.team.run(
+                self.prompt, stream=True, stream_events=True, yield_run_output=True, **self.run_kwargs
+            ):
+                put(event)
+        except Exception as e:
+            put(("exception", e))
+        finally:
+            put(_FINISHED)
+
+    def _produce(self, put: Callable[[Any], None]) -> None:
+        try:
+            if self.tracer is None:
+                self._run(put)
+                return
+            with self.tracer.span("stream_team", "request", input_bytes=len(self.prompt)):
+                self._run(put)
+        finally:
+            self._finished.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the team run has ended, even if the consumer stopped iterating early.
+
+        Returns:
+            True once the run has ended or if the stream was never consumed; False on timeout
+        """
+        return self._started is None or self._finished.wait(timeout)
+
+    def _start(self, put: Callable[[Any], None]) -> None:
+        if self._started is not None:
+            raise RuntimeError("A TeamStream can only be consumed once")
+        self._started = time.perf_counter()
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._produce, put), daemon=True).start()
+
+    def _events(self, item: Any) -> Iterator[StreamEvent]:
+        elapsed = time.perf_counter() - self._started
+        if isinstance(item, tuple) and item[0] == "cached":
+            self.metrics.cached = True
+            self.response = item[1]
+            content = str(item[1].content)
+            events = [StreamEvent(TOKEN, self.leader, content, elapsed_s=elapsed, is_leader=True)]
+            events.append(StreamEvent(DONE, self.leader, content, elapsed_s=elapsed, is_leader=True))
+        elif isinstance(item, tuple) and item[0] == "exception":
+            events = [StreamEvent(ERROR, self.leader, f"{type(item[1]).__name__}: {item[1]}", elapsed_s=elapsed)]
+        elif isinstance(item, TeamRunOutput):
+            self.response = item
+            events = []
+        else:
+            event = to_stream_event(item, self.leader, elapsed)
+            events = [event] if event is not None else []
+        for event in events:
+            self._observe(event)
+            yield event
+
+    def _observe(self, event: StreamEvent) -> None:
+        metrics = self.metrics
+        if event.kind == TOKEN:
+            if metrics.ttft_s is None:
+                metrics.ttft_s = event.elapsed_s
+            if event.is_leader and metrics.leader_ttft_s is None:
+                metrics.leader_ttft_s = event.elapsed_s
+            metrics.chunks[event.source] = metrics.chunks.get(event.source, 0) + 1
+        elif event.kind == TOOL_STARTED:
+            metrics.tool_calls += 1
+        elif event.kind == DONE:
+            self.content = event.text
+
+    def _finish(self) -> None:
+        self.metrics.total_s = time.perf_counter() - self._started
+        if (
+            self.cache is not None
+            and not self.metrics.cached
+            and self.content
+            and self.response is not None
+            and not is_error(self.response)
+        ):
+            self.cache.put(self.prompt, self.response)
+
+    def __iter__(self) -> Iterator[StreamEvent]:
+        items: "queue.Queue[Any]" = queue.Queue()
+        self._start(items.put)
+        while True:
+            item = items.get()
+            if item is _FINISHED:
+                break
+            yield from self._events(item)
+        self._finish()
+
+    async def __aiter__(self) -> AsyncIterator[StreamEvent]:
+        loop = asyncio.get_running_loop()
+        items: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._start(lambda item: loop.call_soon_threadsafe(items.put_nowait, item))
+        while True:
+            item = await items.get()
+            if item is _FINISHED:
+                break
+            for event in self._events(item):
+                yield event
+        self._finish()
+
+
+def render(stream: TeamStream, out: Any = sys.stdout, show_tool_results: bool = False) -> None:
+    """
+    Print a stream to the terminal, starting a new labelled block whenever the speaking agent changes.
+
+    Args:
+        stream: The stream to consume
+        out: File to write to
+        show_tool_results: Also print (truncated) tool results
+    """
+    speaker = None
+    for event in stream:
+        if event.kind == TOKEN:
+            if event.source != speaker:
+                speaker = event.source
+                out.write(f"\n\n🗣️ [{speaker}]\n")
+            out.write(event.text)
+        elif event.kind == TOOL_STARTED:
+            speaker = None
+            out.write(f"\n🔧 [{event.source}] {event.tool}({event.text[:160]})")
+        elif event.kind == TOOL_COMPLETED:
+            speaker = None
+            result = f": {event.text[:200]}" if show_tool_results else ""
+            out.write(f"\n✅ [{event.source}] {event.tool} done at {event.elapsed_s:.1f}s{result}")
+        elif event.kind == MEMBER_STARTED:
+            speaker = None
+            out.write(f"\n👤 {event.source} started at {event.elapsed_s:.1f}s")
+        elif event.kind == MEMBER_COMPLETED:
+            speaker = None
+            out.write(f"\n🏁 {event.source} finished at {event.elapsed_s:.1f}s")
+        elif event.kind == ERROR:
+            speaker = None
+            out.write(f"\n❌ [{event.source}] {event.text}")
+        out.flush()
+    out.write("\n")
+
+
+def format_metrics(metrics: StreamMetrics) -> str:
+    ttft = f"{metrics.ttft_s:.2f}s" if metrics.ttft_s is not None else "n/a"
+    leader = f"{metrics.leader_ttft_s:.2f}s" if metrics.leader_ttft_s is not None else "n/a"
+    source = " (response cache)" if metrics.cached else ""
+    return (
+        f"⏱️ TTFT {ttft} (leader {leader}), total {metrics.total_s:.2f}s, "
+        f"{sum(metrics.chunks.values())} chunks from {len(metrics.chunks)} agent(s), {metrics.tool_calls} tool calls{source}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompt", nargs="?", help="Request for the CFO team")
+    parser.add_argument("--example", help="Run one of main.EXAMPLE_PROMPTS by title instead")
+    parser.add_argument("--show-tool-results", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the stream metrics as JSON at the end")
+    args = parser.parse_args()
+
+    import main as app
+
+    if args.example:
+        prompt = app.EXAMPLE_PROMPTS[args.example]
+    elif args.prompt:
+        prompt = args.prompt
+    else:
+        parser.error("give a prompt or --example")
+
+    stream = app.stream_team(prompt)
+    render(stream, show_tool_results=args.show_tool_results)
+    if args.json:
+        print(json.dumps(asdict(stream.metrics), indent=2))
+    else:
+        print(format_metrics(stream.metrics))
+
+
+if __name__ == "__main__":
+    main()
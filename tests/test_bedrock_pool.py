@@ -0,0 +1,179 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from bedrock_pool import AsyncThrottledBedrockClient, BedrockClientManager, TokenBucket
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from bedrock_stub import StubState, serve  # noqa: E402
+
+MODEL = "stub.model-v1"
+MESSAGES = [{"role": "user", "content": [{"text": "Safaricom FY25 revenue"}]}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def _bucket(rate_per_minute, capacity=None):
+    """TokenBucket whose waits advance a fake clock instead of sleeping."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute, capacity, clock=clock)
+    bucket._condition.wait = clock.advance
+    return bucket, clock
+
+
+class ScriptedStub(StubState):
+    """Bedrock stub that throttles the requests marked False in `script`, then admits everything."""
+
+    def __init__(self, script):
+        super().__init__(latency=0.0, rpm=0, throttle_rate=0.0)
+        self.script = list(script)
+
+    def admit(self):
+        if self.script and not self.script.pop(0):
+            with self._lock:
+                self.throttled += 1
+            return False
+        return super().admit()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def _start(script=()):
+        state = ScriptedStub(script)
+        server = serve(0, state)
+        servers.append(server)
+        return state, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _manager(endpoint_url="http://127.0.0.1:9", **kwargs):
+    session = boto3.Session(aws_access_key_id="stub", aws_secret_access_key="stub", region_name="us-east-1")
+    return BedrockClientManager(session, endpoint_url=endpoint_url, **kwargs)
+
+
+def test_token_bucket_waits_for_refill_and_debt():
+    bucket, clock = _bucket(60, capacity=2)  # one token per second
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.now == pytest.approx(1.0)
+
+    # Usage above the estimate leaves the bucket in debt that the next caller waits out
+    bucket.charge(3)
+    assert bucket.acquire() == pytest.approx(4.0)
+
+    # Adaptive backoff halves the refill rate
+    bucket.scale = 0.5
+    assert bucket.acquire() == pytest.approx(2.0)
+
+
+def test_token_bucket_disabled_never_waits():
+    bucket, clock = _bucket(0)
+    assert not bucket.enabled
+    assert all(bucket.acquire(1000) == 0.0 for _ in range(5))
+    assert clock.now == 0.0
+
+
+def test_throttle_backoff_is_shared_by_later_callers(stub):
+    state, url = stub(script=[False])
+    manager = _manager(url, max_attempts=1, base_delay=0.2, max_delay=0.2)
+
+    with pytest.raises(ClientError) as error:
+        manager.client.converse(modelId=MODEL, messages=MESSAGES)
+    assert error.value.response["Error"]["Code"] == "ThrottlingException"
+    limiter = manager.limiter(MODEL)
+    assert limiter.backoff_level == 1
+    assert limiter.requests.scale == 0.5
+
+    # The next call, from any caller, waits out the backoff before reaching Bedrock
+    response = manager.client.converse(modelId=MODEL, messages=MESSAGES)
+    assert response["output"]["message"]["content"][0]["text"].startswith("Stub answer")
+    metrics = manager.metrics()[MODEL]
+    assert metrics["throttles"] == 1
+    assert metrics["backoff_wait_s"] > 0
+    assert metrics["backoff_level"] == 0
+    assert state.throttled == 1 and state.served == 1
+
+
+def test_throttled_call_is_retried(stub):
+    state, url = stub(script=[False, False])
+    manager = _manager(url, max_attempts=3, base_delay=0.05, max_delay=0.05)
+
+    manager.client.converse(modelId=MODEL, messages=MESSAGES)
+
+    metrics = manager.metrics()[MODEL]
+    assert (metrics["requests"], metrics["throttles"], metrics["retries"], metrics["errors"]) == (3, 2, 2, 0)
+    assert metrics["input_tokens"] > 0 and metrics["output_tokens"] == 8
+    assert state.served == 1
+
+
+def test_non_retryable_error_is_not_retried():
+    manager = _manager(base_delay=0.01)
+    calls = []
+
+    def operation(**kwargs):
+        calls.append(kwargs)
+        raise ClientError({"Error": {"Code": "ValidationException", "Message": "bad request"}}, "Converse")
+
+    with pytest.raises(ClientError):
+        manager.call(operation, {"modelId": MODEL, "messages": MESSAGES}, stream=False)
+
+    assert len(calls) == 1
+    metrics = manager.metrics()[MODEL]
+    assert (metrics["errors"], metrics["retries"], metrics["throttles"]) == (1, 0, 0)
+    assert manager.limiter(MODEL).backoff_level == 0
+
+
+def test_streamed_usage_replaces_the_token_estimate():
+    manager = _manager(tokens_per_minute=60_000, output_estimate=500)
+    events = [
+        {"contentBlockDelta": {"delta": {"text": "Revenue rose"}}},
+        {"metadata": {"usage": {"inputTokens": 1200, "outputTokens": 300}}},
+    ]
+
+    response = manager.call(
+        lambda **kwargs: {"stream": iter(events)}, {"modelId": MODEL, "messages": MESSAGES}, stream=True
+    )
+    bucket = manager.limiter(MODEL).tokens
+    # Only the estimate is taken until the stream reports usage
+    assert manager.metrics()[MODEL]["input_tokens"] == 0
+    assert bucket._tokens == pytest.approx(60_000 - 500 - len("Safaricom FY25 revenue") // 4, abs=5)
+
+    assert list(response["stream"]) == events
+    metrics = manager.metrics()[MODEL]
+    assert (metrics["input_tokens"], metrics["output_tokens"]) == (1200, 300)
+    assert metrics["latency_p50_s"] is not None
+    assert bucket._tokens == pytest.approx(60_000 - 1500, abs=5)
+
+
+def test_async_client_goes_through_the_pool(stub):
+    state, url = stub()
+    manager = _manager(url)
+
+    async def converse():
+        async with AsyncThrottledBedrockClient(manager.client) as client:
+            return await client.converse(modelId=MODEL, messages=MESSAGES)
+
+    response = asyncio.run(converse())
+    assert response["stopReason"] == "end_turn"
+    assert manager.metrics()[MODEL]["requests"] == 1
+    assert state.served == 1
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data_ import MANIFEST_NAME, download_documents, download_file, make_session
+
+PAYLOAD = bytes(range(256)) * 1024  # 256 KiB, several CHUNK_SIZE chunks
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD at every path with ETag, conditional GET and single byte-range support."""
+
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append({"path": self.path, **dict(self.headers)})
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        byte_range = self.headers.get("Range")
+        if byte_range and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(byte_range.split("=")[1].split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAYLOAD[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_resumes_part_file_with_range_request(server, tmp_path):
+    url, filepath = f"{server}/report.pdf", tmp_path / "report.pdf"
+    (tmp_path / "report.pdf.part").write_bytes(PAYLOAD[:100_000])
+    previous = {"url": url, "status": "partial", "etag": ETAG}
+
+    entry = download_file(make_session(), url, str(filepath), previous)
+
+    assert entry["status"] == "resumed"
+    assert _Handler.requests[-1]["Range"] == "bytes=100000-"
+    assert filepath.read_bytes() == PAYLOAD
+    assert entry["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert not (tmp_path / "report.pdf.part").exists()
+
+
+def test_not_modified_keeps_file(server, tmp_path):
+    url, filepath = f"{server}/report.pdf", tmp_path / "report.pdf"
+    filepath.write_bytes(PAYLOAD)
+    previous = {"url": url, "status": "downloaded", "etag": ETAG, "sha256": hashlib.sha256(PAYLOAD).hexdigest()}
+
+    entry = download_file(make_session(), url, str(filepath), previous)
+
+    assert entry["status"] == "unchanged"
+    assert entry["sha256"] == previous["sha256"]
+    assert _Handler.requests[-1]["If-None-Match"] == ETAG
+    assert filepath.read_bytes() == PAYLOAD
+
+
+def test_range_not_satisfiable_restarts_download(server, tmp_path):
+    url, filepath = f"{server}/report.pdf", tmp_path / "report.pdf"
+    (tmp_path / "report.pdf.part").write_bytes(PAYLOAD + b"stale tail")
+    previous = {"url": url, "status": "partial", "etag": ETAG}
+
+    entry = download_file(make_session(), url, str(filepath), previous)
+
+    assert entry["status"] == "downloaded"
+    assert [request.get("Range") for request in _Handler.requests] == [f"bytes={len(PAYLOAD) + 10}-", None]
+    assert filepath.read_bytes() == PAYLOAD
+
+
+def test_manifest_checksums_match_downloaded_files(server, tmp_path):
+    documents = {
+        "reports": {"a.pdf": f"{server}/a.pdf", "b.pdf": f"{server}/b.pdf"},
+        "slides": {"c.pdf": f"{server}/c.pdf"},
+    }
+
+    manifest = download_documents(documents, base_dir=str(tmp_path), max_workers=3)
+
+    stored = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert stored == manifest
+    assert sorted(manifest) == ["reports/a.pdf", "reports/b.pdf", "slides/c.pdf"]
+    for key, entry in manifest.items():
+        content = (tmp_path / key).read_bytes()
+        assert entry["status"] == "downloaded"
+        assert entry["size"] == len(content) == len(PAYLOAD)
+        assert entry["sha256"] == hashlib.sha256(content).hexdigest()
+
+    # A second run revalidates with the stored ETags and keeps the checksums
+    again = download_documents(documents, base_dir=str(tmp_path), max_workers=3)
+    assert {entry["status"] for entry in again.values()} == {"unchanged"}
+    assert {key: entry["sha256"] for key, entry in again.items()} == {
+        key: entry["sha256"] for key, entry in manifest.items()
+    }
+    assert not any(name.endswith(".part") for _, _, files in os.walk(tmp_path) for name in files)
@@ -0,0 +1,86 @@
+import os
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from file_download_helper import download_skill_artifacts, download_skill_files
+
+XLSX = b"PK\x03\x04" + b"xl/workbook.xml" + b"\x00" * 70_000
+PPTX = b"PK\x03\x04" + b"ppt/presentation.xml" + b"\x00" * 5_000
+
+
+class _Stream:
+    def __init__(self, data, barrier):
+        self.data = data
+        self.barrier = barrier
+
+    def iter_bytes(self, chunk_size):
+        # Every download must be open at the same time before any of them yields data
+        self.barrier.wait(timeout=5)
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start : start + chunk_size]
+
+
+class FakeClient:
+    """Mimics client.beta.files with the streaming-response download."""
+
+    def __init__(self, files, concurrent=1):
+        self.files = files
+        self.barrier = threading.Barrier(concurrent)
+        self.opened = []
+        streaming = SimpleNamespace(download=self._download)
+        self.beta = SimpleNamespace(files=SimpleNamespace(with_streaming_response=streaming))
+
+    @contextmanager
+    def _download(self, file_id, betas):
+        self.opened.append(file_id)
+        yield _Stream(self.files[file_id], self.barrier)
+
+
+def _response(stdout, file_ids):
+    result = SimpleNamespace(stdout=stdout, content=[SimpleNamespace(file_id=file_id) for file_id in file_ids])
+    return SimpleNamespace(content=[SimpleNamespace(type="bash_code_execution_tool_result", content=result)])
+
+
+def test_downloads_stream_concurrently_under_unique_names(tmp_path):
+    files = {"file_aaaaaaaa11111111": XLSX, "file_bbbbbbbb22222222": XLSX, "file_cccccccc33333333": PPTX}
+    client = FakeClient(files, concurrent=3)
+    # The skill printed one name for both workbooks
+    response = _response("Saved budget.xlsx and deck.pptx", list(files))
+
+    manifest = download_skill_artifacts(response, client, output_dir=str(tmp_path), max_workers=3)
+
+    assert sorted(client.opened) == sorted(files)
+    assert [entry["file_id"] for entry in manifest] == list(files)
+    names = {entry["file_id"]: os.path.basename(entry["path"]) for entry in manifest}
+    assert names["file_cccccccc33333333"] == "budget.pptx"
+    # Whichever workbook claims the name second gets its file id suffix
+    workbooks = {names["file_aaaaaaaa11111111"], names["file_bbbbbbbb22222222"]}
+    assert workbooks in ({"budget.xlsx", "budget_22222222.xlsx"}, {"budget.xlsx", "budget_11111111.xlsx"})
+    for entry in manifest:
+        assert entry["error"] is None
+        assert entry["size"] == len(files[entry["file_id"]])
+        assert os.path.getsize(entry["path"]) == entry["size"]
+        assert entry["seconds"] >= 0
+        with open(entry["path"], "rb") as f:
+            assert f.read() == files[entry["file_id"]]
+
+
+def test_default_filename_clashes_get_suffixes(tmp_path):
+    files = {"file_one_00000001": PPTX, "file_two_00000002": PPTX}
+    manifest = download_skill_artifacts(
+        {"file_ids": list(files)}, FakeClient(files, concurrent=2), str(tmp_path), "deck.pptx", max_workers=2
+    )
+    assert {os.path.basename(entry["path"]) for entry in manifest} in (
+        {"deck.pptx", "deck_00000002.pptx"},
+        {"deck.pptx", "deck_00000001.pptx"},
+    )
+
+
+def test_download_skill_files_returns_successful_paths(tmp_path):
+    files = {"file_ok_00000001": XLSX}
+    client = FakeClient(files)
+    paths = download_skill_files({"file_ids": ["file_ok_00000001", "file_missing_0002"]}, client, str(tmp_path))
+    assert paths == [os.path.join(str(tmp_path), "skill_output_00000001.xlsx")]
+    with open(paths[0], "rb") as f:
+        assert f.read() == XLSX
@@ -0,0 +1,53 @@
+import csv
+from datetime import datetime, timezone
+
+import numpy as np
+
+from transaction_anomaly import as_seconds, score_accounts
+
+START = 1_700_000_000
+
+
+def _write(path, rows, stamp):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["account", "amount", "timestamp"])
+        for account, amount, seconds in rows:
+            writer.writerow([account, amount, stamp(seconds)])
+
+
+def _rows():
+    rng = np.random.default_rng(7)
+    rows = []
+    for i in range(3000):
+        rows.append((f"2547{i % 200:08d}", float(rng.integers(50, 5000)), START + i * 60))
+    # One account bursts 40 transactions inside ten minutes
+    rows.extend(("254799999999", 9000.0, START + 3000 * 60 + i * 15) for i in range(40))
+    return sorted(rows, key=lambda row: row[2])
+
+
+def test_as_seconds_parses_epoch_strings():
+    values = np.array(["1700000000", "1700000000123", " 1700000000.5 ", "2023-11-14T22:13:20", ""], dtype=object)
+    seconds = as_seconds(values)
+    assert seconds[:4].tolist() == [START] * 4
+    assert seconds[4] == np.iinfo(np.int64).min
+
+
+def test_epoch_string_csv_matches_iso_csv(tmp_path):
+    rows = _rows()
+    iso = tmp_path / "iso.csv"
+    epoch = tmp_path / "epoch.csv"
+    epoch_ms = tmp_path / "epoch_ms.csv"
+    _write(iso, rows, lambda s: datetime.fromtimestamp(s, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"))
+    _write(epoch, rows, str)
+    _write(epoch_ms, rows, lambda s: str(s * 1000))
+
+    expected = score_accounts(str(iso), batch_rows=500)
+    for path in (epoch, epoch_ms):
+        for batch_rows in (500, 100_000):
+            report = score_accounts(str(path), batch_rows=batch_rows)
+            assert report.rows_skipped == 0
+            assert report.accounts == expected.accounts
+            for name, values in expected.features.items():
+                np.testing.assert_allclose(report.features[name], values)
+            assert report.top(1)[0]["account"] == "254799999999"
@@ -0,0 +1,488 @@
+import inspect
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+FORMATS = ("jsonl", "otlp")
+# OTLP span kinds: 1 = INTERNAL, 3 = CLIENT (a call leaving the process)
+OTLP_KINDS = {"model": 3, "tool": 3}
+KIND_ORDER = ("request", "team", "agent", "tool", "retrieval", "model")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed operation; spans form a tree through parent_id."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: Sequence[Span], service_name: str = "safaricom-cfo-team") -> Dict[str, Any]:
+    """Spans as an OTLP/JSON ExportTraceServiceRequest (importable by Jaeger, Tempo, otel-collector)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "tracing"},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_id or "",
+                                "name": span.name,
+                                "kind": OTLP_KINDS.get(span.kind, 1),
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in {"span.kind": span.kind, **span.attributes}.items()
+                                ],
+                                "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class Tracer:
+    """
+    Collects spans per trace and exports each trace when its root span ends.
+
+    The active span lives in a ContextVar, so nesting follows the call stack,
+    asyncio tasks and any thread started through contextvars.copy_context().
+    Finished traces are appended to `spans.jsonl` and/or written as
+    `<trace_id>.otlp.json` in `directory`.
+
+    Args:
+        directory: Folder for exported traces
+        formats: Any of "jsonl" and "otlp"
+    """
+
+    def __init__(self, directory: str = "./traces", formats: Sequence[str] = ("jsonl",)):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown trace formats {sorted(unknown)}, expected any of {FORMATS}")
+        self.directory = Path(directory)
+        self.formats = tuple(formats)
+        self.last_trace: List[Span] = []
+        self._open: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, kind: str, **attributes: Any) -> Span:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+        )
+        span.set(**attributes)
+        return span
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status, span.error = "error", f"{type(error).__name__}: {error}"
+        with self._lock:
+            trace = self._open.setdefault(span.trace_id, [])
+            trace.append(span)
+            if span.parent_id is not None:
+                return
+            del self._open[span.trace_id]
+        trace.sort(key=lambda s: s.start_ns)
+        self.last_trace = trace
+        self.export(trace)
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span."""
+        span = self.start(name, kind, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, e)
+            raise
+        else:
+            self.end(span)
+        finally:
+            _current_span.reset(token)
+
+    def export(self, spans: List[Span]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if "jsonl" in self.formats:
+            with open(self.directory / "spans.jsonl", "a") as f:
+                for span in spans:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+        if "otlp" in self.formats:
+            with open(self.directory / f"{spans[0].trace_id}.otlp.json", "w") as f:
+                json.dump(to_otlp(spans), f, default=str)
+
+
+def summarize(spans: Sequence[Span], slowest: int = 5) -> str:
+    """
+    Per-kind report of one trace: calls, wall time, self time, tokens and payload bytes.
+
+    Self time is a span's duration minus its children's, so it shows where time
+    was actually spent (e.g. Bedrock vs. Chroma vs. orchestration) rather than
+    counting the same seconds at every level.
+    """
+    if not spans:
+        return "No spans recorded"
+    children: Dict[str, float] = {}
+    for span in spans:
+        if span.parent_id:
+            children[span.parent_id] = children.get(span.parent_id, 0.0) + span.duration_ms
+    rows: Dict[str, Dict[str, float]] = {}
+    for span in spans:
+        row = rows.setdefault(span.kind, {"calls": 0, "wall": 0.0, "self": 0.0, "in": 0, "out": 0, "bytes": 0, "errors": 0})
+        row["calls"] += 1
+        row["wall"] += span.duration_ms
+        row["self"] += max(span.duration_ms - children.get(span.span_id, 0.0), 0.0)
+        row["errors"] += span.status == "error"
+        row["bytes"] += span.attributes.get("input_bytes", 0) + span.attributes.get("output_bytes", 0)
+        if span.kind == "model":
+            row["in"] += span.attributes.get("input_tokens", 0)
+            row["out"] += span.attributes.get("output_tokens", 0)
+
+    root = next((span for span in spans if span.parent_id is None), spans[0])
+    lines = [
+        f"Trace {root.trace_id} ({root.name}): {root.duration_ms / 1000:.2f}s, {len(spans)} spans",
+        "| Kind | Calls | Wall s | Self s | Tokens in | Tokens out | Payload KB | Errors |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for kind in sorted(rows, key=lambda k: KIND_ORDER.index(k) if k in KIND_ORDER else len(KIND_ORDER)):
+        row = rows[kind]
+        lines.append(
+            f"| {kind} | {row['calls']} | {row['wall'] / 1000:.2f} | {row['self'] / 1000:.2f} | {row['in']:,} | "
+            f"{row['out']:,} | {row['bytes'] / 1024:,.1f} | {row['errors']} |"
+        )
+    lines += ["", f"Slowest {slowest} spans (excluding the root):"]
+    for span in sorted((s for s in spans if s is not root), key=lambda s: -s.duration_ms)[:slowest]:
+        lines.append(f"- {span.kind} {span.name}: {span.duration_ms / 1000:.2f}s")
+    return "\n".join(lines)
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def _traced(
+    tracer: Tracer, original: Callable, kind: str, describe: Callable, finish: Callable, lazy: Optional[str] = None
+) -> Callable:
+    """
+    Wrap a method so each call becomes a span.
+
+    `describe(self, args, kwargs)` returns the span name and start attributes;
+    `finish(span, self, args, kwargs, result)` adds attributes from the result.
+    Results that are generators, async iterators or coroutines keep the span
+    open (and current) until they are exhausted or awaited. With `lazy`, the
+    same holds for a generator stored in that attribute of the result and of
+    `self` (FunctionCall.execute returns agno's member delegation that way);
+    the span then records the bytes it yielded as output_bytes.
+    """
+
+    def _close(span: Span, obj, args, kwargs, result, error=None) -> None:
+        if error is None:
+            try:
+                finish(span, obj, args, kwargs, result)
+            except Exception:
+                pass
+        tracer.end(span, error)
+
+    def _step(span: Span, call):
+        token = _current_span.set(span)
+        try:
+            return call()
+        finally:
+            _current_span.reset(token)
+
+    def _iterate(span, obj, args, kwargs, iterator):
+        last = None
+        try:
+            while True:
+                try:
+                    last = _step(span, lambda: next(iterator))
+                except StopIteration:
+                    break
+                yield last
+        except BaseException as e:
+            _close(span, obj, args, kwargs, last, e)
+            raise
+        _close(span, obj, args, kwargs, last)
+
+    async def _aiterate(span, obj, args, kwargs, iterator):
+        last = None
+        try:
+            while True:
+                token = _current_span.set(span)
+                try:
+                    last = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                yield last
+        except BaseException as e:
+            _close(span, obj, args, kwargs, last, e)
+            raise
+        _close(span, obj, args, kwargs, last)
+
+    def _drain(span, obj, args, kwargs, result, iterator):
+        size = 0
+        try:
+            while True:
+                try:
+                    item = _step(span, lambda: next(iterator))
+                except StopIteration:
+                    break
+                size += _size(getattr(item, "content", item))
+                yield item
+        except BaseException as e:
+            _close(span, obj, args, kwargs, result, e)
+            raise
+        span.set(output_bytes=size)
+        _close(span, obj, args, kwargs, result)
+
+    async def _adrain(span, obj, args, kwargs, result, iterator):
+        size = 0
+        try:
+            while True:
+                token = _current_span.set(span)
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _current_span.reset(token)
+                size += _size(getattr(item, "content", item))
+                yield item
+        except BaseException as e:
+            _close(span, obj, args, kwargs, result, e)
+            raise
+        span.set(output_bytes=size)
+        _close(span, obj, args, kwargs, result)
+
+    def _finish(span, obj, args, kwargs, result) -> None:
+        """Close the span, unless the result holds a lazy generator; then close it once that is exhausted."""
+        value = getattr(result, lazy, None) if lazy else None
+        if inspect.isgenerator(value):
+            wrapped = _drain(span, obj, args, kwargs, result, value)
+        elif inspect.isasyncgen(value):
+            wrapped = _adrain(span, obj, args, kwargs, result, value)
+        else:
+            _close(span, obj, args, kwargs, result)
+            return
+        setattr(result, lazy, wrapped)
+        if getattr(obj, lazy, None) is value:
+            setattr(obj, lazy, wrapped)
+
+    async def _await(span, obj, args, kwargs, coroutine):
+        token = _current_span.set(span)
+        try:
+            result = await coroutine
+        except BaseException as e:
+            _close(span, obj, args, kwargs, None, e)
+            raise
+        finally:
+            _current_span.reset(token)
+        _finish(span, obj, args, kwargs, result)
+        return result
+
+    def wrapper(self, *args, **kwargs):
+        name, attributes = describe(self, args, kwargs)
+        span = tracer.start(name, kind, **attributes)
+        try:
+            result = _step(span, lambda: original(self, *args, **kwargs))
+        except BaseException as e:
+            _close(span, self, args, kwargs, None, e)
+            raise
+        if inspect.iscoroutine(result):
+            return _await(span, self, args, kwargs, result)
+        if inspect.isgenerator(result):
+            return _iterate(span, self, args, kwargs, result)
+        if inspect.isasyncgen(result) or hasattr(result, "__anext__"):
+            return _aiterate(span, self, args, kwargs, result)
+        _finish(span, self, args, kwargs, result)
+        return result
+
+    wrapper.__wrapped__ = original
+    wrapper.__traced__ = True
+    wrapper.__name__ = getattr(original, "__name__", "wrapper")
+    wrapper.__doc__ = original.__doc__
+    return wrapper
+
+
+def _run_usage(span: Span, obj, args, kwargs, result) -> None:
+    metrics = getattr(result, "metrics", None)
+    content = getattr(result, "content", None)
+    span.set(
+        input_tokens=getattr(metrics, "input_tokens", None),
+        output_tokens=getattr(metrics, "output_tokens", None),
+        output_bytes=_size(content) if content is not None else None,
+    )
+
+
+def _run_describe(obj, args, kwargs) -> Tuple[str, Dict[str, Any]]:
+    prompt = args[0] if args else kwargs.get("input")
+    return obj.name or type(obj).__name__, {"input_bytes": _size(prompt), "stream": bool(kwargs.get("stream"))}
+
+
+def _model_describe(obj, args, kwargs) -> Tuple[str, Dict[str, Any]]:
+    messages = kwargs.get("messages") or []
+    return obj.id, {
+        "model": obj.id,
+        "messages": len(messages),
+        "tools": len(kwargs.get("tools") or []),
+        "input_bytes": sum(_size(message.content) for message in messages),
+    }
+
+
+def _model_usage(span: Span, obj, args, kwargs, result) -> None:
+    usage = getattr(result, "response_usage", None)
+    span.set(
+        input_tokens=getattr(usage, "input_tokens", None),
+        output_tokens=getattr(usage, "output_tokens", None),
+        output_bytes=_size(getattr(result, "content", None)) + _size(getattr(result, "tool_calls", None)),
+        tool_calls=len(getattr(result, "tool_calls", None) or []) or None,
+    )
+
+
+def _tool_describe(obj, args, kwargs) -> Tuple[str, Dict[str, Any]]:
+    return obj.function.name, {"tool": obj.function.name, "input_bytes": _size(obj.arguments)}
+
+
+def _tool_result(span: Span, obj, args, kwargs, result) -> None:
+    output = getattr(result, "result", None)
+    if not (inspect.isgenerator(output) or inspect.isasyncgen(output)):
+        span.set(output_bytes=_size(output))
+    span.set(tool_status=getattr(result, "status", None))
+    if getattr(result, "status", None) == "failure":
+        span.status, span.error = "error", getattr(result, "error", None)
+
+
+def _search_describe(obj, args, kwargs) -> Tuple[str, Dict[str, Any]]:
+    query = args[0] if args else kwargs.get("query", "")
+    return "knowledge.search", {"input_bytes": _size(query), "max_results": kwargs.get("max_results")}
+
+
+def _search_result(span: Span, obj, args, kwargs, result) -> None:
+    documents = result or []
+    span.set(documents=len(documents), output_bytes=sum(_size(getattr(d, "content", "")) for d in documents))
+
+
+_patched: List[Tuple[Any, str, Callable]] = []
+
+
+def instrument(tracer: Tracer) -> Tracer:
+    """
+    Trace Team and Agent runs, tool calls, knowledge searches and model invocations.
+
+    Patches the agno classes in place, so every Team, Agent, Knowledge and Model
+    in the process is covered, including ones created earlier. Calling it again
+    is a no-op until uninstrument().
+
+    Args:
+        tracer: Tracer receiving the spans
+
+    Returns:
+        The tracer, for chaining
+    """
+    if _patched:
+        return tracer
+    from agno.agent import Agent
+    from agno.knowledge.knowledge import Knowledge
+    from agno.models.base import Model
+    from agno.team import Team
+    from agno.tools.function import FunctionCall
+
+    targets = [
+        (Team, "run", "team", _run_describe, _run_usage, None),
+        (Team, "arun", "team", _run_describe, _run_usage, None),
+        (Agent, "run", "agent", _run_describe, _run_usage, None),
+        (Agent, "arun", "agent", _run_describe, _run_usage, None),
+        # Member delegation returns a generator in FunctionExecutionResult.result that runs the member lazily
+        (FunctionCall, "execute", "tool", _tool_describe, _tool_result, "result"),
+        (FunctionCall, "aexecute", "tool", _tool_describe, _tool_result, "result"),
+        (Knowledge, "search", "retrieval", _search_describe, _search_result, None),
+        (Knowledge, "async_search", "retrieval", _search_describe, _search_result, None),
+        (Model, "_invoke_with_retry", "model", _model_describe, _model_usage, None),
+        (Model, "_ainvoke_with_retry", "model", _model_describe, _model_usage, None),
+        (Model, "_invoke_stream_with_retry", "model", _model_describe, _model_usage, None),
+        (Model, "_ainvoke_stream_with_retry", "model", _model_describe, _model_usage, None),
+    ]
+    for owner, attribute, kind, describe, finish, lazy in targets:
+        original = owner.__dict__[attribute]
+        setattr(owner, attribute, _traced(tracer, original, kind, describe, finish, lazy))
+        _patched.append((owner, attribute, original))
+    return tracer
+
+
+def uninstrument() -> None:
+    """Restore the original agno methods."""
+    while _patched:
+        owner, attribute, original = _patched.pop()
+        setattr(owner, attribute, original)
@@ -0,0 +1,424 @@
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from agno.tools import Toolkit
+
+from tabular_stream import DEFAULT_BATCH_ROWS, as_float, as_text, data_root, iter_batches, read_header
+
+INSTRUCTIONS = (
+    "For M-PESA fraud and anomaly questions over transaction files call describe_transactions to learn the "
+    "columns, then score_transactions. Ground fraud-detection proposals in the scores and the feature that drove "
+    "them; never paste raw transactions or full account numbers into documents."
+)
+
+FEATURES = ("peak_velocity", "peak_window_amount", "amount_spike", "mean_amount", "daily_rate")
+# Counts and amounts are compared on a log scale; amount_spike is already a z-like ratio
+LOG_FEATURES = ("peak_velocity", "peak_window_amount", "mean_amount", "daily_rate")
+FLAG_THRESHOLD = 3.5
+# Floor for the robust spread so near-constant features (most accounts make one transaction per
+# window) do not turn a single extra transaction into an outlier
+MIN_SPREAD = 0.3
+# log10 amount histogram used for approximate percentiles without keeping every amount
+HISTOGRAM_EDGES = np.linspace(-2.0, 10.0, 1201)
+
+
+def _epoch_seconds(numbers: np.ndarray) -> np.ndarray:
+    # Values above 1e11 are milliseconds (1e11 s is the year 5138)
+    numbers = np.where(numbers > 1e11, numbers / 1000.0, numbers)
+    return np.where(np.isnan(numbers), np.iinfo(np.int64).min, numbers).astype(np.int64)
+
+
+def as_seconds(values: np.ndarray) -> np.ndarray:
+    """Timestamp column as int64 epoch seconds; ISO strings or epoch seconds/milliseconds. Unparseable -> NaT."""
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[s]").astype(np.int64)
+    if values.dtype.kind in ("f", "i", "u"):
+        return _epoch_seconds(values.astype(np.float64))
+
+    # The csv module yields strings; epoch numbers must not reach the ISO parser, which reads "1700000000" as a year
+    text = np.char.strip(as_text(values))
+    numeric = np.char.isdigit(np.char.replace(text, ".", "", count=1))
+    seconds = np.full(len(text), np.iinfo(np.int64).min, dtype=np.int64)
+    if numeric.any():
+        seconds[numeric] = _epoch_seconds(text[numeric].astype(np.float64))
+    if not numeric.all():
+        try:
+            seconds[~numeric] = text[~numeric].astype("datetime64[s]").astype(np.int64)
+        except ValueError as e:
+            raise ValueError(f"Timestamps must be ISO dates/times or epoch numbers ({e})")
+    return seconds
+
+
+class _AccountState:
+    """Per-account accumulators in growable arrays, indexed by a dense account id."""
+
+    FIELDS = ("count", "total", "sum_log", "sumsq_log", "max_log", "peak_count", "peak_amount", "first", "last")
+
+    def __init__(self, capacity: int = 1024):
+        self.ids: Dict[str, int] = {}
+        self.arrays = {name: self._empty(name, capacity) for name in self.FIELDS}
+
+    @staticmethod
+    def _empty(name: str, size: int) -> np.ndarray:
+        if name in ("first", "last"):
+            fill = np.iinfo(np.int64).max if name == "first" else np.iinfo(np.int64).min
+            return np.full(size, fill, dtype=np.int64)
+        return np.full(size, -np.inf) if name == "max_log" else np.zeros(size)
+
+    def lookup(self, labels: List[str]) -> np.ndarray:
+        ids = self.ids
+        codes = np.fromiter((ids.setdefault(label, len(ids)) for label in labels), dtype=np.int64, count=len(labels))
+        capacity = len(self.arrays["count"])
+        if len(ids) > capacity:
+            size = max(len(ids), capacity * 2)
+            for name, array in self.arrays.items():
+                grown = self._empty(name, size)
+                grown[:capacity] = array
+                self.arrays[name] = grown
+        return codes
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name][: len(self.ids)]
+
+
+@dataclass
+class AnomalyReport:
+    """Per-account features and anomaly scores, as parallel arrays."""
+
+    accounts: List[str]
+    features: Dict[str, np.ndarray]
+    transactions: np.ndarray
+    total_amount: np.ndarray
+    scores: np.ndarray
+    drivers: List[str]
+    amount_histogram: np.ndarray
+    rows_read: int
+    rows_skipped: int
+    window_seconds: int
+    seconds: float
+
+    @property
+    def flagged(self) -> int:
+        return int((self.scores >= FLAG_THRESHOLD).sum())
+
+    def amount_percentile(self, q: float) -> float:
+        """Approximate amount percentile from the log10 histogram."""
+        counts = np.cumsum(self.amount_histogram)
+        if not counts.size or counts[-1] == 0:
+            return float("nan")
+        index = int(np.searchsorted(counts, q / 100.0 * counts[-1]))
+        return float(10 ** HISTOGRAM_EDGES[min(index + 1, len(HISTOGRAM_EDGES) - 1)])
+
+    def top(self, n: int = 20) -> List[Dict[str, object]]:
+        """The `n` highest-scoring accounts with their features."""
+        order = np.argsort(-self.scores, kind="stable")[:n]
+        return [
+            {
+                "account": self.accounts[i],
+                "score": float(self.scores[i]),
+                "driver": self.drivers[i],
+                "transactions": int(self.transactions[i]),
+                "total_amount": float(self.total_amount[i]),
+                **{name: float(values[i]) for name, values in self.features.items()},
+            }
+            for i in order
+        ]
+
+
+def _window_peaks(
+    account: np.ndarray, seconds: np.ndarray, amount: np.ndarray, fresh: np.ndarray, window: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Peak transaction count and amount inside any `window`-second rolling window, per account.
+
+    Rows are sorted by (account, time) and each row's window start is found with one
+    searchsorted over a combined key, so the whole batch is handled without Python loops.
+    Rows carried over from the previous batch (`fresh` False) fill the windows but are
+    not credited again.
+
+    Returns:
+        Accounts present among the fresh rows, their peak counts and their peak amounts
+    """
+    order = np.lexsort((seconds, account))
+    account, seconds, amount, fresh = account[order], seconds[order], amount[order], fresh[order]
+    key = account * (1 << 32) + (seconds - seconds.min())
+    position = np.arange(len(key))
+    start = np.searchsorted(key, key - window + 1, side="left")
+    count = (position - start + 1).astype(np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(amount)))
+    window_amount = cumulative[position + 1] - cumulative[start]
+    count[~fresh] = 0.0
+    window_amount[~fresh] = 0.0
+
+    boundaries = np.flatnonzero(np.concatenate(([True], account[1:] != account[:-1])))
+    accounts = account[boundaries]
+    has_fresh = np.add.reduceat(fresh.astype(np.int64), boundaries) > 0
+    peaks = np.maximum.reduceat(count, boundaries)
+    peak_amounts = np.maximum.reduceat(window_amount, boundaries)
+    return accounts[has_fresh], peaks[has_fresh], peak_amounts[has_fresh]
+
+
+def _robust_z(values: np.ndarray) -> np.ndarray:
+    """(x - median) / (1.4826 * MAD), with the spread floored at MIN_SPREAD."""
+    median = np.median(values)
+    spread = max(1.4826 * np.median(np.abs(values - median)), MIN_SPREAD)
+    return (values - median) / spread
+
+
+def score_accounts(
+    paths: Union[str, Sequence[str]],
+    account_column: str = "account",
+    amount_column: str = "amount",
+    time_column: str = "timestamp",
+    window_minutes: float = 60,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    root: Optional[Path] = None,
+) -> AnomalyReport:
+    """
+    Stream transaction files and score every account for anomalous behaviour.
+
+    Per account the stream accumulates transaction count, total and log-amount
+    moments, the largest transaction and the peak count and value inside any
+    rolling `window_minutes` window (velocity). Rows from the tail of each batch
+    are carried into the next so windows span batch and file boundaries; files
+    are expected in time order, as daily M-PESA extracts are.
+
+    Scoring is a robust z-score model: counts and amounts are log-scaled, each
+    feature is centred on the population median and divided by the MAD (floored
+    at MIN_SPREAD), and the account score is the
+    largest positive z across features (the feature that drove it is kept).
+    Scores of 3.5 and above are flagged.
+
+    Args:
+        paths: CSV/Parquet files or glob patterns
+        account_column: Account/MSISDN column
+        amount_column: Transaction amount column
+        time_column: Timestamp column (ISO strings or epoch seconds/milliseconds)
+        window_minutes: Rolling window length for velocity features
+        filters: Column -> value or list of values rows must match (e.g. transaction type)
+        batch_rows: Rows per streamed batch
+        root: Data folder the files must be inside (see tabular_stream.expand_paths)
+
+    Returns:
+        AnomalyReport with features and scores per account
+    """
+    started = time.perf_counter()
+    filters = filters or {}
+    window = max(int(window_minutes * 60), 1)
+    columns = list(dict.fromkeys([account_column, amount_column, time_column, *filters]))
+    state = _AccountState()
+    histogram = np.zeros(len(HISTOGRAM_EDGES) - 1, dtype=np.int64)
+    carry = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    rows_read = rows_skipped = 0
+
+    for batch in iter_batches(paths, columns, batch_rows, root):
+        size = len(batch[account_column])
+        rows_read += size
+        amount = as_float(batch[amount_column])
+        seconds = as_seconds(batch[time_column])
+        mask = ~np.isnan(amount) & (amount > 0) & (seconds != np.iinfo(np.int64).min)
+        for column, wanted in filters.items():
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            mask &= np.isin(as_text(batch[column]), wanted)
+        rows_skipped += int(size - mask.sum())
+        if not mask.any():
+            continue
+
+        amount, seconds = amount[mask], seconds[mask]
+        labels, inverse = np.unique(as_text(batch[account_column][mask]), return_inverse=True)
+        account = state.lookup(labels.tolist())[inverse]
+        log_amount = np.log10(amount)
+
+        n = len(state.ids)
+        state["count"][:] += np.bincount(account, minlength=n)
+        state["total"][:] += np.bincount(account, weights=amount, minlength=n)
+        state["sum_log"][:] += np.bincount(account, weights=log_amount, minlength=n)
+        state["sumsq_log"][:] += np.bincount(account, weights=log_amount**2, minlength=n)
+        np.maximum.at(state["max_log"], account, log_amount)
+        np.minimum.at(state["first"], account, seconds)
+        np.maximum.at(state["last"], account, seconds)
+        histogram += np.histogram(log_amount, bins=HISTOGRAM_EDGES)[0]
+
+        all_account = np.concatenate((carry[0], account))
+        all_seconds = np.concatenate((carry[1], seconds))
+        all_amount = np.concatenate((carry[2], amount))
+        fresh = np.concatenate((np.zeros(len(carry[0]), dtype=bool), np.ones(len(account), dtype=bool)))
+        accounts, peaks, peak_amounts = _window_peaks(all_account, all_seconds, all_amount, fresh, window)
+        state["peak_count"][accounts] = np.maximum(state["peak_count"][accounts], peaks)
+        state["peak_amount"][accounts] = np.maximum(state["peak_amount"][accounts], peak_amounts)
+
+        recent = all_seconds > all_seconds.max() - window
+        carry = (all_account[recent], all_seconds[recent], all_amount[recent])
+
+    accounts = list(state.ids)
+    count = state["count"]
+    if not accounts:
+        raise ValueError("No valid transactions found (check the column names, filters and amounts)")
+    mean_log = state["sum_log"] / count
+    std_log = np.sqrt(np.maximum(state["sumsq_log"] / count - mean_log**2, 0.0))
+    days = max((state["last"].max() - state["first"].min()) / 86400.0, 1.0)
+    features = {
+        "peak_velocity": state["peak_count"].copy(),
+        "peak_window_amount": state["peak_amount"].copy(),
+        # How far the largest transaction sits above the account's own typical amount
+        "amount_spike": (state["max_log"] - mean_log) / np.maximum(std_log, 0.25),
+        "mean_amount": 10**mean_log,
+        "daily_rate": count / days,
+    }
+    z = np.stack(
+        [
+            _robust_z(np.log1p(np.maximum(features[name], 0.0)) if name in LOG_FEATURES else features[name])
+            for name in FEATURES
+        ],
+        axis=1,
+    )
+    scores = np.maximum(z.max(axis=1), 0.0)
+    drivers = [FEATURES[i] for i in z.argmax(axis=1)]
+    return AnomalyReport(
+        accounts=accounts,
+        features=features,
+        transactions=count.astype(np.int64),
+        total_amount=state["total"].copy(),
+        scores=scores,
+        drivers=drivers,
+        amount_histogram=histogram,
+        rows_read=rows_read,
+        rows_skipped=rows_skipped,
+        window_seconds=window,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def mask_account(account: str) -> str:
+    """Hide the middle of an account number/MSISDN (254712345678 -> 2547****5678)."""
+    if len(account) <= 6:
+        return account
+    keep = max(2, len(account) // 3)
+    return account[:keep] + "*" * (len(account) - 2 * keep) + account[-keep:]
+
+
+def format_report(report: AnomalyReport, top_n: int = 20, mask: bool = True) -> str:
+    """Markdown summary statistics and the top suspicious accounts."""
+    per_minute = report.rows_read / max(report.seconds, 1e-9) * 60
+    accounts = len(report.accounts)
+    lines = [
+        f"{report.rows_read:,} rows streamed in {report.seconds:.2f}s ({per_minute:,.0f} rows/min), "
+        f"{report.rows_skipped:,} skipped; {accounts:,} accounts; window {report.window_seconds // 60} min",
+        f"Amounts: median ~{report.amount_percentile(50):,.0f}, p95 ~{report.amount_percentile(95):,.0f}, "
+        f"p99 ~{report.amount_percentile(99):,.0f}, total {report.total_amount.sum():,.0f}",
+        f"Flagged: {report.flagged:,} accounts ({report.flagged / accounts:.2%}) with score >= {FLAG_THRESHOLD}",
+        "",
+        "| Feature | Median | p99 | Max |",
+        "|---|---|---|---|",
+    ]
+    for name in FEATURES:
+        values = report.features[name]
+        median, p99, peak = np.percentile(values, [50, 99, 100])
+        lines.append(f"| {name} | {median:,.2f} | {p99:,.2f} | {peak:,.2f} |")
+
+    drivers = {}
+    for driver, score in zip(report.drivers, report.scores):
+        if score >= FLAG_THRESHOLD:
+            drivers[driver] = drivers.get(driver, 0) + 1
+    if drivers:
+        lines += ["", "Flagged by driver: " + ", ".join(f"{k} {v:,}" for k, v in sorted(drivers.items()))]
+
+    lines += [
+        "",
+        f"Top {top_n} suspicious accounts",
+        "| Account | Score | Driver | Txns | Total | Peak txns/window | Peak window amount | Amount spike |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for item in report.top(top_n):
+        account = mask_account(item["account"]) if mask else item["account"]
+        lines.append(
+            f"| {account} | {item['score']:.1f} | {item['driver']} | {item['transactions']:,} | "
+            f"{item['total_amount']:,.0f} | {item['peak_velocity']:,.0f} | {item['peak_window_amount']:,.0f} | "
+            f"{item['amount_spike']:.1f} |"
+        )
+    return "\n".join(lines)
+
+
+class AnomalyTools(Toolkit):
+    """
+    M-PESA transaction anomaly scoring over large transaction files for the AI & Innovation Officer.
+
+    Tools only read files inside `data_dir` (default: $LEDGER_DATA_DIR, else ./finance_data).
+    """
+
+    def __init__(
+        self,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        mask_accounts: bool = True,
+        data_dir: Optional[str] = None,
+        **kwargs,
+    ):
+        self.batch_rows = batch_rows
+        self.data_dir = data_root(data_dir)
+        self.mask_accounts = mask_accounts
+        super().__init__(
+            name="transaction_anomaly",
+            tools=[self.describe_transactions, self.score_transactions],
+            instructions=INSTRUCTIONS,
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def describe_transactions(self, path: str) -> str:
+        """Use this function to see the columns and first rows of a transaction file before scoring it.
+
+        Args:
+            path (str): CSV or Parquet transaction file, relative to the data folder.
+
+        Returns:
+            str: JSON with the column names and a few sample rows.
+        """
+        try:
+            return json.dumps(read_header(path, root=self.data_dir), default=str)
+        except (OSError, ImportError, ValueError) as e:
+            return f"Error: {e}"
+
+    def score_transactions(
+        self,
+        paths: List[str],
+        account_column: str = "account",
+        amount_column: str = "amount",
+        time_column: str = "timestamp",
+        window_minutes: float = 60,
+        filters: Optional[Dict[str, str]] = None,
+        top_n: int = 20,
+    ) -> str:
+        """Use this function to score accounts in M-PESA transaction files for anomalies (velocity, amount spikes).
+
+        Args:
+            paths (List[str]): CSV/Parquet transaction files or glob patterns relative to the data folder,
+                in time order, e.g. ["mpesa/2025-*.csv"].
+            account_column (str): Account or MSISDN column.
+            amount_column (str): Transaction amount column.
+            time_column (str): Timestamp column (ISO date-times or epoch seconds/milliseconds).
+            window_minutes (float): Rolling window for velocity features. Defaults to 60.
+            filters (Optional[Dict[str, str]]): Only include rows matching these values, e.g. {"type": "P2P"}.
+            top_n (int): Number of suspicious accounts to return. Defaults to 20.
+
+        Returns:
+            str: Summary statistics, feature distributions and the top suspicious accounts as markdown.
+        """
+        try:
+            report = score_accounts(
+                paths,
+                account_column=account_column,
+                amount_column=amount_column,
+                time_column=time_column,
+                window_minutes=window_minutes,
+                filters=filters,
+                batch_rows=self.batch_rows,
+                root=self.data_dir,
+            )
+            return format_report(report, top_n=top_n, mask=self.mask_accounts)
+        except (OSError, ImportError, ValueError) as e:
+            return f"Error: {e}"
@@ -0,0 +1,307 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from agno.tools import Toolkit
+
+INSTRUCTIONS = (
+    "For cash-flow forecasts, M-PESA float/liquidity buffers and KES/USD/ETB exposure call simulate_cash_flows "
+    "instead of estimating in prose, and quote its percentile bands and shortfall probabilities."
+)
+
+DAYS_PER_YEAR = 365
+
+
+@dataclass
+class TreasuryScenario:
+    """
+    Inputs of a daily cash-flow simulation. Amounts are in KES unless the name says otherwise.
+
+    Args:
+        opening_cash: Cash at day 0
+        daily_inflow_mean: Mean net operating inflow per day
+        daily_inflow_std: Standard deviation of the daily net operating inflow
+        horizon_days: Number of simulated days
+        min_cash_balance: Balance below which the day counts as a liquidity shortfall
+            (e.g. the M-PESA float requirement plus a buffer)
+        dividends: Day -> KES dividend outflow
+        capex_usd: Day -> USD capex outflow (Ethiopia), paid at the simulated USD/KES rate
+        ethiopia_daily_net_etb: Net ETB inflow per day from Ethiopia, converted through USD to KES
+        usd_kes_spot / usd_etb_spot: Starting FX rates (local currency per USD)
+        usd_kes_vol / usd_etb_vol: Annualized FX volatilities
+        usd_kes_drift / usd_etb_drift: Annualized expected depreciation against USD
+        fx_correlation: Correlation between KES and ETB shocks
+    """
+
+    opening_cash: float
+    daily_inflow_mean: float
+    daily_inflow_std: float
+    horizon_days: int = 90
+    min_cash_balance: float = 0.0
+    dividends: Dict[int, float] = field(default_factory=dict)
+    capex_usd: Dict[int, float] = field(default_factory=dict)
+    ethiopia_daily_net_etb: float = 0.0
+    usd_kes_spot: float = 129.0
+    usd_etb_spot: float = 130.0
+    usd_kes_vol: float = 0.08
+    usd_etb_vol: float = 0.25
+    usd_kes_drift: float = 0.03
+    usd_etb_drift: float = 0.30
+    fx_correlation: float = 0.2
+
+    def __post_init__(self):
+        if int(self.horizon_days) < 1:
+            raise ValueError(f"horizon_days must be at least 1, got {self.horizon_days}")
+        self.horizon_days = int(self.horizon_days)
+        if not -1.0 <= self.fx_correlation <= 1.0:
+            raise ValueError(f"fx_correlation must be between -1 and 1, got {self.fx_correlation}")
+
+    def schedule(self, amounts: Dict[int, float]) -> np.ndarray:
+        """Amounts keyed by day (1-based) as a dense per-day array; days past the horizon are dropped."""
+        dense = np.zeros(self.horizon_days)
+        for day, amount in amounts.items():
+            if 1 <= int(day) <= self.horizon_days:
+                dense[int(day) - 1] += amount
+        return dense
+
+
+@dataclass
+class SimulationResult:
+    checkpoints: np.ndarray  # days reported on
+    balance_bands: Dict[int, np.ndarray]  # percentile -> balance at each checkpoint
+    shortfall_by_day: np.ndarray  # share of paths that breached min_cash_balance by each checkpoint
+    min_balance_bands: Dict[int, float]
+    usd_kes_bands: Dict[int, float]  # terminal USD/KES percentiles
+    usd_etb_bands: Dict[int, float]
+    capex_fx_cost_bands: Dict[int, float]  # extra KES paid for USD capex versus the spot rate
+    paths: int
+    seconds: float
+
+
+PERCENTILES = (5, 50, 95)
+
+
+def _fx_paths(rng: np.random.Generator, scenario: TreasuryScenario, batch: int):
+    """Correlated geometric Brownian motion for USD/KES and USD/ETB, shape (batch, days)."""
+    dt = 1.0 / DAYS_PER_YEAR
+    shocks = rng.standard_normal((2, batch, scenario.horizon_days))
+    rho = scenario.fx_correlation
+    kes_shock = shocks[0]
+    etb_shock = rho * shocks[0] + np.sqrt(1.0 - rho**2) * shocks[1]
+
+    def _path(spot, drift, vol, shock):
+        steps = (drift - 0.5 * vol**2) * dt + vol * np.sqrt(dt) * shock
+        return spot * np.exp(np.cumsum(steps, axis=1))
+
+    usd_kes = _path(scenario.usd_kes_spot, scenario.usd_kes_drift, scenario.usd_kes_vol, kes_shock)
+    usd_etb = _path(scenario.usd_etb_spot, scenario.usd_etb_drift, scenario.usd_etb_vol, etb_shock)
+    return usd_kes, usd_etb
+
+
+def simulate_treasury(
+    scenario: TreasuryScenario,
+    paths: int = 20_000,
+    checkpoints: Optional[List[int]] = None,
+    batch_size: int = 5_000,
+    seed: Optional[int] = None,
+) -> SimulationResult:
+    """
+    Monte Carlo simulation of daily cash balances with stochastic inflows and FX.
+
+    Paths are simulated in batches of `batch_size` so memory stays bounded for
+    long horizons; only the checkpoint columns and per-path statistics are
+    kept from each batch.
+
+    Args:
+        scenario: Cash-flow, dividend, capex and FX assumptions
+        paths: Number of simulated paths
+        checkpoints: Days to report percentile bands for (default: 6 evenly spaced days)
+        batch_size: Paths simulated per array batch
+        seed: Random seed for reproducible results
+
+    Returns:
+        SimulationResult with percentile bands and shortfall probabilities
+
+    Raises:
+        ValueError: If `paths` or `batch_size` is below 1
+    """
+    if paths < 1:
+        raise ValueError(f"paths must be at least 1, got {paths}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    started = time.perf_counter()
+    days = scenario.horizon_days
+    if checkpoints is None:
+        checkpoints = sorted({max(1, round(days * step / 6)) for step in range(1, 7)})
+    checkpoint_idx = np.asarray([min(max(int(day), 1), days) for day in checkpoints]) - 1
+
+    rng = np.random.default_rng(seed)
+    dividends = scenario.schedule(scenario.dividends)
+    capex_usd = scenario.schedule(scenario.capex_usd)
+
+    balances, running_mins, minimums, kes_end, etb_end, fx_costs = [], [], [], [], [], []
+    for start in range(0, paths, batch_size):
+        batch = min(batch_size, paths - start)
+        usd_kes, usd_etb = _fx_paths(rng, scenario, batch)
+        inflows = scenario.daily_inflow_mean + scenario.daily_inflow_std * rng.standard_normal((batch, days))
+        ethiopia_kes = scenario.ethiopia_daily_net_etb / usd_etb * usd_kes
+        net = inflows + ethiopia_kes - dividends - capex_usd * usd_kes
+        balance = scenario.opening_cash + np.cumsum(net, axis=1)
+        running_min = np.minimum.accumulate(balance, axis=1)
+
+        balances.append(balance[:, checkpoint_idx])
+        running_mins.append(running_min[:, checkpoint_idx])
+        minimums.append(running_min[:, -1])
+        kes_end.append(usd_kes[:, -1])
+        etb_end.append(usd_etb[:, -1])
+        fx_costs.append((capex_usd * (usd_kes - scenario.usd_kes_spot)).sum(axis=1))
+
+    balances = np.concatenate(balances)
+    running_mins = np.concatenate(running_mins)
+    minimums = np.concatenate(minimums)
+
+    def _bands(values: np.ndarray) -> Dict[int, float]:
+        return dict(zip(PERCENTILES, np.percentile(values, PERCENTILES)))
+
+    return SimulationResult(
+        checkpoints=checkpoint_idx + 1,
+        balance_bands=dict(zip(PERCENTILES, np.percentile(balances, PERCENTILES, axis=0))),
+        shortfall_by_day=(running_mins < scenario.min_cash_balance).mean(axis=0),
+        min_balance_bands=_bands(minimums),
+        usd_kes_bands=_bands(np.concatenate(kes_end)),
+        usd_etb_bands=_bands(np.concatenate(etb_end)),
+        capex_fx_cost_bands=_bands(np.concatenate(fx_costs)),
+        paths=paths,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _kes(value: float) -> str:
+    for divisor, suffix in ((1e9, "B"), (1e6, "M")):
+        if abs(value) >= divisor:
+            return f"KES {value / divisor:,.2f}{suffix}"
+    return f"KES {value:,.0f}"
+
+
+def format_result(result: SimulationResult, scenario: TreasuryScenario) -> str:
+    """Compact markdown report of a simulation result."""
+    lines = [
+        f"{result.paths:,} paths x {scenario.horizon_days} days in {result.seconds * 1000:.0f} ms",
+        "",
+        "| Day | P5 balance | P50 balance | P95 balance | P(shortfall by day) |",
+        "|---|---|---|---|---|",
+    ]
+    for i, day in enumerate(result.checkpoints):
+        lines.append(
+            f"| {day} | {_kes(result.balance_bands[5][i])} | {_kes(result.balance_bands[50][i])} | "
+            f"{_kes(result.balance_bands[95][i])} | {result.shortfall_by_day[i]:.1%} |"
+        )
+    lines += [
+        "",
+        f"Shortfall threshold: {_kes(scenario.min_cash_balance)}; "
+        f"probability of breaching it within {scenario.horizon_days} days: {result.shortfall_by_day[-1]:.1%}",
+        f"Lowest balance P5 / P50: {_kes(result.min_balance_bands[5])} / {_kes(result.min_balance_bands[50])}",
+        f"USD/KES at day {scenario.horizon_days} P5 / P50 / P95: "
+        + " / ".join(f"{result.usd_kes_bands[p]:.2f}" for p in PERCENTILES),
+        f"USD/ETB at day {scenario.horizon_days} P5 / P50 / P95: "
+        + " / ".join(f"{result.usd_etb_bands[p]:.2f}" for p in PERCENTILES),
+    ]
+    if scenario.capex_usd:
+        lines.append(
+            "Extra KES cost of USD capex vs spot P50 / P95: "
+            f"{_kes(result.capex_fx_cost_bands[50])} / {_kes(result.capex_fx_cost_bands[95])}"
+        )
+    return "\n".join(lines)
+
+
+def _by_day(payments: Optional[List[Dict[str, float]]], amount_key: str) -> Dict[int, float]:
+    """Sum [{"day": d, amount_key: x}, ...] per day."""
+    totals: Dict[int, float] = {}
+    for payment in payments or []:
+        day = int(payment["day"])
+        totals[day] = totals.get(day, 0.0) + float(payment[amount_key])
+    return totals
+
+
+class TreasuryTools(Toolkit):
+    """Monte Carlo cash-flow and FX exposure simulator for the Treasury Manager."""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            name="treasury_simulation",
+            tools=[self.simulate_cash_flows],
+            instructions=INSTRUCTIONS,
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def simulate_cash_flows(
+        self,
+        opening_cash_kes: float,
+        daily_inflow_mean_kes: float,
+        daily_inflow_std_kes: float,
+        horizon_days: int = 90,
+        min_cash_balance_kes: float = 0.0,
+        dividends: Optional[List[Dict[str, float]]] = None,
+        ethiopia_capex_usd: Optional[List[Dict[str, float]]] = None,
+        ethiopia_daily_net_etb: float = 0.0,
+        usd_kes_spot: float = 129.0,
+        usd_etb_spot: float = 130.0,
+        usd_kes_annual_vol: float = 0.08,
+        usd_etb_annual_vol: float = 0.25,
+        usd_kes_annual_drift: float = 0.03,
+        usd_etb_annual_drift: float = 0.30,
+        fx_correlation: float = 0.2,
+        paths: int = 20000,
+        seed: Optional[int] = None,
+    ) -> str:
+        """Use this function to simulate daily cash balances with dividend outflows, USD capex and stochastic FX.
+
+        Args:
+            opening_cash_kes (float): Cash on hand today in KES.
+            daily_inflow_mean_kes (float): Mean net operating cash inflow per day in KES.
+            daily_inflow_std_kes (float): Standard deviation of the daily net inflow in KES.
+            horizon_days (int): Days to simulate. Defaults to 90.
+            min_cash_balance_kes (float): Minimum balance (e.g. M-PESA float requirement plus buffer); falling
+                below it counts as a liquidity shortfall.
+            dividends (Optional[List[Dict[str, float]]]): Dividend payments as [{"day": 30, "amount_kes": 48e9}].
+            ethiopia_capex_usd (Optional[List[Dict[str, float]]]): Ethiopia capex payments in USD as
+                [{"day": 15, "amount_usd": 20e6}].
+            ethiopia_daily_net_etb (float): Net daily ETB cash flow from Ethiopia (negative for a cash burn).
+            usd_kes_spot (float): Current KES per USD.
+            usd_etb_spot (float): Current ETB per USD.
+            usd_kes_annual_vol (float): Annualized USD/KES volatility as a decimal.
+            usd_etb_annual_vol (float): Annualized USD/ETB volatility as a decimal.
+            usd_kes_annual_drift (float): Expected annual KES depreciation against USD as a decimal.
+            usd_etb_annual_drift (float): Expected annual ETB depreciation against USD as a decimal.
+            fx_correlation (float): Correlation between KES and ETB moves.
+            paths (int): Number of Monte Carlo paths. Defaults to 20000.
+            seed (Optional[int]): Random seed for reproducible results.
+
+        Returns:
+            str: Percentile bands of the cash balance over time, shortfall probabilities, FX percentiles and
+                the extra KES cost of USD capex.
+        """
+        try:
+            scenario = TreasuryScenario(
+                opening_cash=opening_cash_kes,
+                daily_inflow_mean=daily_inflow_mean_kes,
+                daily_inflow_std=daily_inflow_std_kes,
+                horizon_days=horizon_days,
+                min_cash_balance=min_cash_balance_kes,
+                dividends=_by_day(dividends, "amount_kes"),
+                capex_usd=_by_day(ethiopia_capex_usd, "amount_usd"),
+                ethiopia_daily_net_etb=ethiopia_daily_net_etb,
+                usd_kes_spot=usd_kes_spot,
+                usd_etb_spot=usd_etb_spot,
+                usd_kes_vol=usd_kes_annual_vol,
+                usd_etb_vol=usd_etb_annual_vol,
+                usd_kes_drift=usd_kes_annual_drift,
+                usd_etb_drift=usd_etb_annual_drift,
+                fx_correlation=fx_correlation,
+            )
+            result = simulate_treasury(scenario, paths=paths, seed=seed)
+        except (KeyError, TypeError, ValueError) as e:
+            return f"Error: {e}"
+        return format_result(result, scenario)
@@ -0,0 +1,355 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from agno.tools import Toolkit
+
+INSTRUCTIONS = (
+    "Compute NPV, IRR, payback and sensitivity grids with evaluate_investment, evaluate_cash_flows and "
+    "sensitivity_analysis instead of doing the arithmetic yourself or in generated code. Quote the tables they return."
+)
+
+
+def project_cash_flows(
+    year1_revenue: np.ndarray,
+    growth: np.ndarray,
+    capex: np.ndarray,
+    years: int,
+    ebitda_margin: float = 0.4,
+    tax_rate: float = 0.0,
+    capex_phasing: Optional[List[float]] = None,
+) -> np.ndarray:
+    """
+    Build yearly cash flows for many scenarios at once.
+
+    Revenue grows at a constant rate from year 1; operating cash flow is
+    revenue * EBITDA margin after tax. Capex is spent from year 0 following
+    `capex_phasing` (default: all of it in year 0).
+
+    Args:
+        year1_revenue: Year 1 revenue per scenario, shape (S,)
+        growth: Annual revenue growth per scenario, shape (S,)
+        capex: Total capex per scenario, shape (S,)
+        years: Number of operating years
+        ebitda_margin: EBITDA as a share of revenue
+        tax_rate: Tax charged on EBITDA
+        capex_phasing: Share of capex spent in year 0, 1, ... (should sum to 1)
+
+    Returns:
+        Cash flows of shape (S, years + 1), year 0 first
+
+    Raises:
+        ValueError: If `years` is below 1
+    """
+    if int(years) < 1:
+        raise ValueError(f"years must be at least 1, got {years}")
+    years = int(years)
+    periods = np.arange(1, years + 1)
+    revenue = year1_revenue[:, None] * (1.0 + growth[:, None]) ** (periods - 1)
+    flows = np.zeros((len(growth), years + 1))
+    flows[:, 1:] = revenue * ebitda_margin * (1.0 - tax_rate)
+    phasing = np.asarray(capex_phasing or [1.0], dtype=float)[: years + 1]
+    flows[:, : len(phasing)] -= capex[:, None] * phasing
+    return flows
+
+
+def npv(rates: np.ndarray, cash_flows: np.ndarray) -> np.ndarray:
+    """NPV of each row of `cash_flows` (year 0 undiscounted) at the matching rate; rates must be above -100%."""
+    if np.any(np.asarray(rates) <= -1.0):
+        raise ValueError("discount rates must be above -1 (-100%)")
+    periods = np.arange(cash_flows.shape[1])
+    return (cash_flows / (1.0 + np.asarray(rates)[..., None]) ** periods).sum(axis=-1)
+
+
+def irr(cash_flows: np.ndarray, low: float = -0.99, high: float = 10.0, iterations: int = 100) -> np.ndarray:
+    """
+    IRR of every row at once by vectorized bisection.
+
+    Bisection is slower than Newton per scenario but never diverges and runs
+    all scenarios in the same array operations. Rows whose NPV does not change
+    sign between `low` and `high` get NaN.
+    """
+    rows = cash_flows.shape[0]
+    lo = np.full(rows, low)
+    hi = np.full(rows, high)
+    npv_lo = npv(lo, cash_flows)
+    valid = np.sign(npv_lo) != np.sign(npv(hi, cash_flows))
+    for _ in range(iterations):
+        mid = (lo + hi) / 2.0
+        npv_mid = npv(mid, cash_flows)
+        same_side = np.sign(npv_mid) == np.sign(npv_lo)
+        lo = np.where(same_side, mid, lo)
+        npv_lo = np.where(same_side, npv_mid, npv_lo)
+        hi = np.where(same_side, hi, mid)
+    return np.where(valid, (lo + hi) / 2.0, np.nan)
+
+
+def payback_period(cash_flows: np.ndarray) -> np.ndarray:
+    """
+    Years until cumulative cash flow turns non-negative, interpolated within the year.
+
+    0 when cumulative cash is never negative (nothing to pay back), NaN if it never recovers.
+    """
+    if cash_flows.shape[1] == 0:
+        raise ValueError("cash_flows needs at least one year")
+    cumulative = np.cumsum(cash_flows, axis=1)
+    # Year t recovers the investment when cumulative cash goes from negative at t-1 to non-negative at t
+    crossed = (cumulative[:, 1:] >= 0) & (cumulative[:, :-1] < 0)
+    first = np.argmax(crossed, axis=1) + 1
+    rows = np.arange(len(first))
+    found = crossed[rows, first - 1]
+    previous = cumulative[rows, first - 1]
+    inflow = cash_flows[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(inflow > 0, -previous / inflow, 0.0)
+    never_negative = (cumulative >= 0).all(axis=1)
+    return np.where(never_negative, 0.0, np.where(found, first - 1 + fraction, np.nan))
+
+
+def sensitivity_grid(
+    year1_revenue: float,
+    growth_rates: List[float],
+    capex_values: List[float],
+    discount_rates: List[float],
+    years: int,
+    ebitda_margin: float = 0.4,
+    tax_rate: float = 0.0,
+    capex_phasing: Optional[List[float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every growth x capex x discount rate combination in one pass.
+
+    Returns:
+        Dict of flat arrays (one entry per scenario): growth, capex, discount_rate,
+        npv, irr and payback
+
+    Raises:
+        ValueError: If any of the value lists is empty or `years` is below 1
+    """
+    axes = {"growth_rates": growth_rates, "capex_values": capex_values, "discount_rates": discount_rates}
+    for name, values in axes.items():
+        if len(values) == 0:
+            raise ValueError(f"{name} needs at least one value")
+    mesh = np.meshgrid(growth_rates, capex_values, discount_rates, indexing="ij")
+    growth, capex, rate = (axis.ravel() for axis in mesh)
+    flows = project_cash_flows(
+        np.full(growth.shape, float(year1_revenue)), growth, capex, years, ebitda_margin, tax_rate, capex_phasing
+    )
+    # IRR and payback do not depend on the discount rate: compute them once per growth x capex pair
+    n_rates = len(discount_rates)
+    unique_flows = flows[::n_rates]
+    return {
+        "growth": growth,
+        "capex": capex,
+        "discount_rate": rate,
+        "npv": npv(rate, flows),
+        "irr": np.repeat(irr(unique_flows), n_rates),
+        "payback": np.repeat(payback_period(unique_flows), n_rates),
+    }
+
+
+def _axis(values: List[float], steps: int) -> np.ndarray:
+    """Values as given, or `steps` evenly spaced points between the first and last value."""
+    values = np.asarray(values, dtype=float)
+    if steps > 1 and len(values) >= 2:
+        return np.linspace(values.min(), values.max(), steps)
+    return values
+
+
+def _thin(axis: np.ndarray, count: int) -> np.ndarray:
+    """At most `count` evenly spread values of `axis`, always keeping both ends."""
+    return axis[np.unique(np.linspace(0, len(axis) - 1, min(count, len(axis))).round().astype(int))]
+
+
+def _money(value: float) -> str:
+    if np.isnan(value):
+        return "n/a"
+    for divisor, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= divisor:
+            return f"{value / divisor:,.1f}{suffix}"
+    return f"{value:,.0f}"
+
+
+def _pct(value: float) -> str:
+    return "n/a" if np.isnan(value) else f"{value:.1%}"
+
+
+def _years(value: float) -> str:
+    return "never" if np.isnan(value) else f"{value:.1f}y"
+
+
+class ValuationTools(Toolkit):
+    """NumPy valuation engine for business cases: NPV, IRR, payback and sensitivity grids."""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            name="valuation",
+            tools=[self.evaluate_investment, self.evaluate_cash_flows, self.sensitivity_analysis],
+            instructions=INSTRUCTIONS,
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def evaluate_investment(
+        self,
+        year1_revenue: float,
+        growth_rate: float,
+        capex: float,
+        discount_rate: float,
+        years: int = 5,
+        ebitda_margin: float = 0.4,
+        tax_rate: float = 0.0,
+        capex_phasing: Optional[List[float]] = None,
+    ) -> str:
+        """Use this function to compute NPV, IRR and payback for one investment case with a yearly projection.
+
+        Args:
+            year1_revenue (float): Revenue in year 1, e.g. 50000000 for USD 50M.
+            growth_rate (float): Annual revenue growth as a decimal, e.g. 0.4 for 40%.
+            capex (float): Total capital expenditure, e.g. 200000000 for USD 200M.
+            discount_rate (float): Discount rate (WACC) as a decimal, e.g. 0.12.
+            years (int): Number of operating years to project. Defaults to 5.
+            ebitda_margin (float): EBITDA as a share of revenue. Defaults to 0.4.
+            tax_rate (float): Tax rate applied to EBITDA. Defaults to 0.
+            capex_phasing (Optional[List[float]]): Share of capex spent in year 0, 1, ..., e.g. [0.6, 0.4].
+
+        Returns:
+            str: Markdown table of the yearly cash flows followed by NPV, IRR and payback.
+        """
+        try:
+            flows = project_cash_flows(
+                np.array([year1_revenue], dtype=float),
+                np.array([growth_rate], dtype=float),
+                np.array([capex], dtype=float),
+                years,
+                ebitda_margin,
+                tax_rate,
+                capex_phasing,
+            )
+            return self._summary(flows, discount_rate)
+        except (TypeError, ValueError) as e:
+            return f"Error: {e}"
+
+    def evaluate_cash_flows(self, cash_flows: List[float], discount_rate: float) -> str:
+        """Use this function to compute NPV, IRR and payback for explicit yearly cash flows.
+
+        Args:
+            cash_flows (List[float]): Cash flow per year starting with year 0, e.g. [-200000000, 20000000, 28000000].
+            discount_rate (float): Discount rate as a decimal, e.g. 0.12.
+
+        Returns:
+            str: Markdown table of the cash flows followed by NPV, IRR and payback.
+        """
+        try:
+            return self._summary(np.asarray([cash_flows], dtype=float), discount_rate)
+        except (TypeError, ValueError) as e:
+            return f"Error: {e}"
+
+    @staticmethod
+    def _summary(flows: np.ndarray, discount_rate: float) -> str:
+        if flows.shape[1] == 0:
+            raise ValueError("cash_flows needs at least one year")
+        if discount_rate <= -1.0:
+            raise ValueError("discount_rate must be above -1 (-100%)")
+        cumulative = np.cumsum(flows[0])
+        discounted = flows[0] / (1.0 + discount_rate) ** np.arange(flows.shape[1])
+        lines = ["| Year | Cash flow | Discounted | Cumulative |", "|---|---|---|---|"]
+        for year, (flow, disc, cum) in enumerate(zip(flows[0], discounted, cumulative)):
+            lines.append(f"| {year} | {_money(flow)} | {_money(disc)} | {_money(cum)} |")
+        lines += [
+            "",
+            f"NPV @ {discount_rate:.1%}: {_money(float(npv(np.array([discount_rate]), flows)[0]))}",
+            f"IRR: {_pct(float(irr(flows)[0]))}",
+            f"Payback: {_years(float(payback_period(flows)[0]))}",
+        ]
+        return "\n".join(lines)
+
+    def sensitivity_analysis(
+        self,
+        year1_revenue: float,
+        growth_rates: List[float],
+        capex_values: List[float],
+        discount_rates: List[float],
+        years: int = 5,
+        ebitda_margin: float = 0.4,
+        tax_rate: float = 0.0,
+        steps: int = 0,
+        capex_phasing: Optional[List[float]] = None,
+    ) -> str:
+        """Use this function to run a full growth x capex x discount rate sensitivity analysis in one call.
+
+        Args:
+            year1_revenue (float): Revenue in year 1.
+            growth_rates (List[float]): Growth rates to test as decimals, e.g. [0.2, 0.3, 0.4, 0.5].
+            capex_values (List[float]): Capex values to test, e.g. [150000000, 200000000, 250000000].
+            discount_rates (List[float]): Discount rates to test as decimals, e.g. [0.10, 0.12, 0.15].
+            years (int): Number of operating years to project. Defaults to 5.
+            ebitda_margin (float): EBITDA as a share of revenue. Defaults to 0.4.
+            tax_rate (float): Tax rate applied to EBITDA. Defaults to 0.
+            steps (int): If above 1, each list is treated as a [low, high] range and expanded to this many
+                evenly spaced values (e.g. steps=20 gives 8000 scenarios).
+            capex_phasing (Optional[List[float]]): Share of capex spent in year 0, 1, ...
+
+        Returns:
+            str: Scenario count, NPV/IRR distribution, share of value-creating scenarios and an NPV
+                table of growth x capex at the middle discount rate.
+        """
+        try:
+            return self._sensitivity(
+                year1_revenue,
+                growth_rates,
+                capex_values,
+                discount_rates,
+                years,
+                ebitda_margin,
+                tax_rate,
+                steps,
+                capex_phasing,
+            )
+        except (TypeError, ValueError) as e:
+            return f"Error: {e}"
+
+    @staticmethod
+    def _sensitivity(
+        year1_revenue: float,
+        growth_rates: List[float],
+        capex_values: List[float],
+        discount_rates: List[float],
+        years: int,
+        ebitda_margin: float,
+        tax_rate: float,
+        steps: int,
+        capex_phasing: Optional[List[float]],
+    ) -> str:
+        growth_axis = _axis(growth_rates, steps)
+        capex_axis = _axis(capex_values, steps)
+        rate_axis = _axis(discount_rates, steps)
+        grid = sensitivity_grid(
+            year1_revenue, growth_axis, capex_axis, rate_axis, years, ebitda_margin, tax_rate, capex_phasing
+        )
+        npvs, irrs = grid["npv"], grid["irr"]
+        p10, p50, p90 = np.percentile(npvs, [10, 50, 90])
+        lines = [
+            f"Scenarios: {len(npvs)} ({len(growth_axis)} growth x {len(capex_axis)} capex x {len(rate_axis)} discount rates)",
+            f"NPV P10 / P50 / P90: {_money(p10)} / {_money(p50)} / {_money(p90)}",
+            f"NPV > 0 in {np.mean(npvs > 0):.1%} of scenarios",
+        ]
+        if not np.all(np.isnan(irrs)):
+            lines.append(f"IRR range: {_pct(np.nanmin(irrs))} to {_pct(np.nanmax(irrs))}")
+
+        # Keep the table readable: at most 6 growth rows and 6 capex columns
+        rate = rate_axis[len(rate_axis) // 2]
+        growth_rows = _thin(growth_axis, 6)
+        capex_cols = _thin(capex_axis, 6)
+        lines += [
+            "",
+            f"NPV @ {rate:.1%} discount rate (rows: growth, columns: capex)",
+            "| Growth | " + " | ".join(_money(c) for c in capex_cols) + " |",
+            "|---|" + "---|" * len(capex_cols),
+        ]
+        table = sensitivity_grid(
+            year1_revenue, growth_rows, capex_cols, [rate], years, ebitda_margin, tax_rate, capex_phasing
+        )
+        values = table["npv"].reshape(len(growth_rows), len(capex_cols))
+        for growth, row in zip(growth_rows, values):
+            lines.append(f"| {growth:.1%} | " + " | ".join(_money(v) for v in row) + " |")
+        return "\n".join(lines)
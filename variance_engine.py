@@ -0,0 +1,313 @@
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from agno.tools import Toolkit
+
+from tabular_stream import DEFAULT_BATCH_ROWS, as_float, as_text, data_root, iter_batches, read_header
+
+INSTRUCTIONS = (
+    "For budget vs actual variance analysis over ledger/GL extract files call describe_ledger to learn the "
+    "columns, then analyze_variance. Never paste ledger rows into the conversation; work from the ranked variances."
+)
+
+RANKINGS = ("abs", "over", "under")
+
+
+@dataclass
+class VarianceTable:
+    """Budget and actual totals per group, as parallel arrays."""
+
+    group_by: Tuple[str, ...]
+    keys: List[Tuple[str, ...]]
+    budget: np.ndarray
+    actual: np.ndarray
+    rows: np.ndarray
+    rows_read: int
+    seconds: float
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.actual - self.budget
+
+    @property
+    def variance_pct(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.budget != 0, self.variance / np.abs(self.budget), np.nan)
+
+    def top(self, n: int = 15, rank_by: str = "abs") -> List[Dict[str, object]]:
+        """
+        The `n` largest variances.
+
+        Args:
+            n: Number of groups to return
+            rank_by: "abs" (largest either way), "over" (actual above budget) or "under" (actual below budget)
+
+        Returns:
+            One dict per group with its keys, budget, actual, variance and variance_pct
+        """
+        if rank_by not in RANKINGS:
+            raise ValueError(f"rank_by must be one of {RANKINGS}")
+        score = {"abs": np.abs(self.variance), "over": self.variance, "under": -self.variance}[rank_by]
+        order = np.argsort(-score, kind="stable")[:n]
+        if rank_by != "abs":
+            order = order[score[order] > 0]
+        return [
+            {
+                **dict(zip(self.group_by, self.keys[i])),
+                "budget": float(self.budget[i]),
+                "actual": float(self.actual[i]),
+                "variance": float(self.variance[i]),
+                "variance_pct": None if np.isnan(self.variance_pct[i]) else float(self.variance_pct[i]),
+            }
+            for i in order
+        ]
+
+    def rollup(self, column: str) -> "VarianceTable":
+        """Re-aggregate to a single grouping column (e.g. totals per segment)."""
+        position = self.group_by.index(column)
+        labels = np.array([key[position] for key in self.keys])
+        unique, inverse = np.unique(labels, return_inverse=True)
+        return VarianceTable(
+            group_by=(column,),
+            keys=[(label,) for label in unique.tolist()],
+            budget=np.bincount(inverse, weights=self.budget, minlength=len(unique)),
+            actual=np.bincount(inverse, weights=self.actual, minlength=len(unique)),
+            rows=np.bincount(inverse, weights=self.rows, minlength=len(unique)),
+            rows_read=self.rows_read,
+            seconds=self.seconds,
+        )
+
+
+def _group_codes(batch: Dict[str, np.ndarray], group_by: Sequence[str]) -> Tuple[np.ndarray, List[Tuple[str, ...]]]:
+    """Vectorized factorization of the group-by columns into one integer code per row."""
+    texts = [as_text(batch[column]) for column in group_by]
+    combined = np.zeros(len(texts[0]), dtype=np.int64)
+    for text in texts:
+        unique, inverse = np.unique(text, return_inverse=True)
+        # Re-factorize after every column so the combined code never overflows
+        _, combined = np.unique(combined * len(unique) + inverse, return_inverse=True)
+    _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    keys = list(zip(*(text[first].tolist() for text in texts)))
+    return inverse, keys
+
+
+def aggregate_variance(
+    paths: Union[str, Sequence[str]],
+    group_by: Sequence[str] = ("segment", "cost_centre", "period"),
+    budget_column: Optional[str] = "budget",
+    actual_column: Optional[str] = "actual",
+    scenario_column: Optional[str] = None,
+    amount_column: str = "amount",
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    root: Optional[Path] = None,
+) -> VarianceTable:
+    """
+    Stream ledgers and total budget and actual per group with vectorized group-bys.
+
+    Two layouts are supported: wide (separate budget and actual columns) and
+    long (an `amount_column` plus a `scenario_column` whose values are
+    "budget" or "actual", case-insensitive). Each batch is factorized with
+    np.unique and summed with np.bincount; only the per-group totals are kept
+    between batches, so memory depends on the number of groups, not rows.
+
+    Args:
+        paths: CSV/Parquet files or glob patterns (e.g. Kenya and Ethiopia extracts)
+        group_by: Columns to group by
+        budget_column: Budget amount column (wide layout)
+        actual_column: Actual amount column (wide layout)
+        scenario_column: Budget/actual flag column (long layout); overrides the wide columns
+        amount_column: Amount column (long layout)
+        filters: Column -> value or list of values rows must match
+        batch_rows: Rows per streamed batch
+        root: Data folder the files must be inside (see tabular_stream.expand_paths)
+
+    Returns:
+        VarianceTable with totals per group
+    """
+    started = time.perf_counter()
+    group_by = tuple(group_by)
+    if not group_by:
+        raise ValueError("group_by needs at least one column")
+    filters = filters or {}
+    if scenario_column:
+        value_columns = [scenario_column, amount_column]
+    else:
+        value_columns = [budget_column, actual_column]
+    columns = list(dict.fromkeys([*group_by, *value_columns, *filters]))
+
+    totals: Dict[Tuple[str, ...], np.ndarray] = {}
+    rows_read = 0
+    for batch in iter_batches(paths, columns, batch_rows, root):
+        size = len(batch[columns[0]])
+        rows_read += size
+        mask = np.ones(size, dtype=bool)
+        for column, wanted in filters.items():
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            mask &= np.isin(as_text(batch[column]), wanted)
+
+        if scenario_column:
+            scenario = np.char.lower(np.char.strip(as_text(batch[scenario_column])))
+            amount = np.nan_to_num(as_float(batch[amount_column]))
+            budget = np.where(scenario == "budget", amount, 0.0)
+            actual = np.where(scenario == "actual", amount, 0.0)
+            mask &= (scenario == "budget") | (scenario == "actual")
+        else:
+            budget = np.nan_to_num(as_float(batch[budget_column]))
+            actual = np.nan_to_num(as_float(batch[actual_column]))
+
+        if not mask.any():
+            continue
+        batch = {column: batch[column][mask] for column in group_by}
+        inverse, keys = _group_codes(batch, group_by)
+        sums = np.stack(
+            [
+                np.bincount(inverse, weights=budget[mask], minlength=len(keys)),
+                np.bincount(inverse, weights=actual[mask], minlength=len(keys)),
+                np.bincount(inverse, minlength=len(keys)).astype(np.float64),
+            ],
+            axis=1,
+        )
+        for key, row in zip(keys, sums):
+            if key in totals:
+                totals[key] += row
+            else:
+                totals[key] = row
+
+    keys = sorted(totals)
+    matrix = np.array([totals[key] for key in keys]) if keys else np.zeros((0, 3))
+    return VarianceTable(
+        group_by=group_by,
+        keys=keys,
+        budget=matrix[:, 0],
+        actual=matrix[:, 1],
+        rows=matrix[:, 2],
+        rows_read=rows_read,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _amount(value: float) -> str:
+    for divisor, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= divisor:
+            return f"{value / divisor:,.2f}{suffix}"
+    return f"{value:,.0f}"
+
+
+def format_variances(table: VarianceTable, top_n: int = 15, rank_by: str = "abs") -> str:
+    """Markdown summary: overall totals, totals per first group column and the ranked top variances."""
+    budget, actual = table.budget.sum(), table.actual.sum()
+    lines = [
+        f"{table.rows_read:,} rows streamed in {table.seconds:.2f}s into {len(table.keys):,} groups "
+        f"({' x '.join(table.group_by)})",
+        f"Total budget {_amount(budget)}, actual {_amount(actual)}, variance {_amount(actual - budget)}"
+        + (f" ({(actual - budget) / abs(budget):+.1%})" if budget else ""),
+    ]
+    if len(table.group_by) > 1:
+        rollup = table.rollup(table.group_by[0])
+        lines += ["", f"| {table.group_by[0]} | Budget | Actual | Variance | Var % |", "|---|---|---|---|---|"]
+        for item in rollup.top(len(rollup.keys), "abs"):
+            pct = "n/a" if item["variance_pct"] is None else f"{item['variance_pct']:+.1%}"
+            lines.append(
+                f"| {item[table.group_by[0]]} | {_amount(item['budget'])} | {_amount(item['actual'])} | "
+                f"{_amount(item['variance'])} | {pct} |"
+            )
+
+    header = " | ".join(table.group_by)
+    lines += [
+        "",
+        f"Top {top_n} variances ({rank_by})",
+        f"| {header} | Budget | Actual | Variance | Var % |",
+        "|" + "---|" * (len(table.group_by) + 4),
+    ]
+    for item in table.top(top_n, rank_by):
+        pct = "n/a" if item["variance_pct"] is None else f"{item['variance_pct']:+.1%}"
+        keys = " | ".join(str(item[column]) for column in table.group_by)
+        lines.append(
+            f"| {keys} | {_amount(item['budget'])} | {_amount(item['actual'])} | {_amount(item['variance'])} | {pct} |"
+        )
+    return "\n".join(lines)
+
+
+class VarianceTools(Toolkit):
+    """
+    Budget vs actual variance analysis over large ledger files for the Budget Planning Manager.
+
+    Tools only read files inside `data_dir` (default: $LEDGER_DATA_DIR, else ./finance_data).
+    """
+
+    def __init__(self, batch_rows: int = DEFAULT_BATCH_ROWS, data_dir: Optional[str] = None, **kwargs):
+        self.batch_rows = batch_rows
+        self.data_dir = data_root(data_dir)
+        super().__init__(
+            name="variance_analysis",
+            tools=[self.describe_ledger, self.analyze_variance],
+            instructions=INSTRUCTIONS,
+            add_instructions=True,
+            **kwargs,
+        )
+
+    def describe_ledger(self, path: str) -> str:
+        """Use this function to see the columns and first rows of a ledger file before analyzing it.
+
+        Args:
+            path (str): CSV or Parquet ledger file, relative to the data folder.
+
+        Returns:
+            str: JSON with the column names and a few sample rows.
+        """
+        try:
+            return json.dumps(read_header(path, root=self.data_dir), default=str)
+        except (OSError, ImportError, ValueError) as e:
+            return f"Error: {e}"
+
+    def analyze_variance(
+        self,
+        paths: List[str],
+        group_by: List[str],
+        budget_column: Optional[str] = "budget",
+        actual_column: Optional[str] = "actual",
+        scenario_column: Optional[str] = None,
+        amount_column: str = "amount",
+        filters: Optional[Dict[str, str]] = None,
+        top_n: int = 15,
+        rank_by: str = "abs",
+    ) -> str:
+        """Use this function to compute budget vs actual variances over ledger files of any size.
+
+        Args:
+            paths (List[str]): CSV/Parquet ledger files or glob patterns relative to the data folder,
+                e.g. ["ledgers/kenya_*.csv"].
+            group_by (List[str]): Columns to group by, e.g. ["segment", "cost_centre", "period"].
+            budget_column (Optional[str]): Budget amount column when budget and actual are separate columns.
+            actual_column (Optional[str]): Actual amount column when budget and actual are separate columns.
+            scenario_column (Optional[str]): Column whose values are "Budget"/"Actual" when amounts are in one
+                column; set amount_column too.
+            amount_column (str): Amount column used with scenario_column.
+            filters (Optional[Dict[str, str]]): Only include rows matching these values, e.g. {"country": "Ethiopia"}.
+            top_n (int): Number of variances to return. Defaults to 15.
+            rank_by (str): "abs" for the largest variances either way, "over" for overspend/overachievement
+                (actual above budget), "under" for actual below budget.
+
+        Returns:
+            str: Totals, a summary per first group column and the ranked top variances as markdown tables.
+        """
+        try:
+            table = aggregate_variance(
+                paths,
+                group_by=group_by,
+                budget_column=budget_column,
+                actual_column=actual_column,
+                scenario_column=scenario_column,
+                amount_column=amount_column,
+                filters=filters,
+                batch_rows=self.batch_rows,
+                root=self.data_dir,
+            )
+            return format_variances(table, top_n=top_n, rank_by=rank_by)
+        except (OSError, ImportError, ValueError) as e:
+            return f"Error: {e}"